@@ -19,9 +19,9 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
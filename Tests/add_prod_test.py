@@ -1,7 +1,8 @@
 """
 @brief Test script for adding a product in the gestion_stock application
 @details This script simulates user input to add a product without an ID and then 
-exits the application.    
+exits the application. Input is driven through a persistent session (utils.session),
+which also times the add operation.    
 @note Ensure the gestion_stock application is built and the binary path is correct.
 
 """
@@ -17,23 +18,22 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.scenarios import SCENARIOS
+from utils.session import take_session
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
 
 
 # Simulate input: choice 1 → nom → quantite → prix → then quit with option 0
-simulated_input = "\n".join([
-    "1",           # Menu: Ajouter un produit
-    "Clavier",     # Produit.nom
-    "25",          # Produit.quantite
-    "49.99",       # Produit.prix
-    "0"            # Menu: Quitter
-]) + "\n"
+# (Produit.nom, Produit.quantite, Produit.prix, from the "add" scenario of utils/scenarios.py)
+simulated_product = SCENARIOS["add"][0][1]
 
 def run_scenario_test():
     try:
@@ -42,23 +42,18 @@ def run_scenario_test():
         #    print(" Smoke test failed. Aborting further tests. Can select Theem")
         #    sys.exit(1)
         print(f" Scenario: Ajouter un produit (sans ID) & quitter")
-        proc = subprocess.Popen(
-            [BINARY_PATH, "--test-mode"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = proc.communicate(simulated_input, timeout=10)
+        session = take_session(BINARY_PATH, timeout=10)
+        stdout = session.banner + session.add_product(*simulated_product)
+        returncode = session.close()
         print(stdout)  # ← observe si le menu s'affiche
 
-        if proc.returncode == 0:
+        if returncode == 0:
             print(" Test réussi : produit ajouté et fermeture sans erreur.")
         else:
-            print(f" Code de sortie inattendu : {proc.returncode}")
-            sys.exit(proc.returncode)
-    except subprocess.TimeoutExpired:
-        print(" Échec : délai dépassé — vérifiez les pauses ou les lectures bloquantes.")
+            print(f" Code de sortie inattendu : {returncode}")
+            sys.exit(returncode)
+    except subprocess.TimeoutExpired as e:
+        print(f" Échec : délai dépassé — vérifiez les pauses ou les lectures bloquantes. ({e})")
         sys.exit(1)
     except Exception as e:
         print(f" Erreur inattendue : {e}")
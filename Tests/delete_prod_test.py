@@ -2,13 +2,13 @@
 @file delete_prod_test.py
 @brief Automated test script for product deletion validation in gestion_stock.
 @details Tests deletion of product IDs 1–12, verifying success via normalized stdout.
+         All IDs are swept through one persistent binary session (utils.session).
 @note Requires built binary. Theme initialization is included.
 """
 
 import subprocess
 import sys
 import os
-import unicodedata
 #from Theem import run_theme_initialization_test
 
 # Project and binary path setup
@@ -18,47 +18,30 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.scenarios import SCENARIOS
+from utils.session import take_session
+from utils.signatures import registry_signatures
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
 
-def normalize(text):
-    """
-    Normalize text output: removes accents and converts to lowercase
-    for reliable keyword matching across encodings and formatting.
-    """
-    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
-
-def simulate_deletion(prod_id):
+def simulate_deletion(prod_id, session, confirm="o"):
     """
-    Simulates deletion of a product by ID.
+    Simulates deletion of a product by ID inside an open session.
+    Menu 3 → product ID → confirmation (only sent when the binary asks for it).
     Returns True if 'Produit supprimé' appears in output, else False.
     """
-    input_sequence = "\n".join([
-        "3",             # Menu: Delete product
-        str(prod_id),    # Product ID input
-        "o",             # Confirm deletion
-        "0"              # Exit
-    ]) + "\n"
-
     try:
-        proc = subprocess.Popen(
-            [BINARY_PATH, "--test-mode"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding='utf-8'
-        )
-        stdout, stderr = proc.communicate(input=input_sequence, timeout=10)
-        normalized = normalize(stdout + stderr)
+        output = session.delete_product(str(prod_id), confirm=confirm)
 
-        # Check for deletion confirmation string
-        if "produit supprime" in normalized:
+        # Check for deletion confirmation string (accent- and encoding-insensitive)
+        if registry_signatures("delete").scan(output).found("product_deleted"):
             return True
         return False
 
@@ -76,8 +59,14 @@ def run_deletion_test():
     #    sys.exit(1)
 
     results = {}
-    for pid in range(1, 5):
-        results[pid] = simulate_deletion(pid)
+    try:
+        with take_session(BINARY_PATH, timeout=10) as session:
+            # (ID, confirmation) of the "delete" scenario in utils/scenarios.py
+            for _, (pid, confirm) in SCENARIOS["delete"]:
+                results[int(pid)] = simulate_deletion(pid, session, confirm)
+    except Exception as e:
+        print(f" Session error: {e}")
+        results.update({int(pid): False for _, (pid, _) in SCENARIOS["delete"] if int(pid) not in results})
 
     print("\n Deletion Test Summary:")
     for pid, success in results.items():
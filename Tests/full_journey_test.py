@@ -2,13 +2,18 @@
 @file full_journey_test.py
 @brief Comprehensive lifecycle validation of gestion_stock application.
 @details Adds, lists, modifies, and deletes a product in a simulated CLI session.
+         The binary's output is streamed in byte chunks: echoed as it arrives, fed once to the
+         "journey" signature scanner and, for the listing, to the ListingParser, without ever
+         being held in full. After each stage, stockt.db is read (read-only, by primary key, utils.db_verify) to
+         confirm the product was stored and then removed, not just reported so.
 @note Split into two main functions for clarity and modularity.
 """
 
 import subprocess
 import sys
 import os
-import unicodedata
+import codecs
+import threading
 from datetime import datetime
 import platform
 import stat
@@ -17,49 +22,91 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.db_verify import StockDatabase
+from utils.listing_parser import iter_chunks, iter_products
+from utils.scenarios import SCENARIOS, to_input_lines, with_product_id
+from utils.session import SampledPopen
+from utils.signatures import registry_signatures
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
 
-def normalize(text):
-    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+# The "journey" scenario of utils/scenarios.py: add & list, then modify & delete
+ADD_AND_LIST, MODIFY_AND_DELETE = SCENARIOS["journey"][:2], SCENARIOS["journey"][2:]
+# Product added by the journey: nom, quantité, prix
+JOURNEY_PRODUCT = ADD_AND_LIST[0][1]
+# Seconds each binary run may take
+RUN_TIMEOUT = 20
 
 def log_event(tag, message):
     timestamp = datetime.now().strftime('%H:%M:%S')
     print(f"[{timestamp}] [{tag}] {message}")
 
-def extract_first_product_id(output):
-    for line in output.splitlines():
-        if line.strip().lower().startswith("id:"):
-            try:
-                product_id = int(line.split(":")[1].split("|")[0].strip())
-                if 1 <= product_id <= 5:
-                    return product_id
-            except:
-                continue
+def stream_binary(input_sequence, scanner, timeout=RUN_TIMEOUT):
+    """
+    Runs the binary on `input_sequence` and yields its output (stdout and stderr) as byte chunks,
+    echoing each chunk and feeding it to `scanner` on the way.
+
+    Raises:
+        subprocess.TimeoutExpired: If the run takes longer than `timeout` seconds.
+    """
+    proc = SampledPopen(
+        [BINARY_PATH, "--test-mode"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT
+    )
+    expired = threading.Event()
+    timer = threading.Timer(timeout, lambda: (expired.set(), proc.kill()))
+    timer.start()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        proc.stdin.write(input_sequence.encode("utf-8"))
+        proc.stdin.close()
+        for chunk in iter_chunks(proc.stdout):
+            scanner.feed(chunk)
+            sys.stdout.write(decoder.decode(chunk))
+            yield chunk
+        sys.stdout.write(decoder.decode(b"", final=True) + "\n")
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        proc.wait()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(proc.args, timeout)
+
+def extract_first_product_id(chunks):
+    """
+    Returns the first listed product ID in range 1–5 from an iterable of byte chunks,
+    stopping at the first match.
+    """
+    for product in iter_products(chunks):
+        if 1 <= product.id <= 5:
+            return product.id
     return None
 
-def analyze_output(output):
-    normalized = normalize(output)
-    success_prompts = ["produit ajoute", "liste des produits", "produit modifie", "produit supprime"]
-    failure_signatures = ["erreur", "exception", "segfault", "inexistant", "crash"]
-    allowed_invalid_contexts = ["entree invalide. veuillez entrer un entier non negatif"]
+def analyze_output(result):
+    """
+    Checks the journey's scan result against the "journey" signatures of
+    meta/meta_SIGNATURE_REGISTRY.py, matched in a single pass over both runs.
+
+    Args:
+        result (ScanResult): `registry_signatures("journey").scanner()` fed with the whole journey.
+    """
 
-    for msg in success_prompts:
-        if msg in normalized:
-            log_event("CONFIRM", f"Detected: '{msg}'")
+    for msg in result.matched("success"):
+        log_event("CONFIRM", f"Detected: '{msg}'")
 
-    missing_success = [msg for msg in success_prompts if msg not in normalized]
-    detected_failures = [fail for fail in failure_signatures if fail in normalized]
+    missing_success = result.missing("success")
+    detected_failures = result.matched("failure")
 
-    if "invalid" in normalized:
-        for context in allowed_invalid_contexts:
-            if context in normalized:
-                log_event("INFO", f"Ignored benign validation prompt: '{context}'")
-                detected_failures = [f for f in detected_failures if f != "invalid"]
+    if result.found("menu_retry_prompt"):
+        log_event("INFO", "Ignored benign validation prompt: 'menu_retry_prompt'")
 
     if missing_success:
         log_event("WARN", "Missing expected success indicators:")
@@ -74,75 +121,79 @@ def analyze_output(output):
 
     log_event("PASS", " Full journey validated successfully.")
 
-def add_and_list_product():
+def add_and_list_product(scanner):
     """
     Adds a product and lists products to extract a valid ID.
     """
     log_event("START", f"Launching gestion_stock binary: {BINARY_PATH} (Add & List)")
 
-    input_sequence = "\n".join([
-        "1", "Clavier", "25", "49.99",  # Add product
-        "2",                            # List products
-        "0"                             # Quit
-    ]) + "\n"
-
-    proc = subprocess.Popen(
-        [BINARY_PATH, "--test-mode"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        encoding='utf-8'
-    )
-    stdout, stderr = proc.communicate(input=input_sequence, timeout=20)
+    # Add product, list products, quit
+    input_sequence = "\n".join(to_input_lines(ADD_AND_LIST) + ["0"]) + "\n"
 
-    log_event("STDOUT", stdout)
-    log_event("STDERR", stderr)
+    log_event("STDOUT", "")
+    chunks = stream_binary(input_sequence, scanner)
+    product_id = extract_first_product_id(chunks)
+    for _ in chunks:  # drain the rest of the run: the scanner still sees all of it
+        pass
 
-    product_id = extract_first_product_id(stdout)
     if product_id is None:
         log_event("FAIL", "No valid product found in range 1–5 to modify/delete.")
         sys.exit(1)
 
     log_event("INFO", f"Using dynamic product ID: {product_id}")
-    return stdout + stderr, product_id
+    return product_id
 
-def modify_and_delete_product(product_id):
+def verify_added_product():
     """
-    Modifies and deletes the product using the extracted ID.
+    Checks that the latest row in the database is the product the journey added.
+
+    Raises:
+        VerificationError: If it is missing or any field differs.
     """
-    log_event("START", f"Launching gestion_stock binary: {BINARY_PATH} (Modify & Delete)")
+    nom, quantite, prix = JOURNEY_PRODUCT
+    with StockDatabase.for_binary(BINARY_PATH) as db:
+        product = db.last_product()
+        if product is None:
+            raise AssertionError("No product stored after the add.")
+        db.assert_product(product.id, nom=nom, quantite=quantite, prix=prix)
+    log_event("DB", f"Stored: {tuple(product)}")
+
+def verify_deleted_product(product_id):
+    """
+    Checks that the deleted product no longer has a row.
 
-    input_sequence = "\n".join([
-        "4", str(product_id), "Clavier RGB", "50", "59.99",  # Modify
-        "3", str(product_id), "o",                           # Delete
-        "0"                                                  # Quit
-    ]) + "\n"
+    Raises:
+        VerificationError: If the row is still stored.
+    """
+    with StockDatabase.for_binary(BINARY_PATH) as db:
+        db.assert_absent(product_id)
+    log_event("DB", f"ID {product_id} removed from the database")
 
-    proc = subprocess.Popen(
-        [BINARY_PATH, "--test-mode"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        encoding='utf-8'
-    )
-    stdout, stderr = proc.communicate(input=input_sequence, timeout=20)
+def modify_and_delete_product(product_id, scanner):
+    """
+    Modifies and deletes the product using the extracted ID.
+    """
+    log_event("START", f"Launching gestion_stock binary: {BINARY_PATH} (Modify & Delete)")
 
-    log_event("STDOUT", stdout)
-    log_event("STDERR", stderr)
+    # Modify, delete (confirmed), quit
+    input_sequence = "\n".join(to_input_lines(with_product_id(MODIFY_AND_DELETE, product_id)) + ["0"]) + "\n"
 
-    return stdout + stderr
+    log_event("STDOUT", "")
+    for _ in stream_binary(input_sequence, scanner):
+        pass
 
 def run_full_journey():
     """
     Executes the full lifecycle in two stages.
     """
     try:
-        output1, product_id = add_and_list_product()
-        output2 = modify_and_delete_product(product_id)
+        scanner = registry_signatures("journey").scanner()
+        product_id = add_and_list_product(scanner)
+        verify_added_product()
+        modify_and_delete_product(product_id, scanner)
+        verify_deleted_product(product_id)
         log_event("ANALYSIS", "Beginning output analysis...")
-        analyze_output(output1 + output2)
+        analyze_output(scanner.finish())
     except AssertionError as ae:
         log_event("FAIL", f"Assertion failure: {ae}")
         sys.exit(1)
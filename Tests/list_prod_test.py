@@ -2,13 +2,15 @@
 @file list_prod_test.py
 @brief Test script for listing products in gestion_stock application.
 @details Simulates the “Lister les produits” option. Verifies that listed items include expected fields and reports any missing data.
+         The listing is streamed from a persistent session (utils.session) and parsed as bytes
+         (utils.listing_parser), so memory stays flat even for very large catalogs. The sampled
+         rows are cross-checked against stockt.db, read-only, by primary key (utils.db_verify).
 @note Ensure the gestion_stock application is built and at least one product has been added for a full test.
 """
 
 import subprocess
 import sys
 import os
-import unicodedata
 #from Theem import run_theme_initialization_test
 
 # 🔎 Resolve path to project root
@@ -18,66 +20,64 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.db_verify import StockDatabase, VerificationError
+from utils.listing_parser import ListingParser, iter_products
+from utils.session import take_session
+
+# Number of product lines echoed to stdout; the rest are only counted
+SAMPLE_SIZE = 5
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
 
-def normalize(text):
-    """
-    Normalizes accented characters and converts to lowercase for reliable comparison.
-    """
-    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
-
 def run_listing_test():
     """
     Runs theme initialization, simulates option 2 (Lister les produits),
-    and checks for presence of product field keywords.
+    and validates every listed product record while streaming the output.
     Prints which fields are missing if validation fails.
     """
     #print(f"🚦 Launching theme initialization test: {BINARY_PATH}")
     #if not run_theme_initialization_test():
     #    sys.exit(1)
-    # Simulate listing products and quitting
-    input_sequence = "\n".join([
-        "2",  # Menu: Lister les produits
-        "0"   # Menu: Quitter
-    ]) + "\n"
-
     try:
-        proc = subprocess.Popen(
-            [BINARY_PATH, "--test-mode"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding='utf-8'  # ✅ Cross-platform UTF-8 decoding
-        )
-        stdout, _ = proc.communicate(input=input_sequence, timeout=10)
-        print(f" STDOUT:\n{stdout}")
+        parser = ListingParser()
+        sample = []
+        # Menu 2 (Lister les produits), then 0 (Quitter) when the session closes
+        with take_session(BINARY_PATH, timeout=10) as session:
+            for product in iter_products(session.stream(["2"], op="list"), parser):
+                if parser.count <= SAMPLE_SIZE:
+                    print(f" ID: {product.id} | Nom: {product.nom} | Quantité: {product.quantite} | Prix: {product.prix:.2f}")
+                    sample.append(product)
 
-        normalized = normalize(stdout)
+        # The listing must show what is stored: compare the sampled rows field by field
+        with StockDatabase.for_binary(BINARY_PATH) as db:
+            for product in sample:
+                db.assert_product(product.id, nom=product.nom, quantite=product.quantite, prix=product.prix, decimals=2)
 
-        required_fields = ["liste des produits", "id", "nom", "quantite", "prix"]
-        missing_fields = [field for field in required_fields if field not in normalized]
-
-        if "liste des produits" in normalized:
-            if not missing_fields:
+        if parser.header_seen:
+            print(f" Liste des produits : {parser.count} produit(s) lu(s).")
+            if parser.count:
                 print(" Test réussi : tous les champs du produit sont présents dans la sortie.")
             else:
                 print(" Test partiellement réussi : les champs suivants sont manquants ou mal encodés →")
-                for field in missing_fields:
+                for field in ["id", "nom", "quantite", "prix"]:
                     print(f"    Champ absent : {field}")
                 sys.exit(1)
         else:
-            print(" Aucun produit trouvé — pensez à en ajouter avant de relancer ce test.")
+            print(" Aucun produit trouvé — lancez ce test depuis la fixture catalog_small (python3 -m utils.snapshots restore catalog_small).")
             sys.exit(1)
 
-    except subprocess.TimeoutExpired:
-        print(" Délai dépassé — vérifiez les blocages d'entrée ou pauses inattendues.")
+    except subprocess.TimeoutExpired as e:
+        print(f" Délai dépassé — vérifiez les blocages d'entrée ou pauses inattendues. ({e})")
+        sys.exit(1)
+    except VerificationError as e:
+        print(f" Listing et base de données divergent : {e}")
         sys.exit(1)
     except Exception as e:
         print(f" Erreur inattendue : {e}")
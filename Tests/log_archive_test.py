@@ -0,0 +1,70 @@
+"""
+@file log_archive_test.py
+@brief Checks that the log archive stores repeated test logs in less space than the logs themselves.
+@details Archives a series of near-identical runner logs (same menus and messages, a different
+         timestamp and product ID in each) into a throwaway archive (utils/log_archive.py), then
+         checks that every log reads back unchanged and that the bytes stored on disk (chunks and
+         index) stay below the logical bytes of the logs.
+@note Does not launch the binary.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+sys.path.insert(0, PROJECT_ROOT)
+from utils.log_archive import LogArchive
+
+# Nombre d'exécutions presque identiques archivées
+RUNS = 50
+
+MENU = ("=== Gestion de Stock ===\n1. Ajouter un produit\n2. Lister les produits\n"
+        "3. Supprimer un produit\n4. Modifier un produit\n0. Quitter\nChoix : ")
+
+def build_log(run):
+    """
+    Returns a runner log for run number `run`: only the timestamp and the product ID change.
+    """
+    timestamp = f"2025-08-{1 + run % 28:02d}_01-{run % 60:02d}-{(run * 7) % 60:02d}"
+    return (f"[{timestamp}] Running: add_prod_test.py\n"
+            "📁 Working Directory: /tmp/sandbox\n"
+            "📦 DB File: stockt.db | Exists: True\n\n"
+            "📤 STDOUT:\nScenario: Ajouter un produit (sans ID) & quitter\n\n"
+            f"{MENU}Nom : Quantité : Prix : Produit ajouté avec succès.\n\n"
+            f"{MENU}Au revoir !\n\n"
+            f" Produit {run + 1} ajouté.\n Test réussi : produit ajouté et fermeture sans erreur.\n\n"
+            "❌ STDERR:\n\n\n"
+            "🔚 Exit Code: 0\n"
+            "🔎 Output Match: Produit ajouté avec succès\n")
+
+def run_log_archive_test():
+    """
+    Archives RUNS near-identical logs and checks round trip and stored size.
+    """
+    root = tempfile.mkdtemp(prefix="log_archive_test_")
+    try:
+        archive = LogArchive(root)
+        logs = {f"add_prod_test_{run:03d}": build_log(run) for run in range(RUNS)}
+        for name, text in logs.items():
+            archive.write_log(name, text)
+
+        for name, text in logs.items():
+            if archive.read_log(name) != text:
+                print(f" Échec : le log {name} n'est pas restitué à l'identique.")
+                sys.exit(1)
+
+        stats = archive.stats()
+        print(f" {stats['logs']} logs : {stats['logical_bytes']} octets logiques, "
+              f"{stats['stored_bytes']} octets stockés.")
+        if stats["stored_bytes"] >= stats["logical_bytes"]:
+            print(" Échec : l'archive occupe plus de place que les logs eux-mêmes.")
+            sys.exit(1)
+        print(" Archive compacte : stockage inférieur aux logs bruts.")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    run_log_archive_test()
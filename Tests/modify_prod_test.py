@@ -3,14 +3,16 @@
 @brief Test script for modifying a product in the gestion_stock application.
 @details Checks whether IDs 1–5 can be modified. If a valid product is found, it updates 
          the product with a new name and extreme quantity/price values. Otherwise, confirms
-         the application responds properly for nonexistent IDs.
+         the application responds properly for nonexistent IDs. All IDs are probed through
+         one persistent binary session (utils.session). Each answer is then checked in stockt.db,
+         read-only (utils.db_verify): a modified row must hold the new values, an ID reported as
+         nonexistent must have no row.
 @note Ensure the gestion_stock application is built and the binary path is correct.
 """
 
 import subprocess
 import sys
 import os
-import unicodedata
 #from Theem import run_theme_initialization_test
 
 # 🔎 Resolve path to project root, assuming script is in tests/
@@ -20,65 +22,83 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.db_verify import StockDatabase, VerificationError
+from utils.scenarios import SCENARIOS
+from utils.session import take_session
+from utils.signatures import registry_signatures
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
 
-def normalize(text):
-    """
-    Normalizes accented characters to ASCII equivalents for easier comparison.
-    """
-    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+# (ID, nouveau nom, quantité extrême, prix extrême) essayés dans l'ordre : scénario "modify" de utils/scenarios.py
+MODIFY_STEPS = [args for _, args in SCENARIOS["modify"]]
 
-def simulate_modification(prod_id):
+def simulate_modification(prod_id, values, session):
     """
-    Simulates an attempt to modify a product with the given ID.
-    If the product exists, modifies its name, quantity, and price.
+    Simulates an attempt to modify a product with the given ID inside an open session.
+    If the product exists, modifies its name, quantity, and price to `values`.
+
+    Returns:
+        str: "modified", "missing" (nonexistent product), "invalid" (value refused),
+        "unexpected" (no known answer), "timeout" or "error".
     """
     print(f" Testing modification for ID = {prod_id}")
-    input_sequence = "\n".join([
-        "4",            # Menu: Modifier un produit
-        str(prod_id),   # ID du produit
-        "SuperModif",   # Nouveau nom
-        "99999",        # Quantité extrême
-        "999999.99",    # Prix extrême
-        "0"             # Quitter
-    ]) + "\n"
-
     try:
-        proc = subprocess.Popen(
-            [BINARY_PATH, "--test-mode"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, _ = proc.communicate(input=input_sequence, timeout=10)
+        stdout = session.modify_product(str(prod_id), *values)
 
         # 🧪 Print full stdout for debug purposes
         #print(f" STDOUT for ID {prod_id}:\n{stdout}")
 
-        # 🔍 Normalize and search output
-        norm_out = normalize(stdout)
-        if "inexistant" in norm_out or "invalide" in norm_out:
+        # 🔍 Search output once for the "modify" signatures
+        result = registry_signatures("modify").scan(stdout)
+        if result.found("product_missing"):
             print(f" ID {prod_id} invalide — produit inexistant.")
-            return False
-        elif "modifie" in norm_out or "modification" in norm_out:
+            return "missing"
+        elif result.found("invalid_value"):
+            print(f" ID {prod_id} : valeur refusée (invalide).")
+            return "invalid"
+        elif result.found("modification_done"):
             print(f" Modification réussie pour l’ID {prod_id}.")
-            return True
+            return "modified"
         else:
             print(f" Comportement inattendu pour l’ID {prod_id}.")
-            return False
-    except subprocess.TimeoutExpired:
-        print(" Échec : délai dépassé — entrée bloquante ou pause console non ignorée.")
-        return False
+            return "unexpected"
+    except subprocess.TimeoutExpired as e:
+        print(f" Échec : délai dépassé — entrée bloquante ou pause console non ignorée. ({e})")
+        return "timeout"
     except Exception as e:
         print(f" Erreur inattendue : {e}")
-        return False
+        return "error"
+
+def verify_modification(prod_id, values, outcome):
+    """
+    Checks in the database that the binary persisted what it reported for `prod_id`.
+
+    Only a modification or a "produit inexistant" answer says something about the row; any
+    other outcome (refused value, unexpected output, timeout) is not checked.
+
+    Args:
+        outcome (str): What `simulate_modification()` returned.
+
+    Raises:
+        VerificationError: If the stored row disagrees with the reported outcome.
+    """
+    if outcome not in ("modified", "missing"):
+        print(f" Pas de vérification en base pour l’ID {prod_id} (résultat : {outcome}).")
+        return
+    nom, quantite, prix = values
+    with StockDatabase.for_binary(BINARY_PATH) as db:
+        if outcome == "modified":
+            db.assert_product(prod_id, nom=nom, quantite=quantite, prix=prix)
+        else:
+            db.assert_absent(prod_id)
+    print(f" Base de données conforme pour l’ID {prod_id}.")
 
 def run_modification_test():
     """
@@ -89,11 +109,19 @@ def run_modification_test():
     #    sys.exit(1)
 
     any_success = False
-    for pid in range(1, 6):
-        result = simulate_modification(pid)
-        if result:
-            any_success = True
-            break  # Une réussite suffit pour valider la modification
+    try:
+        with take_session(BINARY_PATH, timeout=10) as session:
+            for pid, *values in MODIFY_STEPS:
+                outcome = simulate_modification(pid, values, session)
+                verify_modification(pid, values, outcome)
+                if outcome == "modified":
+                    any_success = True
+                    break  # Une réussite suffit pour valider la modification
+    except VerificationError as e:
+        print(f" Persistance incorrecte : {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f" Erreur de session : {e}")
 
     if not any_success:
         print(" Test passé : Aucun ID valide, comportement attendu.")
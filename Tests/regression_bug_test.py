@@ -16,17 +16,22 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.session import SampledPopen
+from utils.signatures import registry_signatures
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
 
 def analyze_output(output):
     """
-    Scans output for regression indicators or incomplete fixes.
+    Scans output for regression indicators or incomplete fixes, in one pass over the
+    "regression" signatures of meta/meta_SIGNATURE_REGISTRY.py.
 
     Parameters:
         output (str): Combined stdout and stderr output of the tested binary.
@@ -34,21 +39,13 @@ def analyze_output(output):
     Raises:
         AssertionError: If known error pattern or incomplete fix is detected.
     """
-    known_error_signatures = [
-        "Segmentation fault",
-        "Memory corruption",
-        "Unhandled exception",
-        "Invalid input",
-        "freeze",
-        "crash"
-    ]
-
-    for signature in known_error_signatures:
-        if signature.lower() in output.lower():
-            raise AssertionError(f" Regression detected: {signature}")
+    result = registry_signatures("regression").scan(output)
+    failures = result.matched("failure")
+    if failures:
+        raise AssertionError(f" Regression detected: {failures[0]}")
 
     # Optional: Validate known-good behavior
-    if "Produit:" in output:
+    if result.found("listing_row"):
         print("Product listing appears in output — logic intact.")
     else:
         print("Expected listing output not found — verify edge case handling.")
@@ -68,7 +65,7 @@ def run_regression_test():
 
     try:
         # 🚀 Launch the binary with piped input
-        proc = subprocess.Popen(
+        proc = SampledPopen(
             [BINARY_PATH, "--test-mode"],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
@@ -1,11 +1,15 @@
 """
 @brief Smoke test for the gestion_stock application
 @details This script runs a basic scenario to ensure the application starts and can handle user input.
+         With --benchmark it instead measures startup-to-exit latency over many launches,
+         warm and cold, for several database sizes (see utils/startup_bench.py).
 @note Ensure the gestion_stock application is built and the binary path is correct.
 """
 import subprocess
 import sys
 import os
+import argparse
+import datetime
 #from Theem import run_theme_initialization_test
 
 # 🔎 Resolve path to project root, assuming script is in tests/
@@ -15,10 +19,13 @@ import stat
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 BUILD_DIR = os.path.join(PROJECT_ROOT, "build")
 
+sys.path.insert(0, PROJECT_ROOT)
+from utils.session import SampledPopen
+
 if platform.system() == "Windows":
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock.exe")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock.exe"))
 else:
-    BINARY_PATH = os.path.join(BUILD_DIR, "gestion_stock_linux")
+    BINARY_PATH = os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, "gestion_stock_linux"))
     #change permissions to make it executable ;chmod +x build/gestion_stock_linux
     st = os.stat(BINARY_PATH)
     os.chmod(BINARY_PATH, st.st_mode | stat.S_IEXEC)
@@ -29,18 +36,24 @@ def run_headless_test():
         #if not run_theme_initialization_test():
         #    print(" Smoke test failed. Aborting further tests. Can select Theem")
         #    sys.exit(1)
-        result = subprocess.run(
+        # SampledPopen records the run's resource usage for the test runner
+        proc = SampledPopen(
             [BINARY_PATH, "--test-smoke"],
             stdin=subprocess.DEVNULL,
             stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            timeout=5
+            stderr=subprocess.DEVNULL
         )
-        if result.returncode == 0:
+        try:
+            returncode = proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise
+        if returncode == 0:
             print(" Binary opened and exited cleanly.")
         else:
-            print(f" Binary exited with return code {result.returncode}")
-            sys.exit(result.returncode)
+            print(f" Binary exited with return code {returncode}")
+            sys.exit(returncode)
     except subprocess.TimeoutExpired:
         print(" Binary launch timed out — possible hang or input prompt.")
         sys.exit(1)
@@ -48,5 +61,47 @@ def run_headless_test():
         print(f" Unexpected error: {e}")
         sys.exit(1)
 
+def run_startup_benchmark(runs=20, db_sizes=(0,), mode="smoke", cold=True):
+    """
+    Launches the binary `runs` times per database size, warm and cold, and reports
+    the startup-to-exit latency distribution to reports/startup_<version>_<timestamp>.*.
+    """
+    sys.path.insert(0, PROJECT_ROOT)
+    from utils.version import extract_version_from_git
+    from utils.startup_bench import benchmark_db_sizes, load_previous_report, compare_with_previous, save_startup_report
+
+    print(f" Startup benchmark: {runs} launches per series, DB sizes {list(db_sizes)}, mode {mode}")
+    rows = benchmark_db_sizes(db_sizes, runs, mode, cold)
+    for row in rows:
+        line = f"  - {row['products']} products: warm p50 {row['warm']['p50_ms']} ms / p95 {row['warm']['p95_ms']} ms"
+        if "cold" in row:
+            line += f", cold p50 {row['cold']['p50_ms']} ms / p95 {row['cold']['p95_ms']} ms ({row['cold_method']})"
+        print(line)
+
+    version = extract_version_from_git()
+    timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+    previous = load_previous_report(version)
+    changes = compare_with_previous(rows, previous)
+    for c in changes:
+        print(f"  - {c['products']} products, {c['series']}: {c['previous_p50_ms']} → {c['current_p50_ms']} ms ({c['change_pct']:+}%)")
+    json_path, md_path = save_startup_report(rows, changes, version, timestamp, previous and previous["version"])
+    print(f" Startup report: {json_path}, {md_path}")
+
+    if any(row["failures"] for row in rows):
+        print(" Some launches exited with a non-zero code.")
+        sys.exit(1)
+
 if __name__ == '__main__':
-    run_headless_test()
+    parser = argparse.ArgumentParser(description="Smoke test (or startup benchmark) for gestion_stock.")
+    parser.add_argument("--benchmark", action="store_true", help="Measure startup latency instead of a single launch")
+    parser.add_argument("--runs", type=int, default=20, help="Launches per series in benchmark mode")
+    parser.add_argument("--db-sizes", default="0", help="Comma-separated product counts, e.g. 0,10000,1000000")
+    parser.add_argument("--mode", choices=("smoke", "menu"), default="smoke",
+                        help="smoke: --test-smoke; menu: --test-mode up to the menu, then quit")
+    parser.add_argument("--warm-only", action="store_true", help="Skip the cold-cache series")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_startup_benchmark(args.runs, [int(n) for n in args.db_sizes.split(",")], args.mode, not args.warm_only)
+    else:
+        run_headless_test()
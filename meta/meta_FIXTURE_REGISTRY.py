@@ -0,0 +1,6 @@
+FIXTURE_REGISTRY = {
+    # Schema only: the first product added gets ID 1 (add, smoke, full journey)
+    "empty": {"products": 0},
+    # 20 catalog products with IDs 1–20 (list, modify, delete, regression)
+    "catalog_small": {"products": 20, "seed": 0},
+}
@@ -0,0 +1,32 @@
+SIGNATURE_REGISTRY = {
+    # ✅ Success messages of the binary
+    "product_added": {"patterns": ["Produit ajouté"], "kind": "success", "groups": ["journey", "contention", "model", "soak"]},
+    "products_listed": {"patterns": ["Liste des produits"], "kind": "success", "groups": ["journey"]},
+    "product_modified": {"patterns": ["Produit modifié"], "kind": "success", "groups": ["journey", "contention", "model"]},
+    "modification_done": {"patterns": ["modifié", "modification"], "kind": "success", "groups": ["modify"]},
+    "product_deleted": {"patterns": ["Produit supprimé"], "kind": "success", "groups": ["journey", "delete", "contention", "model"]},
+
+    # ℹ️ Informational
+    "listing_row": {"patterns": ["Produit:"], "kind": "info", "groups": ["regression"]},
+    "menu_retry_prompt": {
+        "patterns": ["Entrée invalide. Veuillez entrer un entier non négatif"],
+        "kind": "info",
+        "groups": ["journey"]
+    },
+    "delete_cancelled": {"patterns": ["Suppression annulée"], "kind": "info", "groups": ["model"]},
+    "duplicate_name": {"patterns": ["existe déjà"], "kind": "info", "groups": ["contention", "model"]},
+
+    # ❌ Failures
+    "error": {"patterns": ["Erreur"], "kind": "failure", "groups": ["journey", "contention", "model", "load"]},
+    "db_locked": {"patterns": ["database is locked", "database is busy"], "kind": "failure", "groups": ["contention", "model"]},
+    "exception": {"patterns": ["exception"], "kind": "failure", "groups": ["journey"]},
+    "unhandled_exception": {"patterns": ["Unhandled exception"], "kind": "failure", "groups": ["regression"]},
+    "segfault": {"patterns": ["segfault"], "kind": "failure", "groups": ["journey"]},
+    "segmentation_fault": {"patterns": ["Segmentation fault"], "kind": "failure", "groups": ["regression"]},
+    "crash": {"patterns": ["crash"], "kind": "failure", "groups": ["journey", "regression"]},
+    "memory_corruption": {"patterns": ["Memory corruption"], "kind": "failure", "groups": ["regression"]},
+    "invalid_input": {"patterns": ["Invalid input"], "kind": "failure", "groups": ["regression"]},
+    "freeze": {"patterns": ["freeze"], "kind": "failure", "groups": ["regression"]},
+    "product_missing": {"patterns": ["inexistant"], "kind": "failure", "groups": ["journey", "modify", "contention", "model"]},
+    "invalid_value": {"patterns": ["invalide"], "kind": "failure", "groups": ["modify"]},
+}
@@ -1,20 +1,25 @@
 TEST_REGISTRY = {
-    "Theem.py": {"run": False, "type": "non-test"},
+    "Theem.py": {"run": False, "type": "non-test", "entry": "run_theme_initialization_test"},
     "smoke_test.py": {
         "run": True,
         "type": "smoke",
+        "entry": "run_headless_test",
+        "fixture": "empty",
         "expected_output": "Binary opened and exited cleanly"
     },
     "add_prod_test.py": {
     "run": True,
     "type": "ci",
+    "entry": "run_scenario_test",
+    "fixture": "empty",
+    "warm_session": True,
     "expected_output": [
-        "Produit ajouté avec succès",
-        "Produit ajoutÃ© avec succÃ¨s"
+        "Produit ajouté avec succès"
     ]},
-    "list_prod_test.py": {"run": True, "type": "ci", "expected_output": "Liste des produits"},
-    "modify_prod_test.py": {"run": True, "type": "ci", "expected_output": " Modification réussie pour "},
-    "delete_prod_test.py": {"run": True, "type": "ci", "expected_output": "Deleted"},
-    "full_journey_test.py": {"run": False, "type": "weekly"},
-    "regression_bug_test.py": {"run": True, "type": "ci", "expected_output": "Cas de bug résolu"},
+    "list_prod_test.py": {"run": True, "type": "ci", "entry": "run_listing_test", "fixture": "catalog_small", "warm_session": True, "expected_output": "Liste des produits"},
+    "modify_prod_test.py": {"run": True, "type": "ci", "entry": "run_modification_test", "fixture": "catalog_small", "warm_session": True, "expected_output": " Modification réussie pour "},
+    "delete_prod_test.py": {"run": True, "type": "ci", "entry": "run_deletion_test", "fixture": "catalog_small", "warm_session": True, "expected_output": "Deleted"},
+    "log_archive_test.py": {"run": True, "type": "ci", "entry": "run_log_archive_test", "fixture": "empty", "expected_output": "Archive compacte"},
+    "full_journey_test.py": {"run": False, "type": "weekly", "entry": "run_full_journey", "fixture": "empty"},
+    "regression_bug_test.py": {"run": True, "type": "ci", "entry": "run_regression_test", "fixture": "catalog_small", "expected_output": "Cas de bug résolu"},
 }
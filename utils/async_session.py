@@ -0,0 +1,372 @@
+"""
+@file utils/async_session.py
+@brief asyncio driver for running many gestion_stock sessions from one event loop.
+
+@details
+`AsyncGestionStockSession` is the coroutine counterpart of utils.session.GestionStockSession:
+same pty setup, same prompts, same menu operations, but the process is started with
+`asyncio.create_subprocess_exec` and its output is read incrementally by an event-loop reader
+callback instead of a thread. Every step has its own timeout (`asyncio.wait_for`) and can be
+cancelled; a session interrupted mid-step is marked out of sync and killed on close.
+
+`drive_sessions()` runs a scenario from utils.scenarios on N sessions at once, each in its own
+sandbox, with an optional concurrency cap. On Python < 3.12 a pidfd child watcher is installed
+when available, so waiting for hundreds of children does not start one thread per process.
+
+Usage:
+    python3 -m utils.async_session --sessions 200 --scenario journey --concurrency 100
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import subprocess
+
+from .metrics import summarize_latencies
+from .scenarios import SCENARIOS, STEP_METHODS, get_scenario
+from .session import (
+    pty, open_pty, append_metrics, resolve_binary_path, SessionError, METRICS_ENV,
+    MENU_PROMPTS, QUANTITY_PROMPT, NEW_NAME_PROMPT, CONFIRM_PROMPT
+)
+from .test_runner import create_sandbox, get_binary_name, get_repo_root
+
+class AsyncGestionStockSession:
+    """
+    One gestion_stock process driven from coroutines.
+
+    Usage:
+        async with AsyncGestionStockSession() as session:
+            await session.add_product("Clavier", "25", "49.99")
+            print(await session.list_products())
+    """
+
+    def __init__(self, binary_path=None, args=("--test-mode",), cwd=None, timeout=10, record_timings=None):
+        """
+        Args:
+            binary_path (str): Binary to launch (defaults to `resolve_binary_path()`).
+            args (tuple): Command-line flags passed to the binary.
+            cwd (str): Working directory of the process.
+            timeout (float): Default per-step timeout in seconds.
+            record_timings (bool): Keep per-operation timings in `self.timings`
+                (defaults to True when `GESTION_STOCK_METRICS` is set).
+        """
+        self.binary_path = binary_path or resolve_binary_path()
+        self.args = [self.binary_path, *args]
+        self.cwd = cwd
+        self.timeout = timeout
+        self.proc = None
+        self.banner = ""
+        self.matched_prompt = None
+        self.in_sync = True
+        self.timings = []
+        self.record_timings = bool(os.environ.get(METRICS_ENV)) if record_timings is None else record_timings
+        self._chunks = None
+        self._master = None
+        self._pump_task = None
+
+    # ---- lifecycle -------------------------------------------------------
+
+    async def start(self):
+        """
+        Launches the binary and waits for the first main-menu prompt.
+
+        Returns:
+            AsyncGestionStockSession: The started session (for chaining).
+        """
+        self._chunks = asyncio.Queue()
+        if pty is not None:
+            master, slave = open_pty()
+            try:
+                self.proc = await asyncio.create_subprocess_exec(
+                    *self.args, stdin=slave, stdout=slave, stderr=slave, cwd=self.cwd)
+            except BaseException:
+                os.close(master)
+                raise
+            finally:
+                os.close(slave)
+            self._master = master
+            os.set_blocking(master, False)
+            asyncio.get_running_loop().add_reader(master, self._on_readable)
+        else:
+            self.proc = await asyncio.create_subprocess_exec(
+                *self.args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=self.cwd)
+            self._pump_task = asyncio.ensure_future(self._pump_pipe())
+        started = time.perf_counter()
+        self.banner = (await self.read_until(MENU_PROMPTS))[0]
+        self._record("startup", started)
+        return self
+
+    async def close(self, timeout=None):
+        """
+        Quits the binary (or kills it if the session is out of sync) and releases the pty.
+
+        Returns:
+            int: Exit code of the binary.
+        """
+        if self.proc is None:
+            return None
+        if self.proc.returncode is None:
+            if self.in_sync:
+                try:
+                    await self._write(b"0\n")
+                except OSError:
+                    pass
+            else:
+                self.proc.kill()
+            try:
+                await asyncio.wait_for(self.proc.wait(), timeout or self.timeout)
+            except asyncio.TimeoutError:
+                self.proc.kill()
+                await self.proc.wait()
+        append_metrics(self.timings)
+        self.timings = []
+        if self._master is not None:
+            asyncio.get_running_loop().remove_reader(self._master)
+            os.close(self._master)
+            self._master = None
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+        return self.proc.returncode
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    def _record(self, op, started):
+        """Stores the latency of one operation, measured from `started` (perf_counter) to now."""
+        if self.record_timings:
+            self.timings.append({"op": op, "seconds": time.perf_counter() - started})
+
+    def _on_readable(self):
+        """Event-loop reader callback: forwards available pty output, then None on EOF."""
+        try:
+            chunk = os.read(self._master, 65536)
+        except BlockingIOError:
+            return
+        except OSError:  # EIO on the pty master once the child has exited
+            chunk = b""
+        if not chunk:
+            asyncio.get_running_loop().remove_reader(self._master)
+            self._chunks.put_nowait(None)
+            return
+        self._chunks.put_nowait(chunk)
+
+    async def _pump_pipe(self):
+        """Pipe fallback (no pty): forwards stdout chunks, then None on EOF."""
+        while True:
+            chunk = await self.proc.stdout.read(65536)
+            if not chunk:
+                break
+            self._chunks.put_nowait(chunk)
+        self._chunks.put_nowait(None)
+
+    async def _write(self, payload):
+        if self._master is not None:
+            os.write(self._master, payload)
+        else:
+            self.proc.stdin.write(payload)
+            await self.proc.stdin.drain()
+
+    # ---- low-level stepping ----------------------------------------------
+
+    async def _read_until(self, prompts):
+        window = max(len(p) for p in prompts)
+        tail = b""
+        parts = []
+        self.matched_prompt = None
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                self._chunks.put_nowait(None)
+                raise SessionError(f"Binary exited (code {self.proc.returncode}) before the next prompt.")
+            parts.append(chunk)
+            tail = (tail + chunk)[-window:]
+            for prompt in prompts:
+                if tail.endswith(prompt):
+                    self.matched_prompt = prompt
+                    return b"".join(parts)
+
+    async def read_until(self, prompts, timeout=None):
+        """
+        Collects the output up to the next prompt.
+
+        Raises:
+            subprocess.TimeoutExpired: If no prompt appears within `timeout` seconds.
+            SessionError: If the process closes its output before a prompt appears.
+
+        Returns:
+            tuple: (decoded output, matched prompt bytes).
+        """
+        timeout = timeout or self.timeout
+        try:
+            data = await asyncio.wait_for(self._read_until(prompts), timeout)
+        except asyncio.TimeoutError:
+            self.in_sync = False
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        except BaseException:  # cancelled or failed mid-step: the output stream is out of sync
+            self.in_sync = False
+            raise
+        return data.decode("utf-8", errors="replace"), self.matched_prompt
+
+    async def send(self, lines, prompts=MENU_PROMPTS, timeout=None):
+        """
+        Writes input lines and returns the output produced up to the next prompt.
+
+        Returns:
+            tuple: (decoded output, matched prompt bytes).
+        """
+        await self._write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+        return await self.read_until(prompts, timeout)
+
+    # ---- menu operations -------------------------------------------------
+
+    async def add_product(self, nom, quantite, prix):
+        """Menu 1: adds a product. Stops early if the binary rejects the name (duplicate)."""
+        started = time.perf_counter()
+        output, prompt = await self.send(["1", nom], prompts=(QUANTITY_PROMPT, *MENU_PROMPTS))
+        if prompt not in MENU_PROMPTS:
+            output += (await self.send([quantite, prix]))[0]
+        self._record("add", started)
+        return output
+
+    async def list_products(self):
+        """Menu 2: lists products."""
+        started = time.perf_counter()
+        output = (await self.send(["2"]))[0]
+        self._record("list", started)
+        return output
+
+    async def delete_product(self, prod_id, confirm="o"):
+        """Menu 3: deletes a product. The confirmation is only sent when the binary asks for it."""
+        started = time.perf_counter()
+        output, prompt = await self.send(["3", prod_id], prompts=(CONFIRM_PROMPT, *MENU_PROMPTS))
+        if prompt not in MENU_PROMPTS:
+            output += (await self.send([confirm]))[0]
+        self._record("delete", started)
+        return output
+
+    async def modify_product(self, prod_id, nom, quantite, prix):
+        """Menu 4: modifies a product. New values are only sent when the ID is accepted."""
+        started = time.perf_counter()
+        output, prompt = await self.send(["4", prod_id], prompts=(NEW_NAME_PROMPT, *MENU_PROMPTS))
+        if prompt not in MENU_PROMPTS:
+            output += (await self.send([nom, quantite, prix]))[0]
+        self._record("modify", started)
+        return output
+
+async def run_scenario(session, steps):
+    """
+    Replays scenario steps (see utils.scenarios) on a started async session.
+
+    Returns:
+        list: Output of each step, in order.
+    """
+    outputs = []
+    for op, args in steps:
+        if op == "send":
+            outputs.append((await session.send(*args))[0])
+        else:
+            outputs.append(await getattr(session, STEP_METHODS[op])(*args))
+    return outputs
+
+def use_pidfd_child_watcher():
+    """
+    On Python < 3.12, replaces the default thread-per-child watcher with a pidfd watcher
+    when the kernel supports it (3.12+ does this by itself).
+
+    Returns:
+        bool: True if a pidfd watcher is in use.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(asyncio, "PidfdChildWatcher") or not hasattr(os, "pidfd_open"):
+        return sys.version_info >= (3, 12)
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return False
+    watcher = asyncio.PidfdChildWatcher()
+    asyncio.set_child_watcher(watcher)
+    return True
+
+async def drive_sessions(sessions, steps, concurrency=None, timeout=10, fresh=True):
+    """
+    Runs the same scenario on `sessions` binaries at once, each in its own sandbox.
+
+    Args:
+        sessions (int): Number of sessions to run.
+        steps (list): Scenario steps (see utils.scenarios).
+        concurrency (int): Maximum number of live sessions (None: all at once).
+        timeout (float): Per-step timeout in seconds.
+        fresh (bool): Start every sandbox without a database instead of a copy of `build/stockt.db`.
+
+    Returns:
+        dict: Completed/failed session counts, elapsed time, steps/sec, per-operation latency
+        and the first few error messages.
+    """
+    build_dir = os.path.join(get_repo_root(), "build")
+    limit = asyncio.Semaphore(concurrency or sessions)
+    latencies = {}
+    errors = []
+    steps_done = [0]
+
+    async def one(index):
+        async with limit:
+            sandbox = create_sandbox(build_dir)
+            if fresh and os.path.exists(os.path.join(sandbox, "stockt.db")):
+                os.remove(os.path.join(sandbox, "stockt.db"))
+            session = AsyncGestionStockSession(os.path.join(sandbox, get_binary_name()), cwd=sandbox,
+                                               timeout=timeout, record_timings=True)
+            try:
+                await session.start()
+                await run_scenario(session, steps)
+                steps_done[0] += len(steps)
+                return True
+            except (subprocess.TimeoutExpired, SessionError, OSError) as e:
+                errors.append(f"session {index}: {type(e).__name__}: {e}")
+                return False
+            finally:
+                for record in session.timings:
+                    latencies.setdefault(record["op"], []).append(record["seconds"])
+                session.timings = []
+                await session.close(timeout=2)
+                shutil.rmtree(sandbox, ignore_errors=True)
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {
+        "sessions": sessions,
+        "completed": sum(outcomes),
+        "failed": sessions - sum(outcomes),
+        "elapsed_s": round(elapsed, 2),
+        "steps_per_sec": round(steps_done[0] / elapsed, 2) if elapsed else None,
+        "latency": {op: summarize_latencies(v) for op, v in latencies.items()},
+        "errors": errors[:10]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive many gestion_stock sessions from one asyncio loop.")
+    parser.add_argument("--sessions", type=int, default=50, help="Number of binary sessions")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="journey", help="Scenario to replay")
+    parser.add_argument("--concurrency", type=int, default=None, help="Maximum live sessions (default: all)")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-step timeout in seconds")
+    args = parser.parse_args()
+
+    use_pidfd_child_watcher()
+    summary = asyncio.run(drive_sessions(args.sessions, get_scenario(args.scenario), args.concurrency, args.timeout))
+    print(f"{summary['completed']}/{summary['sessions']} sessions completed in {summary['elapsed_s']}s "
+          f"({summary['steps_per_sec']} steps/sec)")
+    for op, s in summary["latency"].items():
+        print(f"  - {op}: n={s['count']} p50={s['p50_ms']} ms p95={s['p95_ms']} ms p99={s['p99_ms']} ms max={s['max_ms']} ms")
+    for error in summary["errors"]:
+        print(f"⚠️ {error}")
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
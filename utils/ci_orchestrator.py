@@ -5,15 +5,22 @@
 This script coordinates version extraction, test orchestration, and report generation
 for both routine and weekly validations. It defers `weekly` logic to utils/run_weekly.py,
 but captures its result and integrates it into the reports directory.
+
+Routine runs end with a performance regression stage: the per-version reports already in
+`reports/` form a per-test baseline (median and a robust MAD noise estimate), and the
+pipeline fails when the current run is significantly slower than that baseline.
 """
 
 import os
+import glob
 import json
+import statistics
 import argparse
 import subprocess
 from datetime import datetime
 
 from .version import extract_version_from_git
+from .results_db import record_results
 from .test_runner import *
 
 # === CONFIGURATION ===
@@ -21,6 +28,13 @@ REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 REPORT_DIR = os.path.join(REPO_ROOT, "reports")
 os.makedirs(REPORT_DIR, exist_ok=True)
 
+# Smallest noise assumed per metric: durations are rounded to 0.01 s, latencies are in ms
+DURATION_NOISE_FLOOR = 0.01
+LATENCY_NOISE_FLOOR_MS = 0.5
+# Resource figures: RSS is in KB, and SQLite writes whole 4 KB pages
+RSS_NOISE_FLOOR_KB = 512
+IO_NOISE_FLOOR_BYTES = 8192
+
 def delete_db_after_tests(build_dir="build", db_name="stockt.db"):
     """Deletes the temporary database file after tests."""
     db_path = os.path.join(build_dir, db_name)
@@ -28,15 +42,135 @@ def delete_db_after_tests(build_dir="build", db_name="stockt.db"):
         os.remove(db_path)
         print(f" Deleted temporary DB: {db_path}")
 
-def save_reports(results, version, timestamp):
-    """Saves results to JSON and Markdown files in `reports/`."""
+def extract_metrics(results):
+    """
+    Flattens one run's results into comparable numbers.
+
+    Returns:
+        dict: "<script>" → duration (s), and "<script>:<op>" → p50 latency (ms) when recorded.
+        Resource usage adds "<script>#peak_rss_kb", "<script>#write_bytes" and
+        "<script>:<op>#write_bytes" (bytes written per operation).
+        In-process runs skip interpreter startup, so their durations get their own
+        "<script>@in-process" series instead of being compared with subprocess runs.
+        Results served from the result cache were not measured in this run and are skipped.
+    """
+    metrics = {}
+    for r in results:
+        if r.get("cached"):
+            continue
+        if isinstance(r.get("duration"), (int, float)):
+            key = f"{r['script']}@{r['mode']}" if r.get("mode") else r["script"]
+            metrics[key] = float(r["duration"])
+        for op, summary in (r.get("latency") or {}).items():
+            if summary.get("p50_ms") is not None:
+                metrics[f"{r['script']}:{op}"] = float(summary["p50_ms"])
+        resources = r.get("resources") or {}
+        if resources:
+            if resources["peak_rss_kb"] is not None:
+                metrics[f"{r['script']}#peak_rss_kb"] = float(resources["peak_rss_kb"])
+            metrics[f"{r['script']}#write_bytes"] = float(resources["write_bytes"])
+        for op, usage in (resources.get("operations") or {}).items():
+            metrics[f"{r['script']}:{op}#write_bytes"] = float(usage["write_bytes_per_op"])
+    return metrics
+
+def noise_floor(metric):
+    """Returns the measurement resolution of a metric from `extract_metrics()`, by its name."""
+    if metric.endswith("#peak_rss_kb"):
+        return RSS_NOISE_FLOOR_KB
+    if metric.endswith("#write_bytes"):
+        return IO_NOISE_FLOOR_BYTES
+    return LATENCY_NOISE_FLOOR_MS if ":" in metric else DURATION_NOISE_FLOOR
+
+def load_report_history(exclude_version=None):
+    """
+    Loads the per-version test reports from `reports/`, oldest first.
+
+    Args:
+        exclude_version (str): Version to leave out (the run being evaluated).
+
+    Returns:
+        list: Metric dicts from `extract_metrics()`, one per historical report.
+    """
+    history = []
+    for path in glob.glob(os.path.join(REPORT_DIR, "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(report, dict) or "results" not in report or report.get("version") == exclude_version:
+            continue
+        history.append((report.get("timestamp", ""), extract_metrics(report["results"])))
+    return [metrics for _, metrics in sorted(history, key=lambda item: item[0])]
+
+def build_baselines(history, min_samples=3):
+    """
+    Builds a per-metric baseline with a robust noise estimate.
+
+    The noise is 1.4826 × MAD (the standard deviation for normal data), which ignores
+    the occasional outlier run better than a plain standard deviation.
+
+    Returns:
+        dict: metric → {"median", "sigma", "samples"} for metrics with enough history.
+    """
+    samples = {}
+    for metrics in history:
+        for name, value in metrics.items():
+            samples.setdefault(name, []).append(value)
+
+    baselines = {}
+    for name, values in samples.items():
+        if len(values) < min_samples:
+            continue
+        median = statistics.median(values)
+        mad = statistics.median(abs(v - median) for v in values)
+        baselines[name] = {"median": median, "sigma": 1.4826 * mad, "samples": len(values)}
+    return baselines
+
+def detect_regressions(results, baselines, threshold=0.5, z_threshold=3.0):
+    """
+    Flags metrics of the current run that are significantly slower (or, for memory and I/O,
+    larger) than their baseline.
+
+    A metric regresses when it exceeds the baseline median by more than `threshold`
+    (relative) AND by more than `z_threshold` noise units. The noise is floored at 5% of the
+    median and at the metric's measurement resolution, so a perfectly stable history does
+    not turn every blip into a regression.
+
+    Returns:
+        list: One dict per regression (metric, baseline, current, slowdown, z).
+    """
+    regressions = []
+    for name, current in extract_metrics(results).items():
+        base = baselines.get(name)
+        if not base or base["median"] <= 0:
+            continue
+        sigma = max(base["sigma"], 0.05 * base["median"], noise_floor(name))
+        slowdown = current / base["median"] - 1
+        z = (current - base["median"]) / sigma
+        if slowdown > threshold and z > z_threshold:
+            regressions.append({
+                "metric": name,
+                "baseline": round(base["median"], 4),
+                "current": current,
+                "slowdown_pct": round(slowdown * 100, 1),
+                "z": round(z, 2),
+                "samples": base["samples"]
+            })
+    return regressions
+
+def save_reports(results, version, timestamp, regressions=None):
+    """Saves results (and detected performance regressions) to JSON and Markdown files in `reports/`."""
     json_path = os.path.join(REPORT_DIR, f"{version}.json")
+    report = {
+        "version": version,
+        "timestamp": timestamp,
+        "results": results
+    }
+    if regressions is not None:
+        report["regressions"] = regressions
     with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({
-            "version": version,
-            "timestamp": timestamp,
-            "results": results
-        }, f, indent=4, ensure_ascii=False)
+        json.dump(report, f, indent=4, ensure_ascii=False)
 
     md_path = os.path.join(REPORT_DIR, f"{version}.md")
     with open(md_path, "w", encoding="utf-8") as f:
@@ -44,29 +178,70 @@ def save_reports(results, version, timestamp):
         f.write(f"**Date**: {timestamp}\n\n---\n\n## ✅ Test Results\n\n")
         f.write("| Script | Status | Duration |\n|--------|--------|----------|\n")
         for r in results:
-            f.write(f"| {r['script']} | {r['status']} | {r.get('duration', 'N/A')} |\n")
+            status = f"{r['status']} (cached)" if r.get("cached") else r["status"]
+            f.write(f"| {r['script']} | {status} | {r.get('duration', 'N/A')} |\n")
         total = len(results)
         passed = sum(1 for r in results if r["status"] == "PASSED")
         skipped = sum(1 for r in results if r["status"] == "SKIPPED")
         failed = sum(1 for r in results if r["status"] == "FAILED")
         f.write("\n---\n\n## 📊 Summary\n")
         f.write(f"- **Total**: {total}\n- **Passed**: {passed}\n- **Skipped**: {skipped}\n- **Failed**: {failed}\n")
+        f.write(f"- **Cached**: {sum(1 for r in results if r.get('cached'))}\n")
+
+        timed = [r for r in results if r.get("latency")]
+        if timed:
+            f.write("\n---\n\n## ⏱️ Operation Latency (ms)\n\n")
+            f.write("| Script | Operation | Count | p50 | p95 | p99 | Max |\n|--------|-----------|-------|-----|-----|-----|-----|\n")
+            for r in timed:
+                for op, s in r["latency"].items():
+                    f.write(f"| {r['script']} | {op} | {s['count']} | {s['p50_ms']} | {s['p95_ms']} | {s['p99_ms']} | {s['max_ms']} |\n")
+
+        sampled = [r for r in results if r.get("resources")]
+        if sampled:
+            f.write("\n---\n\n## 🧠 Resource Usage\n\n")
+            f.write("| Script | Processes | Peak RSS (KB) | User CPU (s) | Sys CPU (s) | Children CPU (s) | Read (B) | Written (B) |\n"
+                    "|--------|-----------|---------------|--------------|-------------|------------------|----------|-------------|\n")
+            for r in sampled:
+                u = r["resources"]
+                peak = u["peak_rss_kb"] if u["peak_rss_kb"] is not None else "—"
+                f.write(f"| {r['script']} | {u['processes']} | {peak} | {u['cpu_user_s']} | {u['cpu_sys_s']} | "
+                        f"{u['cpu_children_s']} | {u['read_bytes']} | {u['write_bytes']} |\n")
+            f.write("\n| Script | Operation | Count | Written per op (B) | Write amplification |\n"
+                    "|--------|-----------|-------|--------------------|---------------------|\n")
+            for r in sampled:
+                for op, usage in r["resources"].get("operations", {}).items():
+                    amplification = f"{usage['write_amplification']}×" if usage["write_amplification"] is not None else "N/A"
+                    f.write(f"| {r['script']} | {op} | {usage['count']} | {usage['write_bytes_per_op']} | {amplification} |\n")
 
-def run_weekly_test(version, timestamp):
-    """Runs weekly validation script and stores its result."""
+        if regressions is not None:
+            f.write("\n---\n\n## 🐢 Performance Regressions\n\n")
+            if not regressions:
+                f.write("No significant slowdown against the historical baseline.\n")
+            else:
+                f.write("| Metric | Baseline | Current | Slowdown | z |\n|--------|----------|---------|----------|---|\n")
+                for reg in regressions:
+                    f.write(f"| {reg['metric']} | {reg['baseline']} | {reg['current']} | +{reg['slowdown_pct']}% | {reg['z']} |\n")
+
+def run_weekly_test(version, timestamp, in_process=False, soak=None):
+    """Runs weekly validation script (or its soak mode, for `soak` seconds) and stores its result."""
     script_path = os.path.join(REPO_ROOT, "utils", "run_weekly.py")
     print("[Weekly Mode] Delegating to run_weekly.py...")
-    result=subprocess.run([sys.executable, "-m", "utils.run_weekly"], capture_output=True, text=True)
+    command = [sys.executable, "-m", "utils.run_weekly"] + (["--in-process"] if in_process else [])
+    if soak:
+        command += ["--soak", str(soak)]
+    result=subprocess.run(command, capture_output=True, text=True)
     print(f"[ Weekly Mode] result it...{result}")
     weekly_result = {
         "script": "run_weekly.py",
         "status": "PASSED" if result.returncode == 0 else "FAILED",
         "duration": "N/A",
+        "exit_code": result.returncode,
         "stdout": result.stdout[:300],
         "stderr": result.stderr[:300]
     }
 
     save_reports([weekly_result], version, timestamp)
+    record_results([weekly_result], version, timestamp)
 
     if result.returncode != 0:
         print(" Weekly test failed.")
@@ -77,16 +252,38 @@ def run_weekly_test(version, timestamp):
 def main():
     parser = argparse.ArgumentParser(description="Run CI pipeline or weekly test.")
     parser.add_argument("--weekly", action="store_true", help="Run full_journey_test weekly mode")
+    parser.add_argument("--soak", type=float, default=None, metavar="SECONDS",
+                        help="With --weekly: run the soak test for this long instead of the journey")
+    parser.add_argument("--jobs", type=int, default=1, help="Run tests on N workers with isolated sandboxes")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Call test entry points inside the runner instead of one interpreter per script")
+    parser.add_argument("--no-cache", action="store_true", help="Run every test, ignoring cached results")
+    parser.add_argument("--regression-threshold", type=float, default=0.5,
+                        help="Relative slowdown vs. baseline that fails the pipeline (0.5 = +50%%)")
+    parser.add_argument("--regression-z", type=float, default=3.0,
+                        help="Minimum slowdown in baseline noise units to count as significant")
+    parser.add_argument("--no-regression-check", action="store_true", help="Skip the performance regression stage")
     args = parser.parse_args()
 
     version = extract_version_from_git()
     timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
 
     if args.weekly:
-        run_weekly_test(version, timestamp)
+        run_weekly_test(version, timestamp, in_process=args.in_process, soak=args.soak)
     else:
-        results = run_all_tests()
-        save_reports(results, version, timestamp)
+        results = run_all_tests(jobs=args.jobs, in_process=args.in_process, use_cache=not args.no_cache)
+        regressions = None
+        if not args.no_regression_check:
+            baselines = build_baselines(load_report_history(exclude_version=version))
+            regressions = detect_regressions(results, baselines, args.regression_threshold, args.regression_z)
+        save_reports(results, version, timestamp, regressions)
+        record_results(results, version, timestamp)
+
+        if regressions:
+            print(" Performance regressions detected:")
+            for reg in regressions:
+                print(f"  - {reg['metric']}: {reg['baseline']} → {reg['current']} (+{reg['slowdown_pct']}%, z={reg['z']})")
+            exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,355 @@
+"""
+@file utils/contention.py
+@brief Write-contention stress: K gestion_stock processes sharing one `stockt.db`.
+
+@details
+Several store terminals use the same database. This mode starts K writer sessions and R reader
+sessions (utils.session) on ONE sandbox, so every process opens the same `stockt.db`. Writers run
+the add/modify/delete menu sequences, readers list the catalog. A step the binary answers with
+"database is locked" is retried with a short randomized backoff, up to `--retries` times. The
+binary reports a failed ID lookup as "produit inexistant", so that answer on a product the writer
+owns is counted as a masked lock and retried the same way.
+
+Every writer only touches its own products (generated products whose ID is congruent to the
+writer index, and the ones it adds under its own names), so after the run the final database can
+be checked against what each writer was told:
+- lost update: an acknowledged add, modification or deletion that is not in the final state;
+- duplicate: a product name present more than once;
+- phantom write: an operation reported as failed whose effect is in the database anyway.
+Operations that failed leave their product in an uncertain state and are not counted as lost.
+
+`--writers 1,2,4,8` sweeps K; each level starts from the same generated catalog. Throughput,
+lock errors, retries and anomalies per level go to `reports/contention_<version>_<timestamp>.json`
+and `.md`, which shows where the binary stops scaling.
+
+Usage:
+    python3 -m utils.contention --writers 1,2,4,8 --readers 1 --duration 10
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import datetime
+import threading
+import subprocess
+from collections import Counter
+
+from .version import extract_version_from_git
+from .session import GestionStockSession, SessionError
+from .signatures import registry_signatures
+from .dataset_generator import fixture_params, get_fixture, install_fixture
+from .test_runner import create_sandbox, get_binary_name, get_repo_root
+
+REPORT_DIR = os.path.join(get_repo_root(), "reports")
+WRITE_MIX = {"add": 40, "modify": 35, "delete": 25}
+
+def classify(output):
+    """
+    Reduces a step's output to "ok", "locked", "duplicate", "missing" or "error".
+    """
+    result = registry_signatures("contention").scan(output)
+    if result.found("db_locked"):
+        return "locked"
+    if result.found("duplicate_name"):
+        return "duplicate"
+    if result.found("product_added", "product_modified", "product_deleted"):
+        return "ok"
+    if result.found("product_missing"):
+        return "missing"
+    return "error"
+
+class WriterState:
+    """
+    What one writer was told, to be checked against the final database.
+
+    Attributes:
+        added (set): Names whose addition was acknowledged.
+        uncertain_adds (set): Names whose addition failed (may or may not exist).
+        expected_quantity (dict): Product ID → set of acceptable final quantities
+            (the last acknowledged one, plus failed attempts made after it).
+        deleted (set): IDs whose deletion was acknowledged.
+        uncertain (set): IDs whose state cannot be checked any more (failed delete or modify).
+        phantoms (int): Adds reported as locked that turned out to have committed.
+    """
+
+    def __init__(self):
+        self.added = set()
+        self.uncertain_adds = set()
+        self.expected_quantity = {}
+        self.deleted = set()
+        self.uncertain = set()
+        self.phantoms = 0
+
+def run_step(step, retries, rng, stats, masked=False):
+    """
+    Runs one menu step, retrying while the database is locked.
+
+    Args:
+        step (callable): Sends the step and returns its output.
+        retries (int): Maximum number of retries.
+        rng (random.Random): Source of the backoff jitter.
+        stats (dict): Writer stats; "locked", "masked_locks" and "retries" are incremented.
+        masked (bool): Also retry "missing": the binary reports a failed ID lookup as a
+            nonexistent product, so on an ID the writer owns it is a lock error in disguise.
+
+    Returns:
+        tuple: (final outcome from `classify()`, number of failed attempts before it).
+    """
+    failed = 0
+    for attempt in range(retries + 1):
+        outcome = classify(step())
+        if outcome == "locked":
+            stats["locked"] += 1
+        elif outcome == "missing" and masked:
+            stats["masked_locks"] += 1
+        else:
+            return outcome, failed
+        failed += 1
+        if attempt < retries:
+            stats["retries"] += 1
+            time.sleep(rng.uniform(0, 0.005 * 2 ** attempt))
+    return outcome, failed
+
+def run_writer(index, writers, products, binary, sandbox, deadline, max_ops, retries, timeout, seed, stop_event):
+    """
+    Runs one writer session until the deadline, its operation budget, or the stop event.
+
+    Returns:
+        dict: stats (operations, acknowledged, locked, masked_locks, retries, failures, per_op, outcomes as
+        "<op>:<outcome>" counts) and the WriterState.
+    """
+    rng = random.Random(seed * 1000 + index)
+    ops, weights = zip(*WRITE_MIX.items())
+    live = [pid for pid in range(1, products + 1) if pid % writers == index]
+    state = WriterState()
+    stats = {"operations": 0, "acknowledged": 0, "locked": 0, "masked_locks": 0, "retries": 0, "failures": 0,
+             "per_op": {op: 0 for op in WRITE_MIX}, "outcomes": Counter()}
+    counter = 0
+
+    session = GestionStockSession(binary, cwd=sandbox, timeout=timeout, record_timings=False).start()
+    try:
+        while not stop_event.is_set() and time.time() < deadline and (max_ops is None or stats["operations"] < max_ops):
+            op = rng.choices(ops, weights)[0]
+            if op != "add" and not live:
+                op = "add"
+            counter += 1
+            if op == "add":
+                name = f"W{index}-{counter}"
+                outcome, locked = run_step(lambda: session.add_product(name, "1", "1.00"), retries, rng, stats)
+                if outcome == "ok" or (outcome == "duplicate" and locked):
+                    # A retry refused as duplicate: the locked attempt had committed after all
+                    state.phantoms += outcome == "duplicate"
+                    state.added.add(name)
+                else:
+                    state.uncertain_adds.add(name)
+            else:
+                pid = rng.choice(live)
+                if op == "modify":
+                    outcome, _ = run_step(lambda: session.modify_product(str(pid), f"W{index}-m{counter}", str(counter), "2.00"),
+                                          retries, rng, stats, masked=True)
+                    if outcome == "ok":
+                        state.expected_quantity[pid] = {counter}
+                    elif pid in state.expected_quantity:
+                        state.expected_quantity[pid].add(counter)
+                    else:
+                        state.uncertain.add(pid)
+                else:
+                    outcome, _ = run_step(lambda: session.delete_product(str(pid)), retries, rng, stats, masked=True)
+                    live.remove(pid)
+                    if outcome == "ok":
+                        state.deleted.add(pid)
+                    else:
+                        state.uncertain.add(pid)
+                    state.expected_quantity.pop(pid, None)
+            stats["operations"] += 1
+            stats["per_op"][op] += 1
+            stats["outcomes"][f"{op}:{outcome}"] += 1
+            if outcome == "ok":
+                stats["acknowledged"] += 1
+            else:
+                stats["failures"] += 1
+    except (subprocess.TimeoutExpired, SessionError):
+        stats["failures"] += 1
+    finally:
+        session.close()
+    return {"stats": stats, "state": state}
+
+def run_reader(binary, sandbox, deadline, timeout, stop_event):
+    """
+    Lists the catalog in a loop until the deadline or the stop event.
+
+    Returns:
+        dict: listings completed and listings that reported an error.
+    """
+    listings = errors = 0
+    session = GestionStockSession(binary, cwd=sandbox, timeout=timeout, record_timings=False).start()
+    try:
+        while not stop_event.is_set() and time.time() < deadline:
+            result = registry_signatures("contention").scan(session.list_products())
+            listings += 1
+            errors += result.found("db_locked", "error")
+    except (subprocess.TimeoutExpired, SessionError):
+        errors += 1
+    finally:
+        session.close()
+    return {"listings": listings, "errors": errors}
+
+def verify_database(db_path, writer_states):
+    """
+    Checks the final database against what the writers were told.
+
+    Returns:
+        dict: lost_updates, duplicates and phantom_writes.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = {pid: quantite for pid, quantite in conn.execute("SELECT id, quantite FROM produits")}
+        names = Counter(nom for (nom,) in conn.execute("SELECT nom FROM produits"))
+    finally:
+        conn.close()
+
+    lost = phantoms = 0
+    for state in writer_states:
+        phantoms += state.phantoms
+        lost += sum(1 for name in state.added if names[name] == 0)
+        phantoms += sum(1 for name in state.uncertain_adds if names[name] > 0 and name not in state.added)
+        lost += sum(1 for pid in state.deleted if pid in rows)
+        for pid, accepted in state.expected_quantity.items():
+            if pid in state.uncertain:
+                continue
+            if rows.get(pid) not in accepted:
+                lost += 1
+    duplicates = sum(count - 1 for count in names.values() if count > 1)
+    return {"lost_updates": lost, "duplicates": duplicates, "phantom_writes": phantoms}
+
+def run_contention(writers, readers=1, products=200, duration=10, operations=None, retries=5, timeout=10, seed=0):
+    """
+    Runs one contention level: `writers` + `readers` sessions on a shared database.
+
+    Args:
+        writers (int): Concurrent writer sessions (K).
+        readers (int): Concurrent reader sessions.
+        products (int): Generated products the shared database starts with.
+        duration (float): Run length in seconds (used when `operations` is None).
+        operations (int): Write operations per writer instead of a duration.
+        retries (int): Retries of a step answered with "database is locked".
+        timeout (float): Per-step timeout in seconds.
+        seed (int): Seed of the operation sequences.
+
+    Returns:
+        dict: Throughput, lock errors, retries, failures and anomaly counts for this level.
+    """
+    sandbox = create_sandbox(os.path.join(get_repo_root(), "build"), copy_db=False)
+    db_path = install_fixture(get_fixture(fixture_params(products, seed=seed, names="sequential")), sandbox)
+    binary = os.path.join(sandbox, get_binary_name())
+    deadline = time.time() + duration if operations is None else float("inf")
+    stop_event = threading.Event()
+    writer_results = [None] * writers
+    reader_results = [None] * readers
+    writers_done = threading.Event()
+
+    def writer(i):
+        writer_results[i] = run_writer(i, writers, products, binary, sandbox, deadline, operations, retries, timeout,
+                                       seed, stop_event)
+
+    def reader(i):
+        # Readers stop with the last writer when the run is bounded by operations
+        reader_results[i] = run_reader(binary, sandbox, deadline, timeout, writers_done)
+
+    try:
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        reader_threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        start = time.perf_counter()
+        for thread in threads + reader_threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+
+        done = [r for r in writer_results if r]
+        anomalies = verify_database(db_path, [r["state"] for r in done])
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    total = lambda key: sum(r["stats"][key] for r in done)
+    listings = sum(r["listings"] for r in reader_results if r)
+    return dict({
+        "writers": writers,
+        "readers": readers,
+        "elapsed_s": round(elapsed, 2),
+        "write_operations": total("operations"),
+        "acknowledged": total("acknowledged"),
+        "writes_per_sec": round(total("acknowledged") / elapsed, 2) if elapsed else None,
+        "listings": listings,
+        "listings_per_sec": round(listings / elapsed, 2) if elapsed else None,
+        "locked_errors": total("locked"),
+        "masked_locks": total("masked_locks"),
+        "retries": total("retries"),
+        "failed_writes": total("failures"),
+        "reader_errors": sum(r["errors"] for r in reader_results if r),
+        "per_op": {op: sum(r["stats"]["per_op"][op] for r in done) for op in WRITE_MIX},
+        "outcomes": dict(sum((r["stats"]["outcomes"] for r in done), Counter()))
+    }, **anomalies)
+
+def save_contention_report(levels, version, timestamp):
+    """
+    Writes the contention sweep to JSON and Markdown files in `reports/`.
+
+    Returns:
+        tuple: (json_path, md_path).
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    base = os.path.join(REPORT_DIR, f"contention_{version}_{timestamp}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({"version": version, "timestamp": timestamp, "levels": levels}, f, indent=4, ensure_ascii=False)
+
+    with open(base + ".md", "w", encoding="utf-8") as f:
+        f.write(f"# 🔒 Write Contention Report – Version {version}\n")
+        f.write(f"**Date**: {timestamp}\n\n---\n\n## 📈 Scaling\n\n")
+        f.write("| Writers | Readers | Writes/s | Listings/s | Locked | Masked locks | Retries | Failed writes | Lost | Duplicates | Phantoms |\n"
+                "|---------|---------|----------|------------|--------|--------------|---------|---------------|------|------------|----------|\n")
+        for l in levels:
+            f.write(f"| {l['writers']} | {l['readers']} | {l['writes_per_sec']} | {l['listings_per_sec']} | {l['locked_errors']} | "
+                    f"{l['masked_locks']} | {l['retries']} | {l['failed_writes']} | {l['lost_updates']} | {l['duplicates']} | {l['phantom_writes']} |\n")
+    return base + ".json", base + ".md"
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress several gestion_stock processes sharing one stockt.db.")
+    parser.add_argument("--writers", default="1,2,4", help="Comma-separated writer counts to sweep (K)")
+    parser.add_argument("--readers", type=int, default=1, help="Concurrent reader sessions per level")
+    parser.add_argument("--products", type=int, default=200, help="Products in the shared starting database")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per level")
+    parser.add_argument("--operations", type=int, default=None, help="Write operations per writer instead of a duration")
+    parser.add_argument("--retries", type=int, default=5, help="Retries of a step answered with 'database is locked'")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-step timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the operation sequences")
+    args = parser.parse_args()
+
+    levels = []
+    for k in (int(v) for v in args.writers.split(",")):
+        level = run_contention(k, args.readers, args.products, args.duration, args.operations, args.retries,
+                               args.timeout, args.seed)
+        levels.append(level)
+        print(f"🔒 K={k}: {level['writes_per_sec']} writes/s, {level['locked_errors']} locked + {level['masked_locks']} masked, {level['retries']} retries, "
+              f"{level['lost_updates']} lost, {level['duplicates']} duplicates, {level['phantom_writes']} phantoms")
+
+    timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+    json_path, md_path = save_contention_report(levels, extract_version_from_git(), timestamp)
+    print(f"↪ Reports: {json_path}, {md_path}")
+    anomalies = sum(l["lost_updates"] + l["duplicates"] for l in levels)
+    raise SystemExit(1 if anomalies else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+@file utils/dataset_generator.py
+@brief Deterministic synthetic inventory generator for `stockt.db` fixtures.
+
+@details
+Writes a `produits` table with the exact schema the binary creates, straight through `sqlite3`
+with batched inserts, so catalogs of 10^3 to 10^7 products can be built in seconds. Names,
+quantities and prices follow configurable distributions driven by a seeded RNG: the same
+parameters always produce byte-identical data. Generated databases are cached in
+`build/fixtures/` under a key derived from their parameters, so repeated runs reuse them.
+
+Usage:
+    python3 -m utils.dataset_generator --products 1000000 --seed 7 --install build
+"""
+
+import os
+import json
+import math
+import random
+import shutil
+import sqlite3
+import hashlib
+import argparse
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURE_DIR = os.path.join(REPO_ROOT, "build", "fixtures")
+BATCH_SIZE = 50000
+
+# Same DDL as the binary, so fixtures are indistinguishable from a real `stockt.db`
+SCHEMA = "CREATE TABLE IF NOT EXISTS produits (id INTEGER PRIMARY KEY AUTOINCREMENT,nom TEXT NOT NULL,quantite INTEGER,prix REAL);"
+
+ADJECTIVES = ["Compact", "Pro", "Ultra", "Basic", "Premium", "Mini", "Max", "Eco", "Smart", "Classic",
+              "Sans fil", "Ergonomique", "Rétro", "Léger", "Robuste", "Silencieux"]
+NOUNS = ["Clavier", "Souris", "Écran", "Câble", "Casque", "Chargeur", "Webcam", "Imprimante", "Lampe",
+         "Routeur", "Disque", "Clé USB", "Tablette", "Enceinte", "Micro", "Adaptateur", "Hub", "Support"]
+
+NAME_DISTRIBUTIONS = ("catalog", "sequential")
+QUANTITY_DISTRIBUTIONS = ("uniform", "exponential", "pareto")
+PRICE_DISTRIBUTIONS = ("lognormal", "uniform")
+
+def fixture_params(products, seed=0, names="catalog", quantity="exponential", max_quantity=1000,
+                   price="lognormal", median_price=25.0):
+    """
+    Builds the canonical parameter dict that identifies a fixture.
+
+    Raises:
+        ValueError: On unknown distribution names or a non-positive product count.
+    """
+    if products <= 0:
+        raise ValueError("Product count must be positive.")
+    if names not in NAME_DISTRIBUTIONS:
+        raise ValueError(f"Unknown name distribution: {names}")
+    if quantity not in QUANTITY_DISTRIBUTIONS:
+        raise ValueError(f"Unknown quantity distribution: {quantity}")
+    if price not in PRICE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown price distribution: {price}")
+    return {
+        "products": int(products), "seed": int(seed), "names": names,
+        "quantity": quantity, "max_quantity": int(max_quantity),
+        "price": price, "median_price": float(median_price)
+    }
+
+def fixture_key(params):
+    """
+    Returns a short, stable hash of the fixture parameters (used as cache file name).
+    """
+    canonical = json.dumps(params, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest()[:16]
+
+def iter_products(params):
+    """
+    Yields (id, nom, quantite, prix) rows for the given parameters, deterministically.
+    """
+    rng = random.Random(params["seed"])
+    rand, expo, pareto, lognorm, uniform = rng.random, rng.expovariate, rng.paretovariate, rng.lognormvariate, rng.uniform
+    max_q = params["max_quantity"]
+    mean_q = max_q / 10 or 1
+    mu = math.log(params["median_price"])
+    catalog = params["names"] == "catalog"
+
+    for prod_id in range(1, params["products"] + 1):
+        if catalog:
+            nom = f"{ADJECTIVES[int(rand() * len(ADJECTIVES))]} {NOUNS[int(rand() * len(NOUNS))]} {prod_id}"
+        else:
+            nom = f"Produit {prod_id:08d}"
+
+        if params["quantity"] == "uniform":
+            quantite = int(rand() * (max_q + 1))
+        elif params["quantity"] == "exponential":
+            quantite = min(int(expo(1 / mean_q)), max_q)
+        else:
+            quantite = min(int(pareto(1.5)) - 1, max_q)
+
+        if params["price"] == "lognormal":
+            prix = round(lognorm(mu, 0.8), 2)
+        else:
+            prix = round(uniform(0.5, 2 * params["median_price"]), 2)
+
+        yield prod_id, nom, quantite, prix
+
+def generate_database(path, params):
+    """
+    Writes a fresh database at `path` holding the products described by `params`.
+
+    Durability pragmas are disabled while loading: the file is written to a temporary
+    name and only moved into place once complete.
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute(SCHEMA)
+        rows = iter_products(params)
+        insert = "INSERT INTO produits (id, nom, quantite, prix) VALUES (?, ?, ?, ?)"
+        while True:
+            batch = [row for _, row in zip(range(BATCH_SIZE), rows)]
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+        # Keep AUTOINCREMENT consistent so the binary's next insert gets id = products + 1
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'produits'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('produits', ?)", (params["products"],))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+def get_fixture(params, rebuild=False):
+    """
+    Returns the path of the cached fixture for `params`, generating it if needed.
+
+    Args:
+        params (dict): Parameters from `fixture_params()`.
+        rebuild (bool): Regenerate even if a cached copy exists.
+
+    Returns:
+        str: Path to the fixture database in `build/fixtures/`.
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    key = fixture_key(params)
+    path = os.path.join(FIXTURE_DIR, f"stockt_{params['products']}_{key}.db")
+    if rebuild or not os.path.exists(path):
+        generate_database(path, params)
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump(params, f, indent=2)
+    return path
+
+def install_fixture(fixture_path, target_dir, db_filename="stockt.db"):
+    """
+    Copies a fixture into `target_dir` as the binary's database.
+
+    Returns:
+        str: Path of the installed database.
+    """
+    target = os.path.join(target_dir, db_filename)
+    shutil.copyfile(fixture_path, target)
+    return target
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic stockt.db fixture.")
+    parser.add_argument("--products", type=int, default=1000, help="Number of products (10^3 to 10^7)")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed")
+    parser.add_argument("--names", choices=NAME_DISTRIBUTIONS, default="catalog")
+    parser.add_argument("--quantity", choices=QUANTITY_DISTRIBUTIONS, default="exponential")
+    parser.add_argument("--max-quantity", type=int, default=1000)
+    parser.add_argument("--price", choices=PRICE_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--median-price", type=float, default=25.0)
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cache and regenerate")
+    parser.add_argument("--install", metavar="DIR", help="Copy the fixture to DIR/stockt.db (e.g. build)")
+    args = parser.parse_args()
+
+    params = fixture_params(args.products, args.seed, args.names, args.quantity,
+                            args.max_quantity, args.price, args.median_price)
+    path = get_fixture(params, rebuild=args.rebuild)
+    print(f"Fixture: {path}")
+    if args.install:
+        print(f"Installed: {install_fixture(path, args.install)}")
+
+if __name__ == "__main__":
+    main()
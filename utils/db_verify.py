@@ -0,0 +1,143 @@
+"""
+@file utils/db_verify.py
+@brief Read-only verification of what the binary persisted in `stockt.db`.
+
+@details
+The console output says what the binary claims to have done; the database says what it did.
+`StockDatabase` opens `stockt.db` through a `mode=ro` URI, so a check can never write to or
+lock the database a test is still driving, and fetches only the rows a test touched. Every query
+goes through the `produits` primary key (`id` is the rowid): a lookup costs O(log n) page reads
+whatever the catalog size, and nothing ever scans the table.
+
+`assert_product()` compares a row field by field and raises `VerificationError` listing every
+mismatch; `assert_absent()` checks that a deleted or never-created ID has no row. Prices are
+compared as the C floats the binary stores them in.
+
+Usage:
+    db = StockDatabase.for_binary(BINARY_PATH)
+    db.assert_product(3, nom="SuperModif", quantite=99999, prix=999999.99)
+    db.assert_absent(4)
+"""
+
+import os
+import struct
+import sqlite3
+
+from .listing_parser import Product
+
+PRODUCT_COLUMNS = "id, nom, quantite, prix"
+
+def c_float(value):
+    """Returns `value` rounded to a C float, as the binary holds prices."""
+    return struct.unpack("f", struct.pack("f", float(value)))[0]
+
+class VerificationError(AssertionError):
+    """Raised when the database does not hold what a test expects."""
+
+class StockDatabase:
+    """
+    Read-only, indexed view of a gestion_stock database.
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path of `stockt.db`.
+
+        Raises:
+            VerificationError: If the database file does not exist.
+        """
+        if not os.path.exists(db_path):
+            raise VerificationError(f"Database not found: {db_path}")
+        self.db_path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    @classmethod
+    def for_binary(cls, binary_path, db_filename="stockt.db"):
+        """
+        Opens the database a binary uses: the binary resolves it next to its own executable.
+        """
+        return cls(os.path.join(os.path.dirname(os.path.abspath(binary_path)), db_filename))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ---- indexed reads ---------------------------------------------------
+
+    def fetch(self, prod_id):
+        """
+        Returns the product with this ID, or None.
+        """
+        row = self.conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM produits WHERE id = ?", (int(prod_id),)).fetchone()
+        return Product(*row) if row else None
+
+    def fetch_many(self, prod_ids):
+        """
+        Returns {id: Product} for the IDs that exist (one primary-key lookup per ID).
+        """
+        ids = sorted({int(pid) for pid in prod_ids})
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self.conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM produits WHERE id IN ({placeholders})", ids)
+        return {row[0]: Product(*row) for row in rows}
+
+    def last_product(self):
+        """
+        Returns the product with the highest ID (the latest add on an AUTOINCREMENT table), or None.
+        """
+        row = self.conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM produits ORDER BY id DESC LIMIT 1").fetchone()
+        return Product(*row) if row else None
+
+    # ---- assertions ------------------------------------------------------
+
+    def assert_product(self, prod_id, nom=None, quantite=None, prix=None, decimals=None):
+        """
+        Checks that product `prod_id` exists and holds the given field values (None: not checked).
+
+        Args:
+            decimals (int): Compare prices as the listing shows them, rounded to this many
+                decimals (for values read back from a listing), instead of as C floats.
+
+        Returns:
+            Product: The stored row.
+
+        Raises:
+            VerificationError: Listing every field that differs, or if the row is missing.
+        """
+        product = self.fetch(prod_id)
+        if product is None:
+            raise VerificationError(f"ID {prod_id}: no row in {os.path.basename(self.db_path)}")
+        mismatches = []
+        if nom is not None and product.nom != nom:
+            mismatches.append(f"nom {product.nom!r} != {nom!r}")
+        if quantite is not None and product.quantite != int(quantite):
+            mismatches.append(f"quantite {product.quantite} != {int(quantite)}")
+        if prix is not None:
+            if decimals is None:
+                same = product.prix is not None and c_float(product.prix) == c_float(prix)
+            else:
+                same = product.prix is not None and f"{c_float(product.prix):.{decimals}f}" == f"{float(prix):.{decimals}f}"
+            if not same:
+                mismatches.append(f"prix {product.prix} != {float(prix)}")
+        if mismatches:
+            raise VerificationError(f"ID {prod_id}: " + ", ".join(mismatches))
+        return product
+
+    def assert_absent(self, prod_id):
+        """
+        Checks that no product has this ID.
+
+        Raises:
+            VerificationError: If the row exists.
+        """
+        product = self.fetch(prod_id)
+        if product is not None:
+            raise VerificationError(f"ID {prod_id}: still stored as {tuple(product)}")
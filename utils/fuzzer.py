@@ -0,0 +1,422 @@
+"""
+@file utils/fuzzer.py
+@brief Mutation fuzzer for the gestion_stock menu, seeded from the regression scenario.
+
+@details
+Generates stdin scripts for `gestion_stock --test-mode`, starting from the regression sequence
+("2", "", "0") and the scenarios in utils.scenarios, and mutates them line by line: huge and
+negative numbers, non-UTF-8 and overlong names, empty lines, format strings, spliced menu steps.
+Each input runs once in a worker's sandbox against a fresh copy of the starting database, is
+terminated by a run of "0" lines (so it always ends at "Quitter" instead of hitting the
+EOF read loop) and is classified:
+
+- crash: killed by a signal, hung past the timeout, runaway output, non-zero exit, a SQLite
+  error message, a known regression signature, or a database failing `PRAGMA integrity_check`;
+- interesting: produced an output line shape (digits and quoted names normalized) never seen
+  before. These inputs join the corpus and are mutated further.
+
+Crashes are deduplicated by signature: one reproducer per signature is kept in
+`build/fuzz/crashes/`, the corpus in `build/fuzz/corpus/`, and run statistics (execs/sec,
+corpus size, crash counts) in `build/fuzz/stats.json`.
+
+Usage:
+    python3 -m utils.fuzzer --duration 120 --jobs 4 --seed 1
+"""
+
+import os
+import re
+import json
+import time
+import random
+import shutil
+import signal
+import sqlite3
+import hashlib
+import argparse
+import selectors
+import tempfile
+import subprocess
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
+
+from .scenarios import SCENARIOS, to_input_lines
+from .signatures import registry_signatures, SIGNATURE_REGISTRY
+from .test_runner import create_sandbox, get_binary_name, get_repo_root
+
+FUZZ_DIR = os.path.join(get_repo_root(), "build", "fuzz")
+REGRESSION_SEED = [b"2", b"", b"0"]
+# Appended to every input: quits from any sub-prompt (name, quantity, price, confirmation)
+TERMINATOR = [b"0"] * 6
+MAX_OUTPUT = 1024 * 1024
+MAX_LINES = 400
+
+# Same signatures as regression_bug_test.analyze_output(): the "regression" group of meta/meta_SIGNATURE_REGISTRY.py
+KNOWN_ERROR_GROUP = "regression"
+# "Erreur insertion produit: <sqlite message>" and friends
+DB_ERROR_LINE = re.compile(rb"Erreur [^:\n]*: ?[^\n]+")
+
+INTERESTING_VALUES = [
+    b"", b" ", b"0", b"-0", b"1", b"-1", b"2147483647", b"2147483648", b"-2147483648", b"-2147483649",
+    b"4294967296", b"9223372036854775807", b"99999999999999999999", b"1e308", b"-1e308", b"nan", b"inf",
+    b"0.0000001", b"12.50", b"12,50", b"5abc", b"  7", b"0x10", b"%s%s%s%n", b"%x%x%x",
+    b"'; DROP TABLE produits;--", b"\"", b"\\", b"\x00", b"\xff\xfe\xfd", b"\xc3\x28", b"\xe9t\xe9",
+    "Écran Clé".encode("utf-8"), "Ã©".encode("utf-8"),
+]
+OVERLONG_SIZES = (255, 256, 1023, 1024, 4096, 65536)
+MENU_CHOICES = [b"0", b"1", b"2", b"3", b"4", b"5", b"-1", b"", b"99"]
+
+# ---- execution -----------------------------------------------------------
+
+def normalize_line(line):
+    """Reduces an output line to its shape: digits → N, quoted text → "S", trimmed."""
+    line = re.sub(rb'"[^"\n]*"', b'"S"', line)
+    line = re.sub(rb"\d+", b"N", line)
+    return line.strip()[:120]
+
+def output_features(output):
+    """Returns the set of normalized output line shapes (hashed to keep workers' replies small)."""
+    shapes = set()
+    for part in re.split(rb"[\n:]", output):
+        shape = normalize_line(part)
+        if shape:
+            shapes.add(hashlib.sha1(shape).hexdigest()[:12])
+    return shapes
+
+def read_output(proc, deadline, limit=MAX_OUTPUT):
+    """
+    Reads a process's stdout until EOF, `deadline` (perf_counter) or `limit` bytes.
+
+    Returns:
+        tuple: (output bytes, "eof" | "timeout" | "overflow").
+    """
+    chunks, size = [], 0
+    with selectors.DefaultSelector() as sel:
+        sel.register(proc.stdout, selectors.EVENT_READ)
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return b"".join(chunks), "timeout"
+            if not sel.select(remaining):
+                continue
+            chunk = os.read(proc.stdout.fileno(), 65536)
+            if not chunk:
+                return b"".join(chunks), "eof"
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                return b"".join(chunks), "overflow"
+
+def check_database(db_path):
+    """Returns None if the database is sound, else a short problem description."""
+    if not os.path.exists(db_path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            verdict = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return str(e)
+    return None if verdict == "ok" else verdict
+
+def classify(returncode, status, output, db_problem):
+    """
+    Derives the crash signature of one execution.
+
+    Returns:
+        str: Signature (stable across inputs hitting the same bug), or None for a clean run.
+    """
+    tail = normalize_line(output.rstrip().rsplit(b"\n", 1)[-1]).decode("utf-8", errors="replace")
+    if status == "timeout":
+        return f"hang after: {tail}"
+    if status == "overflow":
+        lines = output.split(b"\n")
+        common = max(set(lines[-50:]), key=lines[-50:].count)
+        return f"runaway output: {normalize_line(common).decode('utf-8', errors='replace')}"
+    if returncode is not None and returncode < 0:
+        try:
+            name = signal.Signals(-returncode).name
+        except ValueError:
+            name = f"signal {-returncode}"
+        return f"{name} after: {tail}"
+    if db_problem:
+        return f"database integrity: {re.sub(r'[0-9]+', 'N', db_problem)[:120]}"
+    known_errors = registry_signatures(KNOWN_ERROR_GROUP).scan(output).matched("failure")
+    if known_errors:
+        return f"signature: {SIGNATURE_REGISTRY[known_errors[0]]['patterns'][0]}"
+    match = DB_ERROR_LINE.search(output)
+    if match and b"Erreur de lecture" not in match.group(0):
+        return f"db error: {normalize_line(match.group(0)).decode('utf-8', errors='replace')}"
+    if returncode:
+        return f"exit code {returncode}"
+    return None
+
+def execute(binary, data, timeout=2.0, db_template=None, terminate=True, keep_output=False):
+    """
+    Runs one stdin script against `binary` with a fresh copy of the starting database.
+
+    Args:
+        binary (str): Sandboxed binary; its directory holds `stockt.db`.
+        data (bytes): Input script.
+        timeout (float): Seconds before the run counts as a hang.
+        db_template (str): Database restored before the run (None: start without a database).
+        terminate (bool): Append TERMINATOR so the run ends at the menu's "Quitter".
+        keep_output (bool): Also return the full output bytes under "output".
+
+    Returns:
+        dict: returncode, status, signature (None when clean), features, output tail, seconds.
+    """
+    sandbox = os.path.dirname(binary)
+    db_path = os.path.join(sandbox, "stockt.db")
+    if db_template:
+        shutil.copyfile(db_template, db_path)
+    elif os.path.exists(db_path):
+        os.remove(db_path)
+    if terminate:
+        data = data + b"\n" + b"\n".join(TERMINATOR) + b"\n"
+
+    # stdin from a file: the child sees a real EOF and large inputs cannot deadlock on pipes
+    with tempfile.TemporaryFile(dir=sandbox) as stdin_file:
+        stdin_file.write(data)
+        stdin_file.seek(0)
+        started = time.perf_counter()
+        proc = subprocess.Popen([binary, "--test-mode"], stdin=stdin_file, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, cwd=sandbox)
+        try:
+            output, status = read_output(proc, started + timeout)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+        seconds = time.perf_counter() - started
+
+    returncode = proc.returncode if status == "eof" else None
+    signature = classify(returncode, status, output, check_database(db_path))
+    result = {
+        "returncode": returncode,
+        "status": status,
+        "signature": signature,
+        "features": output_features(output),
+        "tail": output[-2000:].decode("utf-8", errors="replace"),
+        "seconds": seconds
+    }
+    if keep_output:
+        result["output"] = output
+    return result
+
+# ---- mutation ------------------------------------------------------------
+
+def random_value(rng):
+    """Picks an interesting field value: boundary numbers, odd encodings or an overlong string."""
+    if rng.random() < 0.15:
+        return rng.choice([b"A", b"\xe9", "é".encode("utf-8"), b"9", b"%"]) * rng.choice(OVERLONG_SIZES)
+    return rng.choice(INTERESTING_VALUES)
+
+def random_step(rng):
+    """Generates the lines of one menu operation with random field values."""
+    def field(normal):
+        return random_value(rng) if rng.random() < 0.5 else normal
+    op = rng.choice("12344")
+    if op == "1":
+        return [b"1", field(b"Clavier"), field(b"25"), field(b"49.99")]
+    if op == "2":
+        return [b"2"]
+    if op == "3":
+        return [b"3", field(str(rng.randint(1, 5)).encode()), field(b"o")]
+    return [b"4", field(str(rng.randint(1, 5)).encode()), field(b"SuperModif"), field(b"99999"), field(b"999999.99")]
+
+def mutate(lines, rng, corpus):
+    """
+    Applies 1–4 random line-level mutations to an input script.
+
+    Args:
+        lines (list): Input lines (bytes).
+        rng (random.Random): Source of randomness.
+        corpus (list): Other inputs, used for splicing.
+
+    Returns:
+        list: The mutated lines (at most MAX_LINES).
+    """
+    lines = list(lines)
+    for _ in range(rng.randint(1, 4)):
+        pos = rng.randint(0, len(lines))
+        choice = rng.random()
+        if choice < 0.25 or not lines:
+            lines[pos:pos] = random_step(rng)
+        elif choice < 0.45:
+            lines[min(pos, len(lines) - 1)] = random_value(rng)
+        elif choice < 0.55:
+            lines[min(pos, len(lines) - 1)] = rng.choice(MENU_CHOICES)
+        elif choice < 0.65:
+            del lines[min(pos, len(lines) - 1):min(pos, len(lines) - 1) + rng.randint(1, 3)]
+        elif choice < 0.75:
+            start = rng.randint(0, len(lines) - 1)
+            lines[pos:pos] = lines[start:start + rng.randint(1, 6)]
+        elif choice < 0.85 and corpus:
+            other = rng.choice(corpus)
+            start = rng.randint(0, max(len(other) - 1, 0))
+            lines[pos:pos] = other[start:start + rng.randint(1, 8)]
+        else:
+            i = min(pos, len(lines) - 1)
+            line = bytearray(lines[i] or b"0")
+            j = rng.randrange(len(line))
+            line[j] ^= 1 << rng.randrange(8)
+            lines[i] = bytes(line.replace(b"\n", b""))
+    return lines[:MAX_LINES]
+
+def seed_inputs():
+    """Returns the initial corpus: the regression sequence plus every shared scenario."""
+    seeds = [list(REGRESSION_SEED)]
+    for steps in SCENARIOS.values():
+        seeds.append([line.encode("utf-8") for line in to_input_lines(steps)])
+    return seeds
+
+def encode_input(lines):
+    """Joins input lines into the stdin bytes of one run."""
+    return b"\n".join(lines)
+
+def input_id(lines):
+    """Short content hash naming a saved input."""
+    return hashlib.sha256(encode_input(lines)).hexdigest()[:16]
+
+# ---- workers and campaign --------------------------------------------------
+
+_WORKER = {}
+
+def init_worker(db_template, timeout):
+    """Process-pool initializer: one sandbox (binary link) per worker process."""
+    sandbox = create_sandbox(os.path.join(get_repo_root(), "build"))
+    # Removed when the worker process exits (pool workers do not run atexit handlers)
+    multiprocessing.util.Finalize(None, shutil.rmtree, args=(sandbox,), kwargs={"ignore_errors": True}, exitpriority=10)
+    _WORKER.update(binary=os.path.join(sandbox, get_binary_name()), db_template=db_template, timeout=timeout)
+
+def run_input(data):
+    """Worker entry point: executes one encoded input in this worker's sandbox."""
+    return execute(_WORKER["binary"], data, _WORKER["timeout"], _WORKER["db_template"])
+
+def glob_inputs(directory):
+    """Returns the saved input scripts (*.txt) of a corpus or crash directory."""
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".txt")]
+
+def load_corpus(fuzz_dir):
+    """Loads inputs saved by previous campaigns."""
+    corpus = []
+    for path in sorted(glob_inputs(os.path.join(fuzz_dir, "corpus"))):
+        with open(path, "rb") as f:
+            corpus.append(f.read().split(b"\n"))
+    return corpus
+
+def save_input(directory, lines, meta=None):
+    """Writes an input script (and optional JSON metadata) named by its hash."""
+    os.makedirs(directory, exist_ok=True)
+    name = input_id(lines)
+    with open(os.path.join(directory, name + ".txt"), "wb") as f:
+        f.write(encode_input(lines))
+    if meta is not None:
+        with open(os.path.join(directory, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+    return name
+
+def fuzz(duration=60, max_execs=None, jobs=4, seed=0, timeout=5.0, db_template=None, fuzz_dir=FUZZ_DIR, batch=None):
+    """
+    Runs a fuzzing campaign.
+
+    Args:
+        duration (float): Wall-clock budget in seconds.
+        max_execs (int): Optional execution budget.
+        jobs (int): Worker processes (one binary run each at a time).
+        seed (int): RNG seed for mutations.
+        timeout (float): Per-execution hang timeout in seconds.
+        db_template (str): Starting database for every run (None: empty database).
+        fuzz_dir (str): Where corpus, crashes and stats are kept.
+        batch (int): Inputs generated per round (default 8 per job).
+
+    Returns:
+        dict: Campaign statistics, including execs/sec and unique crashes.
+    """
+    rng = random.Random(seed)
+    crashes_dir = os.path.join(fuzz_dir, "crashes")
+    corpus = seed_inputs() + load_corpus(fuzz_dir)
+    known_crashes = {}
+    for path in glob_inputs(crashes_dir):
+        meta_path = path[:-len(".txt")] + ".json"
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            known_crashes[meta["signature"]] = meta
+    seen_features = set()
+    new_crashes = {}
+    execs = 0
+    batch = batch or 8 * jobs
+    started = time.perf_counter()
+    deadline = started + duration
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(db_template, timeout)) as pool:
+        # Replay the corpus first so its features count as already covered
+        pending = [(lines, None) for lines in corpus]
+        while time.perf_counter() < deadline and (max_execs is None or execs < max_execs):
+            if not pending:
+                pending = [(mutate(rng.choice(corpus), rng, corpus), "mutant") for _ in range(batch)]
+            if max_execs is not None:
+                pending = pending[:max_execs - execs]
+            outcomes = pool.map(run_input, [encode_input(lines) for lines, _ in pending], chunksize=max(1, len(pending) // (4 * jobs)))
+            for (lines, origin), outcome in zip(pending, outcomes):
+                execs += 1
+                new = outcome["features"] - seen_features
+                seen_features |= outcome["features"]
+                sig = outcome["signature"]
+                if sig:
+                    entry = known_crashes.get(sig) or new_crashes.get(sig)
+                    if entry is None:
+                        entry = {"signature": sig, "count": 0, "first_seen": time.strftime("%Y-%m-%d_%H-%M-%S"),
+                                 "status": outcome["status"], "returncode": outcome["returncode"],
+                                 "lines": len(lines), "output_tail": outcome["tail"][-500:]}
+                        entry["input"] = save_input(crashes_dir, lines, entry)
+                        new_crashes[sig] = entry
+                        print(f"💥 New crash [{sig}] → {os.path.join(crashes_dir, entry['input'])}.txt")
+                    entry["count"] += 1
+                elif new and origin:
+                    corpus.append(lines)
+                    save_input(os.path.join(fuzz_dir, "corpus"), lines)
+            pending = []
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "execs": execs,
+        "elapsed_s": round(elapsed, 2),
+        "execs_per_sec": round(execs / elapsed, 1) if elapsed else None,
+        "jobs": jobs,
+        "seed": seed,
+        "corpus": len(corpus),
+        "features": len(seen_features),
+        "new_crashes": len(new_crashes),
+        "crashes": {sig: e["count"] for sig, e in {**known_crashes, **new_crashes}.items()},
+    }
+    os.makedirs(fuzz_dir, exist_ok=True)
+    with open(os.path.join(fuzz_dir, "stats.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the gestion_stock menu with mutated input sequences.")
+    parser.add_argument("--duration", type=float, default=60, help="Campaign length in seconds")
+    parser.add_argument("--max-execs", type=int, default=None, help="Stop after this many executions")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="Mutation RNG seed")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-execution hang timeout in seconds")
+    parser.add_argument("--db", default=None, help="Starting database for every run (default: empty)")
+    parser.add_argument("--dir", default=FUZZ_DIR, help="Corpus/crash directory")
+    args = parser.parse_args()
+
+    stats = fuzz(args.duration, args.max_execs, args.jobs, args.seed, args.timeout, args.db, args.dir)
+    print(f"{stats['execs']} execs in {stats['elapsed_s']}s → {stats['execs_per_sec']} execs/sec, "
+          f"corpus {stats['corpus']}, {stats['features']} output shapes, {stats['new_crashes']} new crash signature(s)")
+    for sig, count in stats["crashes"].items():
+        print(f"  - [{count}x] {sig}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+@file utils/listing_parser.py
+@brief Streaming, bounded-memory parser for the "Lister les produits" output.
+
+@details
+Consumes the binary's output as raw byte chunks and yields one compact `Product` record per
+listing line (`ID: 1 | Nom: Clavier | Quantité: 25 | Prix: 49.99`). Only the current partial
+line is buffered, and overlong lines are truncated, so memory stays flat whatever the catalog
+size. Callers can stop iterating at any point (early termination) without reading the rest.
+"""
+
+import re
+from collections import namedtuple
+
+Product = namedtuple("Product", ["id", "nom", "quantite", "prix"])
+
+# Cap on a single buffered line; anything longer is not a product line anyway
+MAX_LINE = 64 * 1024
+READ_SIZE = 64 * 1024
+
+LISTING_HEADER = b"Liste des produits"
+# "Quantit[^:]*" tolerates UTF-8 "é", Latin-1 mojibake ("Ã©") and stripped accents alike
+PRODUCT_LINE = re.compile(
+    rb"ID:\s*(\d+)\s*\|\s*Nom:\s?(.*?)\s*\|\s*Quantit[^:|]*:\s*(-?\d+)\s*\|\s*Prix:\s*(-?\d+(?:\.\d+)?)"
+)
+
+def iter_chunks(stream, size=READ_SIZE):
+    """
+    Yields byte chunks from a binary file object until EOF.
+    """
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+def parse_product_line(line):
+    """
+    Parses one listing line.
+
+    Args:
+        line (bytes): A single output line.
+
+    Returns:
+        Product: The typed record, or None if the line is not a product line.
+    """
+    match = PRODUCT_LINE.search(line)
+    if not match:
+        return None
+    prod_id, nom, quantite, prix = match.groups()
+    return Product(int(prod_id), nom.decode("utf-8", errors="replace"), int(quantite), float(prix))
+
+class ListingParser:
+    """
+    Incremental parser: feed it byte chunks, get products back.
+
+    Attributes:
+        header_seen (bool): True once "Liste des produits" has been read.
+        count (int): Number of product records yielded so far.
+    """
+
+    def __init__(self, max_line=MAX_LINE):
+        self.max_line = max_line
+        self.header_seen = False
+        self.count = 0
+        self._partial = b""
+
+    def feed(self, chunk):
+        """
+        Consumes one chunk and yields the products completed by it.
+        """
+        data = self._partial + chunk
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                break
+            product = self._handle_line(data[start:end])
+            if product is not None:
+                yield product
+            start = end + 1
+        self._partial = data[start:start + self.max_line]
+
+    def close(self):
+        """
+        Flushes the trailing partial line (output that did not end with a newline).
+        """
+        line, self._partial = self._partial, b""
+        product = self._handle_line(line)
+        if product is not None:
+            yield product
+
+    def _handle_line(self, line):
+        if not self.header_seen and LISTING_HEADER in line:
+            self.header_seen = True
+        product = parse_product_line(line)
+        if product is not None:
+            self.count += 1
+        return product
+
+def iter_products(chunks, parser=None):
+    """
+    Yields `Product` records from an iterable of byte chunks.
+
+    Args:
+        chunks (iterable): Byte chunks, e.g. `iter_chunks(proc.stdout)`.
+        parser (ListingParser): Optional parser, to inspect header/count afterwards.
+
+    Yields:
+        Product: One record per listing line, in output order.
+    """
+    parser = parser or ListingParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
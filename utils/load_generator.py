@@ -0,0 +1,240 @@
+"""
+@file utils/load_generator.py
+@brief Concurrent load generator measuring gestion_stock operation throughput.
+
+@details
+Drives M concurrent clients, each holding one persistent binary session (utils.session) in its
+own sandbox, through a configurable mix of the menu operations "1" add, "2" list, "3" delete and
+"4" modify. Runs for a fixed duration or a fixed total number of operations and writes ops/sec,
+error counts and per-operation latency percentiles to `reports/load_<version>_<timestamp>.json`
+and `.md`.
+
+Usage:
+    python3 -m utils.load_generator --clients 8 --duration 30 --mix add=40,list=10,modify=25,delete=25
+"""
+
+import os
+import json
+import time
+import shutil
+import random
+import argparse
+import datetime
+import subprocess
+import threading
+
+from .version import extract_version_from_git
+from .metrics import summarize_latencies
+from .session import GestionStockSession, SessionError
+from .signatures import registry_signatures
+from .test_runner import create_sandbox, get_binary_name, get_repo_root
+
+REPORT_DIR = os.path.join(get_repo_root(), "reports")
+OPERATIONS = ("add", "list", "modify", "delete")
+DEFAULT_MIX = {"add": 40, "list": 10, "modify": 25, "delete": 25}
+
+def parse_mix(text):
+    """
+    Parses an operation mix such as "add=40,list=10,modify=25,delete=25".
+
+    Returns:
+        dict: Operation name → relative weight.
+
+    Raises:
+        ValueError: On unknown operations or a mix without positive weights.
+    """
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name!r} (expected one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+    if not any(w > 0 for w in mix.values()):
+        raise ValueError("Operation mix needs at least one positive weight.")
+    return mix
+
+def run_operation(session, op, rng, client_id, counter):
+    """
+    Executes one menu operation on a session and returns its output.
+
+    IDs for modify/delete are drawn from the range of products this client has added,
+    so some of them may already be gone; the binary then answers "produit inexistant".
+    """
+    if op == "add":
+        return session.add_product(f"Load-{client_id}-{counter}", str(rng.randint(1, 500)), f"{rng.uniform(0.5, 999):.2f}")
+    if op == "list":
+        return session.list_products()
+    prod_id = str(rng.randint(1, max(counter, 1)))
+    if op == "modify":
+        return session.modify_product(prod_id, f"Load-{client_id}-{counter}-m", str(rng.randint(1, 500)), f"{rng.uniform(0.5, 999):.2f}")
+    return session.delete_product(prod_id)
+
+def run_client(client_id, mix, deadline, max_ops, timeout, seed, stop_event):
+    """
+    Runs one client until the deadline, its operation budget, or the stop event.
+
+    A step that times out or loses the binary counts as an error and the session is restarted.
+    If the binary then fails to start, that also counts as an error and the client stops early,
+    keeping what it measured so far.
+
+    Returns:
+        dict: Per-operation latencies (seconds), error counts, number of operations run and
+        number of failed session starts.
+    """
+    rng = random.Random(seed + client_id)
+    ops, weights = zip(*mix.items())
+    latencies = {op: [] for op in OPERATIONS}
+    errors = {op: 0 for op in OPERATIONS}
+    done = 0
+    added = 0
+    failed_starts = 0
+
+    sandbox = create_sandbox(os.path.join(get_repo_root(), "build"))
+    binary = os.path.join(sandbox, get_binary_name())
+
+    def start_session():
+        """Returns a started session in the sandbox, or None if the binary failed to start."""
+        candidate = GestionStockSession(binary, cwd=sandbox, timeout=timeout)
+        try:
+            return candidate.start()
+        except (OSError, subprocess.TimeoutExpired, SessionError):
+            # Reaps a process that started but never reached the menu
+            candidate.close(timeout=1)
+            return None
+
+    session = None
+    try:
+        session = start_session()
+        if session is None:
+            failed_starts += 1
+        while (session is not None and not stop_event.is_set() and time.time() < deadline
+               and (max_ops is None or done < max_ops)):
+            op = rng.choices(ops, weights)[0]
+            start = time.perf_counter()
+            try:
+                output = run_operation(session, op, rng, client_id, added + 1)
+                latencies[op].append(time.perf_counter() - start)
+                if registry_signatures("load").scan(output).found("error"):
+                    errors[op] += 1
+                elif op == "add":
+                    added += 1
+            except (subprocess.TimeoutExpired, SessionError):
+                errors[op] += 1
+                session.close(timeout=1)
+                session = start_session()
+                if session is None:
+                    errors[op] += 1
+                    failed_starts += 1
+            done += 1
+    finally:
+        if session is not None:
+            session.close()
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    return {"latencies": latencies, "errors": errors, "operations": done, "failed_starts": failed_starts}
+
+def run_load(clients=4, mix=None, duration=None, operations=None, timeout=10, seed=0):
+    """
+    Drives `clients` concurrent sessions and aggregates their measurements.
+
+    Args:
+        clients (int): Number of concurrent clients (one binary each).
+        mix (dict): Operation weights (defaults to DEFAULT_MIX).
+        duration (float): Run length in seconds (used when `operations` is None).
+        operations (int): Total number of operations across all clients.
+        timeout (float): Per-step timeout in seconds.
+        seed (int): Base seed for reproducible operation sequences.
+
+    Returns:
+        dict: Summary with throughput, error counts and latency percentiles per operation.
+    """
+    mix = mix or DEFAULT_MIX
+    if operations is None and duration is None:
+        duration = 10
+    deadline = time.time() + duration if duration else float("inf")
+    budgets = [None] * clients
+    if operations is not None:
+        budgets = [operations // clients + (1 if i < operations % clients else 0) for i in range(clients)]
+
+    stop_event = threading.Event()
+    outcomes = [None] * clients
+
+    def worker(index):
+        outcomes[index] = run_client(index, mix, deadline, budgets[index], timeout, seed, stop_event)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    total_ops = sum(o["operations"] for o in outcomes if o)
+    per_op = {}
+    for op in OPERATIONS:
+        samples = [s for o in outcomes if o for s in o["latencies"][op]]
+        per_op[op] = dict(summarize_latencies(samples), errors=sum(o["errors"][op] for o in outcomes if o))
+
+    return {
+        "clients": clients,
+        "mix": mix,
+        "elapsed_s": round(elapsed, 2),
+        "operations": total_ops,
+        "ops_per_sec": round(total_ops / elapsed, 2) if elapsed else None,
+        "errors": sum(v["errors"] for v in per_op.values()),
+        "failed_starts": sum(o["failed_starts"] for o in outcomes if o),
+        "per_operation": per_op
+    }
+
+def save_load_report(summary, version, timestamp):
+    """
+    Writes the load summary to JSON and Markdown files in `reports/`.
+
+    Returns:
+        tuple: (json_path, md_path).
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    base = os.path.join(REPORT_DIR, f"load_{version}_{timestamp}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({"version": version, "timestamp": timestamp, "load": summary}, f, indent=4, ensure_ascii=False)
+
+    with open(base + ".md", "w", encoding="utf-8") as f:
+        f.write(f"# 🏋️ Load Report – Version {version}\n")
+        f.write(f"**Date**: {timestamp}\n\n---\n\n## 📈 Throughput\n\n")
+        f.write(f"- **Clients**: {summary['clients']}\n- **Operations**: {summary['operations']}\n")
+        f.write(f"- **Elapsed**: {summary['elapsed_s']}s\n- **Ops/sec**: {summary['ops_per_sec']}\n")
+        f.write(f"- **Errors**: {summary['errors']}\n")
+        f.write(f"- **Failed session starts**: {summary['failed_starts']}\n\n## ⏱️ Latency (ms)\n\n")
+        f.write("| Operation | Count | Errors | p50 | p95 | p99 | Max |\n|-----------|-------|--------|-----|-----|-----|-----|\n")
+        for op, s in summary["per_operation"].items():
+            f.write(f"| {op} | {s['count']} | {s['errors']} | {s['p50_ms']} | {s['p95_ms']} | {s['p99_ms']} | {s['max_ms']} |\n")
+    return base + ".json", base + ".md"
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure gestion_stock throughput under concurrent load.")
+    parser.add_argument("--clients", type=int, default=4, help="Number of concurrent binary sessions")
+    parser.add_argument("--duration", type=float, default=None, help="Run length in seconds (default 10)")
+    parser.add_argument("--operations", type=int, default=None, help="Total operations instead of a duration")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Operation weights, e.g. add=40,list=10,modify=25,delete=25")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-step timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for reproducible operation sequences")
+    args = parser.parse_args()
+
+    summary = run_load(args.clients, args.mix, args.duration, args.operations, args.timeout, args.seed)
+    timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+    json_path, md_path = save_load_report(summary, extract_version_from_git(), timestamp)
+
+    print(f"{summary['operations']} ops in {summary['elapsed_s']}s → {summary['ops_per_sec']} ops/sec ({summary['errors']} errors)")
+    if summary["failed_starts"]:
+        print(f"⚠️ {summary['failed_starts']} session start(s) failed; those clients stopped early")
+    print(f"↪ Reports: {json_path}, {md_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+@file utils/log_archive.py
+@brief Content-addressed, compressed, deduplicating archive for test logs.
+
+@details
+Logs are cut into chunks at blank-line boundaries (the menu blocks, the STDOUT/STDERR
+sections, the header), capped at `MAX_CHUNK` bytes. Every chunk is stored once, zlib-compressed,
+in `objects/` under the first `DIGEST_HEX` hex digits of its SHA-256. Each log is one line
+appended to `index.jsonl`: its name, size, digest and the concatenated digests of its chunks,
+about 100 bytes plus 16 per chunk. Runs that print the same menus and messages therefore add
+only that line, their header and the lines that actually changed.
+
+Archives written before the index (one JSON manifest per log in `manifests/`) are still read.
+
+Usage:
+    python3 -m utils.log_archive ls
+    python3 -m utils.log_archive cat add_prod_test_2025-08-30_01-19-32
+    python3 -m utils.log_archive import build/logs --remove
+    python3 -m utils.log_archive stats
+"""
+
+import os
+import glob
+import json
+import zlib
+import hashlib
+import argparse
+import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_ARCHIVE = os.path.join(REPO_ROOT, "build", "logs", "archive")
+MAX_CHUNK = 64 * 1024
+# Hex digits of SHA-256 kept to name chunks and check logs (64 bits)
+DIGEST_HEX = 16
+
+def iter_chunks(data, max_chunk=MAX_CHUNK, start=0, end=None):
+    """
+    Splits `data` into content-defined chunks ending at blank lines.
+
+    Args:
+        data: bytes or any object supporting `find`, `rfind` and slicing (e.g. mmap).
+        max_chunk (int): Upper bound on a chunk; longer blocks are cut at a newline.
+        start (int): Offset where chunking starts.
+        end (int): Offset where it stops (default: the end of `data`).
+
+    Yields:
+        bytes: Consecutive chunks whose concatenation is `data[start:end]`.
+    """
+    size = len(data) if end is None else end
+    pos = start
+    while pos < size:
+        limit = min(size, pos + max_chunk)
+        end = data.find(b"\n\n", pos, limit)
+        if end >= 0:
+            end += 2
+        elif limit == size:
+            end = size
+        else:
+            newline = data.rfind(b"\n", pos, limit)
+            end = newline + 1 if newline >= pos else limit
+        yield bytes(data[pos:end])
+        pos = end
+
+class LogArchive:
+    """
+    One archive directory: `objects/` (chunks) and `index.jsonl` (one line per log).
+    """
+
+    def __init__(self, root=DEFAULT_ARCHIVE):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.jsonl")
+        # Per-log JSON manifests of older archives
+        self.manifests_dir = os.path.join(root, "manifests")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:] + ".z")
+
+    def put_chunk(self, chunk):
+        """
+        Stores a chunk if it is not already present.
+
+        Returns:
+            str: Truncated SHA-256 hex digest identifying the chunk.
+        """
+        digest = hashlib.sha256(chunk).hexdigest()[:DIGEST_HEX]
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(chunk, 9))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get_chunk(self, digest):
+        """
+        Returns the decompressed bytes of a stored chunk.
+        """
+        with open(self._object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def write_log(self, name, data, metadata=None):
+        """
+        Archives one log.
+
+        Args:
+            name (str): Log name (e.g. "add_prod_test_<timestamp>"); a later log with the same
+                name replaces it.
+            data: Log content as str, bytes or an mmap, or a list of such parts concatenated in
+                order; a part may also be a (buffer, start, end) region, e.g. from
+                `OutputSpool.region()`, chunked in place without being copied out first.
+            metadata (dict): Extra fields stored in the index record.
+
+        Returns:
+            str: The log name, as `read_log()` and `python3 -m utils.log_archive cat` take it.
+        """
+        whole = hashlib.sha256()
+        size = 0
+        chunks = []
+        for part in (data if isinstance(data, list) else [data]):
+            buffer, start, end = part if isinstance(part, tuple) else (part, 0, None)
+            if isinstance(buffer, str):
+                buffer = buffer.encode("utf-8")
+            for chunk in iter_chunks(buffer, start=start, end=end):
+                whole.update(chunk)
+                size += len(chunk)
+                chunks.append(self.put_chunk(chunk))
+
+        record = {
+            "name": name,
+            "created": datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S"),
+            "size": size,
+            "sha256": whole.hexdigest()[:DIGEST_HEX],
+            "chunks": "".join(chunks)
+        }
+        if metadata:
+            record["metadata"] = metadata
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        os.makedirs(self.root, exist_ok=True)
+        # One write on an O_APPEND descriptor: concurrent runners never interleave records
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        return name
+
+    def _records(self):
+        """
+        Returns every log record by name, the latest one winning: the older per-log manifests
+        first, then the index.
+        """
+        records = {}
+        for path in sorted(glob.glob(os.path.join(self.manifests_dir, "*.json")), key=os.path.getmtime):
+            with open(path, encoding="utf-8") as f:
+                records[os.path.basename(path)[:-len(".json")]] = json.load(f)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        records.pop(record["name"], None)
+                        records[record["name"]] = record
+        return records
+
+    @staticmethod
+    def _chunk_digests(record):
+        chunks = record["chunks"]
+        if isinstance(chunks, list):  # per-log manifest: full digests
+            return chunks
+        return [chunks[i:i + DIGEST_HEX] for i in range(0, len(chunks), DIGEST_HEX)]
+
+    def read_log(self, name):
+        """
+        Reassembles a log (by name, or by the path of an older per-log manifest) and checks its digest.
+
+        Returns:
+            str: The original log text.
+
+        Raises:
+            KeyError: If no log has that name.
+            ValueError: If the reassembled content does not match the recorded digest.
+        """
+        if os.path.isfile(name):
+            with open(name, encoding="utf-8") as f:
+                record = json.load(f)
+        else:
+            record = self._records()[name]
+        data = b"".join(self.get_chunk(digest) for digest in self._chunk_digests(record))
+        if not hashlib.sha256(data).hexdigest().startswith(record["sha256"]):
+            raise ValueError(f"Corrupted log: {record['name']}")
+        return data.decode("utf-8", errors="replace")
+
+    def list_logs(self):
+        """
+        Returns the archived log names, oldest first.
+        """
+        return list(self._records())
+
+    def stats(self):
+        """
+        Returns archive size figures: logical bytes referenced vs. bytes stored on disk
+        (chunks, index and older manifests).
+        """
+        records = self._records()
+        index_bytes = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        manifests_bytes = sum(os.path.getsize(p) for p in glob.glob(os.path.join(self.manifests_dir, "*.json")))
+        objects = glob.glob(os.path.join(self.objects_dir, "*", "*.z"))
+        stored = sum(os.path.getsize(p) for p in objects)
+        return {
+            "logs": len(records),
+            "objects": len(objects),
+            "logical_bytes": sum(record["size"] for record in records.values()),
+            "stored_bytes": stored + index_bytes + manifests_bytes
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Read and manage the content-addressed log archive.")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE, help="Archive directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ls", help="List archived logs")
+    cat = sub.add_parser("cat", help="Print an archived log")
+    cat.add_argument("name", help="Log name (or path of an older per-log manifest)")
+    sub.add_parser("stats", help="Show deduplication figures")
+    imp = sub.add_parser("import", help="Archive existing *.log files from a directory")
+    imp.add_argument("directory")
+    imp.add_argument("--remove", action="store_true", help="Delete the plain .log files once archived")
+    args = parser.parse_args()
+
+    archive = LogArchive(args.archive)
+    if args.command == "ls":
+        for name in archive.list_logs():
+            print(name)
+    elif args.command == "cat":
+        print(archive.read_log(args.name), end="")
+    elif args.command == "stats":
+        s = archive.stats()
+        ratio = s["logical_bytes"] / s["stored_bytes"] if s["stored_bytes"] else 0
+        print(f"{s['logs']} logs, {s['objects']} unique chunks: {s['logical_bytes']} bytes logical, "
+              f"{s['stored_bytes']} bytes stored ({ratio:.1f}x)")
+    else:
+        for path in sorted(glob.glob(os.path.join(args.directory, "*.log"))):
+            with open(path, "rb") as f:
+                archive.write_log(os.path.basename(path)[:-len(".log")], f.read())
+            if args.remove:
+                os.remove(path)
+            print(f"Archived {path}")
+
+if __name__ == "__main__":
+    main()
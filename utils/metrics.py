@@ -0,0 +1,79 @@
+"""
+@file utils/metrics.py
+@brief Small statistics helpers shared by the benchmark and load tooling.
+@details Latency samples are collected in seconds and summarized in milliseconds;
+`linear_trend()` fits the drift of a time series (used by the soak test).
+"""
+
+def percentile(sorted_values, pct):
+    """
+    Returns the `pct` percentile of an already sorted list (linear interpolation).
+
+    Args:
+        sorted_values (list): Samples in ascending order.
+        pct (float): Percentile between 0 and 100.
+
+    Returns:
+        float: Interpolated percentile, or None for an empty list.
+    """
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+def summarize_latencies(samples):
+    """
+    Summarizes latency samples (seconds) as count, mean, p50/p95/p99 and max in milliseconds.
+
+    Args:
+        samples (list): Latencies in seconds.
+
+    Returns:
+        dict: Summary with values rounded to 0.01 ms.
+    """
+    values = sorted(samples)
+    if not values:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    to_ms = lambda v: round(v * 1000, 2)
+    return {
+        "count": len(values),
+        "mean_ms": to_ms(sum(values) / len(values)),
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+        "p99_ms": to_ms(percentile(values, 99)),
+        "max_ms": to_ms(values[-1])
+    }
+
+def linear_trend(xs, ys):
+    """
+    Fits y = slope · x + intercept by least squares.
+
+    Args:
+        xs (list): Abscissas (e.g. elapsed hours).
+        ys (list): Observations.
+
+    Returns:
+        dict: slope, intercept, r2 and slope_stderr (standard error of the slope),
+        or None with fewer than three points or constant xs.
+    """
+    n = len(xs)
+    if n < 3:
+        return None
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return None
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    ss_res = sum((y - (slope * x + intercept)) ** 2 for x, y in zip(xs, ys))
+    ss_tot = sum((y - mean_y) ** 2 for y in ys)
+    return {
+        "slope": slope,
+        "intercept": intercept,
+        "r2": 1 - ss_res / ss_tot if ss_tot else 1.0,
+        "slope_stderr": (ss_res / (n - 2) / sxx) ** 0.5
+    }
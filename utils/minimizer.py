@@ -0,0 +1,213 @@
+"""
+@file utils/minimizer.py
+@brief Delta-debugging minimizer for failing gestion_stock input scripts.
+
+@details
+Shrinks a stdin script (one input line per line, as saved by utils.fuzzer or flattened from a
+scenario) to a 1-minimal reproducer with Zeller's ddmin: the script is cut into n chunks, and
+every chunk and every complement is tried; the first candidate that still fails replaces the
+script, otherwise n doubles until chunks are single lines.
+
+All candidates of one round run at once on a process pool (one sandbox per worker, fresh
+database per run, see `utils.fuzzer.execute()`), and every outcome is memoized by the hash of
+the candidate, so subsequences reached twice are never executed again.
+
+"Still fails" means, by default, the same crash signature as the original script. With
+`--expect TEXT` it means the output contains TEXT, with `--absent TEXT` that it does not
+(matched by utils.signatures: accents, case and encoding ignored), e.g. `--absent "produit supprime"` for a journey whose deletion
+stopped working.
+
+Usage:
+    python3 -m utils.minimizer build/fuzz/crashes/<id>.txt
+    python3 -m utils.minimizer --scenario journey --absent "produit supprime" --db build/stockt.db
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from . import fuzzer
+from .scenarios import SCENARIOS, get_scenario, to_input_lines
+from .signatures import SignatureSet
+
+def check_input(data):
+    """
+    Worker entry point: runs one candidate and reduces the outcome to what predicates need.
+
+    Returns:
+        tuple: (crash signature or None, raw output bytes).
+    """
+    outcome = fuzzer.execute(fuzzer._WORKER["binary"], data, fuzzer._WORKER["timeout"],
+                             fuzzer._WORKER["db_template"], keep_output=True)
+    return outcome["signature"], outcome["output"]
+
+def make_predicate(signature=None, expect=None, absent=None):
+    """
+    Builds the "still fails" test applied to (signature, output) outcomes.
+    """
+    texts = {name: text for name, text in (("expect", expect), ("absent", absent)) if text}
+    signatures = SignatureSet(texts) if texts else None
+
+    def fails(outcome):
+        sig, output = outcome
+        if signatures is None:
+            return sig is not None and sig == signature
+        result = signatures.scan(output)
+        if expect and not result.found("expect"):
+            return False
+        if absent and result.found("absent"):
+            return False
+        return True
+    return fails
+
+class Minimizer:
+    """
+    ddmin over input lines with memoized, parallel candidate evaluation.
+
+    Candidates are lists of anything `encode` can turn into bytes; by default stdin lines run
+    through `check_input()`, but any picklable `check(encoded)` works, e.g. the operation
+    sequences of utils.model_check.
+
+    Attributes:
+        executed (int): Candidates actually run on the binary.
+        cache_hits (int): Candidates answered from the memo.
+    """
+
+    def __init__(self, pool, fails, check=check_input, encode=fuzzer.encode_input):
+        self.pool = pool
+        self.fails = fails
+        self.check = check
+        self.encode = encode
+        self.memo = {}
+        self.executed = 0
+        self.cache_hits = 0
+
+    def evaluate(self, candidates):
+        """
+        Tests candidates (lists of lines) in parallel, reusing memoized outcomes.
+
+        Returns:
+            list: One bool per candidate, True when it still fails.
+        """
+        encoded = [self.encode(c) for c in candidates]
+        keys = [hashlib.sha256(data).digest() for data in encoded]
+        todo = {}
+        for key, data in zip(keys, encoded):
+            if key in self.memo or key in todo:
+                self.cache_hits += 1
+            else:
+                todo[key] = data
+        if todo:
+            for key, outcome in zip(todo, self.pool.map(self.check, todo.values())):
+                self.memo[key] = self.fails(outcome)
+            self.executed += len(todo)
+        return [self.memo[key] for key in keys]
+
+    def ddmin(self, lines):
+        """
+        Reduces `lines` (or any candidate list) to a 1-minimal failing subsequence.
+
+        Raises:
+            ValueError: If the original input does not fail.
+        """
+        if not self.evaluate([lines])[0]:
+            raise ValueError("The original input does not reproduce the failure.")
+        n = 2
+        while len(lines) >= 2:
+            size = len(lines)
+            bounds = [(i * size // n, (i + 1) * size // n) for i in range(n)]
+            subsets = [lines[a:b] for a, b in bounds]
+            complements = [lines[:a] + lines[b:] for a, b in bounds] if n > 2 else []
+            results = self.evaluate(subsets + complements)
+
+            reduced = next((c for c, failed in zip(subsets, results) if failed), None)
+            if reduced is not None:
+                lines, n = reduced, 2
+                continue
+            reduced = next((c for c, failed in zip(complements, results[len(subsets):]) if failed), None)
+            if reduced is not None:
+                lines, n = reduced, max(n - 1, 2)
+                continue
+            if n >= size:
+                break
+            n = min(2 * n, size)
+        return lines
+
+def minimize(lines, signature=None, expect=None, absent=None, jobs=4, timeout=10.0, db_template=None):
+    """
+    Minimizes a failing input script.
+
+    Args:
+        lines (list): Input lines (bytes).
+        signature (str): Crash signature to preserve (default: the original run's signature).
+        expect (str): Failure means the output contains this text.
+        absent (str): Failure means the output lacks this text.
+        jobs (int): Parallel worker processes.
+        timeout (float): Per-run hang timeout in seconds.
+        db_template (str): Starting database of every run (None: empty database).
+
+    Returns:
+        dict: Minimized lines, signature, and executed / cache-hit / elapsed figures.
+    """
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=fuzzer.init_worker, initargs=(db_template, timeout)) as pool:
+        if signature is None and expect is None and absent is None:
+            signature = next(pool.map(check_input, [fuzzer.encode_input(lines)]))[0]
+            if signature is None:
+                raise ValueError("The input runs cleanly; pass --expect or --absent to define the failure.")
+        minimizer = Minimizer(pool, make_predicate(signature, expect, absent))
+        reduced = minimizer.ddmin(list(lines))
+    return {
+        "lines": reduced,
+        "original_lines": len(lines),
+        "signature": signature,
+        "executed": minimizer.executed,
+        "cache_hits": minimizer.cache_hits,
+        "elapsed_s": round(time.perf_counter() - started, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Shrink a failing gestion_stock input script with delta debugging.")
+    parser.add_argument("input", nargs="?", help="Input script (one line per input line), e.g. a fuzz crash")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="Minimize a shared scenario instead of a file")
+    parser.add_argument("--signature", help="Crash signature to preserve (default: the original's)")
+    parser.add_argument("--expect", help="Failure = output contains this text")
+    parser.add_argument("--absent", help="Failure = output does not contain this text")
+    parser.add_argument("--db", default=None, help="Starting database for every run (default: empty)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-run hang timeout in seconds")
+    parser.add_argument("--output", help="Where to write the reproducer (default: <input>.min.txt)")
+    args = parser.parse_args()
+
+    if args.scenario:
+        lines = [line.encode("utf-8") for line in to_input_lines(get_scenario(args.scenario))]
+        output = args.output or os.path.join(fuzzer.FUZZ_DIR, f"{args.scenario}.min.txt")
+    elif args.input:
+        with open(args.input, "rb") as f:
+            lines = f.read().split(b"\n")
+        output = args.output or os.path.splitext(args.input)[0] + ".min.txt"
+    else:
+        parser.error("give an input file or --scenario")
+
+    try:
+        result = minimize(lines, args.signature, args.expect, args.absent, args.jobs, args.timeout, args.db)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "wb") as f:
+        f.write(fuzzer.encode_input(result["lines"]))
+    print(f"✅ {result['original_lines']} → {len(result['lines'])} lines in {result['elapsed_s']}s "
+          f"({result['executed']} runs, {result['cache_hits']} cache hits)")
+    if result["signature"]:
+        print(f"   Signature: {result['signature']}")
+    for line in result["lines"]:
+        print(f"   {line!r}")
+    print(f"↪ Reproducer: {output}")
+
+if __name__ == "__main__":
+    main()
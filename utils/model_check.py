@@ -0,0 +1,417 @@
+"""
+@file utils/model_check.py
+@brief Differential model-based testing of the binary against an in-memory reference inventory.
+
+@details
+The test scripts look for keywords in the output; they do not check that the inventory is
+right. This engine generates random sequences of add, modify and delete operations and applies
+every step both to a binary session and to `InventoryModel`, a dict-backed reference of what the
+catalog must contain. After each step it compares:
+- the outcome the binary reports (added, duplicate, modified, deleted, cancelled, missing),
+  classified with the "model" signatures of meta/meta_SIGNATURE_REGISTRY.py;
+- the whole listing, parsed by utils.listing_parser, with the model's catalog (`--check-every N`
+  compares every N steps instead).
+
+The model encodes the binary's documented behaviour: IDs come from AUTOINCREMENT and are never
+reused, add refuses a name that is already in the catalog (case-sensitive) while modify does
+not check names, names keep their first 99 bytes, quantities are ints and prices C floats shown
+with two decimals.
+
+Each trial runs on a warm session from utils.session_pool (fresh sandbox with `--fixture`),
+and `--jobs` trials run side by side. The binary redraws its menu through a shell `clear` after
+every step, which caps one session at a few hundred operations per second; throughput scales
+with `--jobs`. The first divergence of a trial ends it and is shrunk with the ddmin
+`Minimizer` (utils/minimizer.py) to a minimal sequence of operations that still diverges the
+same way. It is saved with the expected and actual values to `build/model_check/`, together
+with the equivalent stdin lines for utils.minimizer and utils.fuzzer.
+
+Usage:
+    python3 -m utils.model_check --trials 50 --steps 100 --jobs 4
+    python3 -m utils.model_check --duration 60 --fixture catalog_small --check-every 5
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .db_verify import c_float
+from .listing_parser import Product, iter_products
+from .minimizer import Minimizer
+from .scenarios import STEP_METHODS, to_input_lines
+from .session import SessionError
+from .session_pool import SessionPool
+from .signatures import registry_signatures
+from .test_runner import get_repo_root
+
+MODEL_DIR = os.path.join(get_repo_root(), "build", "model_check")
+# The binary reads names into a 100-byte buffer
+NAME_BYTES = 99
+MAX_QUANTITY = 2 ** 31 - 1
+DEFAULT_MIX = {"add": 40, "modify": 30, "delete": 25, "cancel": 5}
+
+# Small vocabulary so that duplicate names come up often
+BASE_NAMES = ["Clavier", "Souris", "Écran", "Câble USB", "Disque SSD", "Hub", "Casque", "a|b", "Prod 1", ""]
+QUANTITIES = [0, 1, 25, 999, 65535, MAX_QUANTITY]
+PRICES = ["0", "0.01", "1.00", "2.675", "49.99", "1000000", "123456.78"]
+
+# Outcome of a step, by the signature the binary printed (first match wins)
+OUTCOME_SIGNATURES = [
+    ("db_locked", "locked"),
+    ("error", "error"),
+    ("duplicate_name", "duplicate"),
+    ("delete_cancelled", "cancelled"),
+    ("product_added", "added"),
+    ("product_modified", "modified"),
+    ("product_deleted", "deleted"),
+    ("product_missing", "missing"),
+]
+
+def stored_name(nom):
+    """Returns a name as the binary stores it: its first NAME_BYTES bytes."""
+    return nom.encode("utf-8")[:NAME_BYTES].decode("utf-8", errors="replace")
+
+def stored_price(value):
+    """Returns a price as the listing shows it: rounded to a C float, printed with two decimals."""
+    return float(f"{c_float(value):.2f}")
+
+class InventoryModel:
+    """
+    Reference catalog: what the binary's database must contain after each step.
+
+    Attributes:
+        products (dict): ID → Product, as the listing must show it.
+        next_id (int): ID the next successful add gets.
+    """
+
+    def __init__(self, products=(), next_id=None):
+        self.products = {p.id: p for p in products}
+        self.next_id = next_id or max(self.products, default=0) + 1
+
+    @classmethod
+    def from_database(cls, db_path):
+        """
+        Builds the model of an existing database (opened read-only).
+        """
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute("SELECT id, nom, quantite, prix FROM produits").fetchall()
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'produits'").fetchone()
+        except sqlite3.OperationalError:  # no schema yet: the binary creates it
+            rows, seq = [], None
+        finally:
+            conn.close()
+        products = [Product(pid, nom, quantite, stored_price(prix)) for pid, nom, quantite, prix in rows]
+        model = cls(products)
+        if seq:
+            model.next_id = max(model.next_id, seq[0] + 1)
+        return model
+
+    def apply(self, op, args):
+        """
+        Applies one step and returns the outcome the binary must report.
+        """
+        if op == "add":
+            nom, quantite, prix = args
+            nom = stored_name(nom)
+            if any(p.nom == nom for p in self.products.values()):
+                return "duplicate"
+            self.products[self.next_id] = Product(self.next_id, nom, int(quantite), stored_price(prix))
+            self.next_id += 1
+            return "added"
+        prod_id = int(args[0])
+        if prod_id not in self.products:
+            return "missing"
+        if op == "modify":
+            _, nom, quantite, prix = args
+            self.products[prod_id] = Product(prod_id, stored_name(nom), int(quantite), stored_price(prix))
+            return "modified"
+        if op == "delete":
+            if args[1] != "o":
+                return "cancelled"
+            del self.products[prod_id]
+            return "deleted"
+        raise ValueError(f"Unknown operation: {op!r}")
+
+    def listing(self):
+        """Returns the products the listing must show, by ID."""
+        return [self.products[pid] for pid in sorted(self.products)]
+
+def classify(output):
+    """
+    Reduces a step's output to the outcome names used by `InventoryModel.apply()` ("error" if none matched).
+    """
+    result = registry_signatures("model").scan(output)
+    return next((outcome for name, outcome in OUTCOME_SIGNATURES if result.found(name)), "error")
+
+def compare_listing(expected, listed):
+    """
+    Returns the first difference between two listings (lists of Product), or None.
+    """
+    listed = sorted(listed, key=lambda p: p.id)
+    for want, got in zip(expected, listed):
+        if want != got:
+            return {"expected": list(want), "actual": list(got)}
+    if len(expected) != len(listed):
+        extra = expected[len(listed):] or listed[len(expected):]
+        return {"expected": len(expected), "actual": len(listed), "first_extra": list(extra[0])}
+    return None
+
+def random_step(rng, model, mix=DEFAULT_MIX):
+    """
+    Draws one step (scenario format, see utils/scenarios.py) valid for the binary's input prompts.
+    """
+    op = rng.choices(list(mix), list(mix.values()))[0]
+    name = rng.choice(BASE_NAMES)
+    if rng.random() < 0.3:
+        name = f"{name}{rng.randrange(100)}"
+    elif rng.random() < 0.03:
+        name = (name or "N") * (NAME_BYTES // max(len(name), 1) + 2)  # past the name buffer
+    quantite = str(rng.choice(QUANTITIES) if rng.random() < 0.3 else rng.randrange(1000))
+    prix = rng.choice(PRICES) if rng.random() < 0.3 else f"{rng.randrange(100000) / 100:.2f}"
+    if op == "add":
+        return ("add", (name, quantite, prix))
+    # Mostly existing products, sometimes one that was deleted or never existed
+    ids = list(model.products)
+    prod_id = rng.choice(ids) if ids and rng.random() < 0.85 else rng.randrange(1, model.next_id + 3)
+    if op == "modify":
+        return ("modify", (str(prod_id), name, quantite, prix))
+    return ("delete", (str(prod_id), "n" if op == "cancel" else "o"))
+
+def run_steps(session, model, steps, check_every=1, stats=None):
+    """
+    Applies steps to the binary and the model, comparing outcomes and listings.
+
+    Args:
+        session (GestionStockSession): Started session on the model's database.
+        model (InventoryModel): Reference state, updated in place.
+        steps (iterable): Steps; a generator may draw each one from the current model.
+        check_every (int): Compare listings every N steps (and after the last one).
+        stats (dict): Counters to update ("steps", "binary_ops").
+
+    Returns:
+        dict: The first divergence (step index, kind, expected, actual, steps run), or None.
+    """
+    stats = stats if stats is not None else {"steps": 0, "binary_ops": 0}
+    done = []
+    try:
+        for i, (op, args) in enumerate(steps):
+            done.append((op, list(args)))
+            expected = model.apply(op, args)
+            actual = classify(getattr(session, STEP_METHODS[op])(*args))
+            stats["steps"] += 1
+            stats["binary_ops"] += 1
+            if actual != expected:
+                return {"step": i, "kind": f"outcome:{op}", "expected": expected, "actual": actual, "steps": done}
+            if (i + 1) % check_every == 0:
+                listed = list(iter_products(session.stream(["2"])))
+                stats["binary_ops"] += 1
+                difference = compare_listing(model.listing(), listed)
+                if difference:
+                    return dict(difference, step=i, kind="listing", steps=done)
+        if done and len(done) % check_every:
+            difference = compare_listing(model.listing(), list(iter_products(session.stream(["2"]))))
+            stats["binary_ops"] += 1
+            if difference:
+                return dict(difference, step=len(done) - 1, kind="listing", steps=done)
+    except subprocess.TimeoutExpired as e:
+        # StdinBlocked (utils/stdin_watchdog.py) names the prompt the binary stopped on
+        return {"step": len(done) - 1, "kind": "hang", "expected": None, "actual": getattr(e, "prompt", None),
+                "steps": done}
+    except SessionError as e:
+        return {"step": len(done) - 1, "kind": "exit", "expected": None, "actual": str(e), "steps": done}
+    return None
+
+class ModelChecker:
+    """
+    Runs trials and replays candidates on warm sessions of one fixture.
+
+    Attributes:
+        stats (dict): steps and binary_ops run so far (trials and replays).
+    """
+
+    def __init__(self, pool, check_every=1):
+        self.pool = pool
+        self.check_every = check_every
+        self.stats = {"steps": 0, "binary_ops": 0}
+        self._lock = threading.Lock()
+
+    def _run(self, steps):
+        local = {"steps": 0, "binary_ops": 0}
+        with self.pool.checkout() as session:
+            model = InventoryModel.from_database(os.path.join(session.sandbox, self.pool.db_filename))
+            divergence = run_steps(session, model, steps(model) if callable(steps) else steps,
+                                   self.check_every, local)
+            session.close()
+        with self._lock:
+            for key, value in local.items():
+                self.stats[key] += value
+        return divergence
+
+    def trial(self, seed, length, mix=DEFAULT_MIX):
+        """
+        Runs one random trial of `length` steps.
+
+        Returns:
+            dict: The divergence found (with "seed"), or None.
+        """
+        rng = random.Random(seed)
+        divergence = self._run(lambda model: (random_step(rng, model, mix) for _ in range(length)))
+        if divergence:
+            divergence["seed"] = seed
+        return divergence
+
+    def replay(self, data):
+        """
+        `Minimizer` check: replays JSON-encoded steps, returns the divergence kind or None.
+        """
+        divergence = self._run([tuple(step) for step in json.loads(data)])
+        return divergence["kind"] if divergence else None
+
+    def shrink(self, divergence, jobs):
+        """
+        Shrinks a divergence's steps to a 1-minimal sequence that diverges the same way.
+
+        Returns:
+            dict: The divergence of the shrunk sequence (with "original_steps"), or the original
+            one if it does not reproduce on a fresh session.
+        """
+        kind = divergence["kind"]
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            minimizer = Minimizer(executor, lambda outcome: outcome == kind, check=self.replay,
+                                  encode=lambda steps: json.dumps(steps, ensure_ascii=False).encode("utf-8"))
+            try:
+                steps = minimizer.ddmin(divergence["steps"])
+            except ValueError:
+                return dict(divergence, reproducible=False)
+        shrunk = self._run([tuple(step) for step in steps])
+        if shrunk is None:  # flaky: the minimal sequence diverged during shrinking only
+            return dict(divergence, reproducible=False)
+        return dict(shrunk, seed=divergence.get("seed"), original_steps=len(divergence["steps"]),
+                    replays=minimizer.executed, reproducible=True)
+
+def save_divergence(divergence, directory=MODEL_DIR):
+    """
+    Writes a divergence and its stdin reproducer to `directory`.
+
+    Returns:
+        str: Path of the JSON file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    path = os.path.join(directory, f"divergence_{divergence['kind'].replace(':', '_')}_{timestamp}.json")
+    record = dict(divergence, input=to_input_lines(divergence["steps"]))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, ensure_ascii=False)
+    with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(record["input"]))
+    return path
+
+def model_check(trials=20, steps=100, duration=None, jobs=2, seed=0, fixture="empty", check_every=1,
+                shrink=True, timeout=10, mix=DEFAULT_MIX, max_divergences=1):
+    """
+    Runs random trials against the model until the budget is spent or divergences are found.
+
+    Args:
+        trials (int): Number of trials (ignored with `duration`).
+        steps (int): Steps per trial.
+        duration (float): Run trials for this many seconds instead.
+        jobs (int): Trials run side by side (one warm session each).
+        seed (int): Seed of trial 0; trial k uses seed + k.
+        fixture (str): Snapshot every trial starts from.
+        check_every (int): Listing comparison interval in steps.
+        shrink (bool): Shrink divergences with ddmin.
+        timeout (float): Per-step timeout in seconds.
+        mix (dict): Operation weights ("cancel" is a delete answered "n").
+        max_divergences (int): Stop after this many divergent trials.
+
+    Returns:
+        dict: trials, steps, binary_ops, steps_per_sec, elapsed_s and the divergences found.
+    """
+    started = time.perf_counter()
+    deadline = time.time() + duration if duration else None
+    divergences = []
+    pool = SessionPool(size=jobs, fixture=fixture, timeout=timeout).start()
+    checker = ModelChecker(pool, check_every)
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            next_trial = 0
+            running = set()
+            while True:
+                while len(running) < jobs and len(divergences) < max_divergences and (
+                        time.time() < deadline if deadline else next_trial < trials):
+                    running.add(executor.submit(checker.trial, seed + next_trial, steps, mix))
+                    next_trial += 1
+                if not running:
+                    break
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += 1
+                    if future.result():
+                        divergences.append(future.result())
+        elapsed = time.perf_counter() - started
+        trial_stats = dict(checker.stats)
+        if shrink:
+            divergences = [checker.shrink(d, jobs) for d in divergences]
+    finally:
+        pool.close()
+    return {
+        "trials": done,
+        "steps": trial_stats["steps"],
+        "binary_ops": trial_stats["binary_ops"],
+        "elapsed_s": round(elapsed, 2),
+        "steps_per_sec": round(trial_stats["steps"] / elapsed, 1) if elapsed else None,
+        "binary_ops_per_sec": round(trial_stats["binary_ops"] / elapsed, 1) if elapsed else None,
+        "divergences": divergences
+    }
+
+def parse_mix(text):
+    """Parses "add=40,modify=30,delete=25,cancel=5" into a weight dict."""
+    mix = {}
+    for part in text.split(","):
+        op, weight = part.split("=")
+        if op not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation in mix: {op!r} (expected one of {', '.join(DEFAULT_MIX)})")
+        mix[op] = float(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the binary with an in-memory reference inventory.")
+    parser.add_argument("--trials", type=int, default=20, help="Random trials to run")
+    parser.add_argument("--steps", type=int, default=100, help="Operations per trial")
+    parser.add_argument("--duration", type=float, default=None, help="Run trials for this many seconds instead")
+    parser.add_argument("--jobs", type=int, default=2, help="Trials run side by side")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first trial")
+    parser.add_argument("--fixture", default="empty", help="Snapshot every trial starts from")
+    parser.add_argument("--check-every", type=int, default=1, help="Compare listings every N steps")
+    parser.add_argument("--mix", default=None, help="Operation weights, e.g. add=40,modify=30,delete=25,cancel=5")
+    parser.add_argument("--max-divergences", type=int, default=1, help="Stop after this many divergent trials")
+    parser.add_argument("--no-shrink", action="store_true", help="Save divergences without shrinking them")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-step timeout in seconds")
+    args = parser.parse_args()
+
+    result = model_check(args.trials, args.steps, args.duration, args.jobs, args.seed, args.fixture,
+                         args.check_every, not args.no_shrink, args.timeout,
+                         parse_mix(args.mix) if args.mix else DEFAULT_MIX, args.max_divergences)
+    print(f"🧮 {result['trials']} trial(s), {result['steps']} steps in {result['elapsed_s']}s "
+          f"({result['steps_per_sec']} steps/s, {result['binary_ops_per_sec']} binary ops/s)")
+    for divergence in result["divergences"]:
+        path = save_divergence(divergence)
+        print(f"❌ Divergence ({divergence['kind']}) at step {divergence['step']} of {len(divergence['steps'])}: "
+              f"expected {divergence['expected']}, got {divergence['actual']}")
+        for op, step_args in divergence["steps"]:
+            print(f"   {op} {step_args}")
+        print(f"↪ Saved: {path}")
+    if not result["divergences"]:
+        print("✅ The binary matched the reference model")
+    raise SystemExit(1 if result["divergences"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+@file utils/proc_sampler.py
+@brief Resource accounting for a running gestion_stock process, read from /proc.
+
+@details
+`ProcessSampler` polls `/proc/<pid>/status` (VmRSS, VmHWM), `/proc/<pid>/stat` (user, system
+and reaped-children CPU time) and `/proc/<pid>/io` (bytes read and written) on a background
+thread while a session drives the binary, and keeps an RSS time series.
+
+`mark(op, payload_bytes)` takes an immediate reading and returns the resources consumed since
+the previous mark. The binary is idle between operations (blocked on stdin), so the delta
+between two marks is the cost of one operation. Its write amplification is the number of bytes
+the operation made the kernel write to storage (`write_bytes`: SQLite database and journal
+pages) divided by the number of input bytes that described it.
+
+`/proc` only exists on Linux; elsewhere `PROC_AVAILABLE` is False and sessions skip sampling.
+"""
+
+import os
+import time
+import threading
+
+PROC_AVAILABLE = os.path.isdir("/proc/self")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Counters of /proc/<pid>/io kept in readings
+IO_FIELDS = ("rchar", "wchar", "read_bytes", "write_bytes")
+# Fields a mark reports as deltas
+DELTA_FIELDS = ("read_bytes", "write_bytes", "rchar", "wchar")
+
+def read_process(pid):
+    """
+    Reads the current resource counters of `pid`.
+
+    Returns:
+        dict: rss_kb, peak_rss_kb, utime_s, stime_s, child_cpu_s and the IO_FIELDS counters
+        (the latter absent if /proc/<pid>/io is not readable), or None once the process is gone.
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            # The command name may contain spaces: fields start after its closing parenthesis
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    if "VmRSS" not in status:  # zombie: exited, not reaped yet
+        return None
+    reading = {
+        "t": time.perf_counter(),
+        "rss_kb": int(status["VmRSS"].split()[0]),
+        "peak_rss_kb": int(status.get("VmHWM", status["VmRSS"]).split()[0]),
+        # stat fields 14–17 (utime, stime, cutime, cstime), counted from field 3 here
+        "utime_s": int(fields[11]) / CLOCK_TICKS,
+        "stime_s": int(fields[12]) / CLOCK_TICKS,
+        "child_cpu_s": (int(fields[13]) + int(fields[14])) / CLOCK_TICKS,
+    }
+    try:
+        with open(f"/proc/{pid}/io", encoding="utf-8") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        reading.update({name: int(counters[name]) for name in IO_FIELDS if name in counters})
+    except OSError:
+        pass
+    return reading
+
+class ProcessSampler:
+    """
+    Background poller of one process's /proc counters.
+
+    Attributes:
+        samples (list): (seconds since start, rss_kb) pairs, at most `max_samples`
+            (older points are thinned out by half when the limit is reached).
+        last (dict): Most recent reading.
+    """
+
+    def __init__(self, pid, interval=0.1, max_samples=10000):
+        self.pid = pid
+        self.interval = interval
+        self.max_samples = max_samples
+        self.samples = []
+        self.last = None
+        self.peak_rss_kb = 0
+        self._origin = time.perf_counter()
+        self._mark = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Takes a first reading and starts polling.
+
+        Returns:
+            ProcessSampler: The sampler (for chaining).
+        """
+        self._mark = self.sample()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            if self.sample() is None:
+                break
+
+    def sample(self):
+        """
+        Reads the counters now and records the RSS point.
+
+        Returns:
+            dict: The reading, or None if the process is gone.
+        """
+        reading = read_process(self.pid)
+        if reading is None:
+            return None
+        with self._lock:
+            self.last = reading
+            self.peak_rss_kb = max(self.peak_rss_kb, reading["peak_rss_kb"])
+            self.samples.append((round(reading["t"] - self._origin, 3), reading["rss_kb"]))
+            if len(self.samples) > self.max_samples:
+                self.samples = self.samples[::2]
+        return reading
+
+    def mark(self, op, payload_bytes=0):
+        """
+        Returns the resources used since the previous mark (or since `start()`).
+
+        Args:
+            op (str): Operation name stored in the record.
+            payload_bytes (int): Input bytes sent for the operation.
+
+        Returns:
+            dict: op, cpu_s, DELTA_FIELDS deltas, payload_bytes and write_amplification
+            (write_bytes / payload_bytes, None without payload), or None if the process is gone.
+        """
+        reading = self.sample()
+        if reading is None or self._mark is None:
+            return None
+        previous, self._mark = self._mark, reading
+        record = {
+            "op": op,
+            "cpu_s": round(reading["utime_s"] + reading["stime_s"] + reading["child_cpu_s"]
+                           - previous["utime_s"] - previous["stime_s"] - previous["child_cpu_s"], 3),
+            "payload_bytes": payload_bytes
+        }
+        for name in DELTA_FIELDS:
+            if name in reading and name in previous:
+                record[name] = reading[name] - previous[name]
+        written = record.get("write_bytes")
+        record["write_amplification"] = round(written / payload_bytes, 1) if written is not None and payload_bytes else None
+        return record
+
+    def stop(self):
+        """
+        Stops polling and takes a last reading (call it before the process exits).
+
+        Returns:
+            dict: Totals for the process, see `summary()`.
+        """
+        self.sample()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.summary()
+
+    def summary(self):
+        """
+        Returns:
+            dict: peak_rss_kb, rss_kb, utime_s, stime_s, child_cpu_s, the IO_FIELDS totals
+            and the number of samples taken; empty if the process was never read.
+        """
+        with self._lock:
+            if self.last is None:
+                return {}
+            summary = {name: value for name, value in self.last.items() if name != "t"}
+            summary["peak_rss_kb"] = self.peak_rss_kb
+            summary["samples"] = len(self.samples)
+        return summary
@@ -0,0 +1,156 @@
+"""
+@file utils/result_cache.py
+@brief Incremental cache of passed test results, keyed on content hashes.
+
+@details
+A test's outcome depends on the binary, the test script (and the utils and meta modules it
+imports, e.g. the signature registry that decides pass/fail), its TEST_REGISTRY entry and the database it starts from. `cache_key()` hashes exactly these, plus
+the execution mode, and `ResultCache` maps the key to the stored result. When nothing changed the
+runner reports the stored result (flagged `"cached": true`) instead of running the script.
+
+In serial runs the tests share `build/stockt.db`, so each entry also keeps the database the test
+left behind (stored once per content hash under `db/`); a cache hit restores it, and the next
+test starts from exactly the state it would have seen after a real run.
+
+Only passed results are stored: failures always rerun.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_DIR = os.path.join(REPO_ROOT, "build", "cache", "results")
+ABSENT = "absent"
+
+# "from utils.x import", "from meta.x import", "from .x import" (same package) and "import utils.x"
+_PACKAGE_IMPORT = re.compile(r"^\s*(?:from\s+(utils|meta)?\.(\w+)\s+import|import\s+(utils|meta)\.(\w+))", re.M)
+
+def file_digest(path):
+    """
+    Returns the SHA-256 of a file's content, or "absent" if it does not exist.
+    """
+    if not os.path.exists(path):
+        return ABSENT
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def script_dependencies(script_path):
+    """
+    Returns the utils and meta modules a script imports, directly or through other modules
+    of these packages.
+
+    Returns:
+        list: Sorted module file paths.
+    """
+    seen = set()
+    pending = [script_path]
+    while pending:
+        path = pending.pop()
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        for match in _PACKAGE_IMPORT.finditer(source):
+            package, name = (match.group(1), match.group(2)) if match.group(2) else (match.group(3), match.group(4))
+            # A relative import resolves next to the importing module
+            package_dir = os.path.join(REPO_ROOT, package) if package else os.path.dirname(path)
+            module = os.path.join(package_dir, name + ".py")
+            if os.path.exists(module) and module not in seen:
+                seen.add(module)
+                pending.append(module)
+    return sorted(seen)
+
+def cache_key(binary_path, script_path, registry_entry, db_path, mode, db_digest=None):
+    """
+    Hashes everything a test's outcome depends on.
+
+    Args:
+        binary_path (str): Binary the test drives.
+        script_path (str): Test script.
+        registry_entry (dict): The script's TEST_REGISTRY entry.
+        db_path (str): Database the test starts from (may not exist yet).
+        mode (str): Execution mode, e.g. "serial", "isolated", "serial/in-process".
+        db_digest (str): Known SHA-256 of the starting database (e.g. a fixture snapshot's),
+            used instead of hashing `db_path`.
+
+    Returns:
+        str: Hex digest identifying the combination.
+    """
+    parts = {
+        "binary": file_digest(binary_path),
+        "script": file_digest(script_path),
+        "dependencies": {os.path.relpath(p, REPO_ROOT): file_digest(p) for p in script_dependencies(script_path)},
+        "registry": registry_entry,
+        "db": db_digest or file_digest(db_path),
+        "mode": mode,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Directory of cached results: `entries/<key>.json` and `db/<sha256>.db`.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.entries_dir = os.path.join(root, "entries")
+        self.db_dir = os.path.join(root, "db")
+
+    def lookup(self, key, db_path=None):
+        """
+        Returns the cached result for `key` (marked as cached), or None.
+
+        When `db_path` is given, the entry must carry the database the test left behind;
+        it is restored to `db_path` on a hit.
+        """
+        path = os.path.join(self.entries_dir, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        if db_path is not None:
+            after = entry.get("db_after")
+            if after is None or (after != ABSENT and not os.path.exists(os.path.join(self.db_dir, f"{after}.db"))):
+                return None
+            if after == ABSENT:
+                if os.path.exists(db_path):
+                    os.remove(db_path)
+            elif file_digest(db_path) != after:
+                shutil.copyfile(os.path.join(self.db_dir, f"{after}.db"), db_path)
+        return dict(entry["result"], cached=True, cached_at=entry["stored"])
+
+    def store(self, key, result, db_path=None):
+        """
+        Stores a passed result, plus the database state at `db_path` if given.
+
+        Returns:
+            bool: True if the result was cached.
+        """
+        if "passed" not in str(result.get("status", "")).lower():
+            return False
+        entry = {
+            "key": key,
+            "stored": datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S"),
+            "result": result,
+            "db_after": None,
+        }
+        if db_path is not None:
+            after = file_digest(db_path)
+            if after != ABSENT:
+                blob = os.path.join(self.db_dir, f"{after}.db")
+                if not os.path.exists(blob):
+                    os.makedirs(self.db_dir, exist_ok=True)
+                    shutil.copyfile(db_path, blob + ".tmp")
+                    os.replace(blob + ".tmp", blob)
+            entry["db_after"] = after
+        os.makedirs(self.entries_dir, exist_ok=True)
+        path = os.path.join(self.entries_dir, f"{key}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        return True
@@ -0,0 +1,217 @@
+"""
+@file utils/results_db.py
+@brief Append-only, indexed SQLite store of every test run, with a query CLI.
+
+@details
+Each CI run appends one row per script to `reports/results.db`: version, run timestamp,
+status, duration, exit code, output digest and log path. Rows are never rewritten (triggers
+reject UPDATE and DELETE), and indexes on version, script, timestamp and status keep history
+questions cheap, e.g. "slowest runs of delete_prod_test in the last 30 days".
+
+The database only grows, so it is not committed: the workflows carry it from run to run in
+the Actions cache and upload it as the `results-db` artifact.
+
+Usage:
+    python3 -m utils.results_db slowest --script delete_prod_test.py --days 30
+    python3 -m utils.results_db history --script list_prod_test.py --limit 20
+    python3 -m utils.results_db failures --days 7
+    python3 -m utils.results_db import-reports        # backfill from reports/*.json
+"""
+
+import os
+import glob
+import json
+import sqlite3
+import argparse
+import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DB = os.path.join(REPO_ROOT, "reports", "results.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY,
+    version       TEXT NOT NULL,
+    ts            TEXT NOT NULL,          -- run timestamp, 'YYYY-MM-DD HH:MM:SS' (UTC)
+    script        TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    passed        INTEGER NOT NULL,
+    duration      REAL,
+    exit_code     INTEGER,
+    output_digest TEXT,
+    log           TEXT,
+    details       TEXT                    -- remaining result fields as JSON
+);
+CREATE INDEX IF NOT EXISTS idx_runs_version ON runs(version);
+CREATE INDEX IF NOT EXISTS idx_runs_script_ts ON runs(script, ts);
+CREATE INDEX IF NOT EXISTS idx_runs_ts ON runs(ts);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status, ts);
+CREATE TRIGGER IF NOT EXISTS runs_no_update BEFORE UPDATE ON runs
+BEGIN SELECT RAISE(ABORT, 'results store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS runs_no_delete BEFORE DELETE ON runs
+BEGIN SELECT RAISE(ABORT, 'results store is append-only'); END;
+"""
+
+CORE_FIELDS = ("script", "status", "duration", "exit_code", "output_digest", "log")
+
+def connect(db_path=RESULTS_DB):
+    """
+    Opens (and initializes if needed) the results database.
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def to_db_timestamp(timestamp):
+    """
+    Converts the reports' '%Y-%m-%d_%H-%M-%S' timestamps to 'YYYY-MM-DD HH:MM:SS'.
+    Timestamps already in that form (older reports) are returned unchanged.
+    """
+    for fmt in ("%Y-%m-%d_%H-%M-%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.datetime.strptime(timestamp, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    return timestamp
+
+def is_passed(status):
+    """Accepts both the runner's '✅ Passed' and the weekly 'PASSED' spellings."""
+    return "passed" in str(status).lower()
+
+def record_results(results, version, timestamp, db_path=RESULTS_DB):
+    """
+    Appends one row per result of a run.
+
+    Args:
+        results (list): Result dicts as produced by `run_all_tests()`.
+        version (str): Version the run was made against.
+        timestamp (str): Run timestamp ('%Y-%m-%d_%H-%M-%S').
+
+    Returns:
+        int: Number of rows written.
+    """
+    ts = to_db_timestamp(timestamp)
+    rows = []
+    for r in results:
+        duration = r.get("duration")
+        rows.append((
+            version, ts, r["script"], r["status"], int(is_passed(r["status"])),
+            duration if isinstance(duration, (int, float)) else None,
+            r.get("exit_code"), r.get("output_digest"), r.get("log"),
+            json.dumps({k: v for k, v in r.items() if k not in CORE_FIELDS}, ensure_ascii=False)
+        ))
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO runs (version, ts, script, status, passed, duration, exit_code, output_digest, log, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+def import_reports(report_dir=os.path.dirname(RESULTS_DB), db_path=RESULTS_DB):
+    """
+    Backfills the store from the per-version JSON reports, skipping runs already recorded.
+
+    Returns:
+        int: Number of rows written.
+    """
+    conn = connect(db_path)
+    try:
+        known = set(conn.execute("SELECT DISTINCT version, ts FROM runs"))
+    finally:
+        conn.close()
+
+    written = 0
+    for path in sorted(glob.glob(os.path.join(report_dir, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(report, dict) or "results" not in report:
+            continue
+        if (report["version"], to_db_timestamp(report["timestamp"])) in known:
+            continue
+        written += record_results(report["results"], report["version"], report["timestamp"], db_path)
+    return written
+
+def query_slowest(script=None, days=30, limit=10, db_path=RESULTS_DB):
+    """Returns the slowest runs in the last `days` days, optionally for one script."""
+    since = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    sql = "SELECT ts, version, script, status, duration FROM runs WHERE ts >= ? AND duration IS NOT NULL"
+    params = [since]
+    if script:
+        sql += " AND script = ?"
+        params.append(script)
+    sql += " ORDER BY duration DESC LIMIT ?"
+    params.append(limit)
+    conn = connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+def query_history(script, limit=20, db_path=RESULTS_DB):
+    """Returns the most recent runs of one script, newest first."""
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT ts, version, script, status, duration FROM runs WHERE script = ? ORDER BY ts DESC LIMIT ?",
+            (script, limit)).fetchall()
+    finally:
+        conn.close()
+
+def query_failures(days=7, limit=50, db_path=RESULTS_DB):
+    """Returns failed runs in the last `days` days, newest first."""
+    since = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT ts, version, script, status, duration FROM runs WHERE passed = 0 AND ts >= ? ORDER BY ts DESC LIMIT ?",
+            (since, limit)).fetchall()
+    finally:
+        conn.close()
+
+def print_rows(rows):
+    """Prints query rows as an aligned table."""
+    if not rows:
+        print("(no matching runs)")
+        return
+    print(f"{'Timestamp':<20} {'Version':<12} {'Script':<26} {'Status':<12} Duration")
+    for ts, version, script, status, duration in rows:
+        print(f"{ts:<20} {version:<12} {script:<26} {status:<12} {duration if duration is not None else 'N/A'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the gestion_stock test results store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    slowest = sub.add_parser("slowest", help="Slowest runs over a time window")
+    slowest.add_argument("--script", help="Restrict to one test script (e.g. delete_prod_test.py)")
+    slowest.add_argument("--days", type=int, default=30)
+    slowest.add_argument("--limit", type=int, default=10)
+
+    history = sub.add_parser("history", help="Latest runs of one script")
+    history.add_argument("--script", required=True)
+    history.add_argument("--limit", type=int, default=20)
+
+    failures = sub.add_parser("failures", help="Failed runs over a time window")
+    failures.add_argument("--days", type=int, default=7)
+    failures.add_argument("--limit", type=int, default=50)
+
+    sub.add_parser("import-reports", help="Backfill from reports/*.json")
+    args = parser.parse_args()
+
+    if args.command == "slowest":
+        print_rows(query_slowest(args.script, args.days, args.limit))
+    elif args.command == "history":
+        print_rows(query_history(args.script, args.limit))
+    elif args.command == "failures":
+        print_rows(query_failures(args.days, args.limit))
+    else:
+        print(f"Imported {import_reports()} result rows into {RESULTS_DB}")
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,31 @@
 This script is executed by the CI orchestrator to validate weekly application health.
 It invokes the full journey tests using CLI arguments, captures output, logs results,
 and generates structured reports in both TXT and JSON formats for traceability.
+The text log is stored in the content-addressed archive `weekly_test/archive/`.
+The build database is first reset to the journey's registered fixture (utils/snapshots.py).
+With `--in-process` the journey's entry point is called inside this interpreter
+instead of starting a second Python process. `--soak SECONDS` runs the long-lived soak test
+(utils/soak.py) instead of the journey, writing its time series into `weekly_test/`.
 """
 
 import os
 import sys
 import json
+import argparse
 import datetime
 import subprocess
 
+from .log_archive import LogArchive
+from .test_runner import run_entry_point, get_binary_name
+from .snapshots import SnapshotManager
+from meta.meta_TEST_REGISTRY import TEST_REGISTRY
+
+parser = argparse.ArgumentParser(description="Run the weekly full journey test.")
+parser.add_argument("--in-process", action="store_true", help="Call run_full_journey() in this interpreter")
+parser.add_argument("--soak", type=float, default=None, metavar="SECONDS",
+                    help="Run the soak test for this long instead of the journey")
+args = parser.parse_args()
+
 # 📍 Resolve repo root (parent of utils/)
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -20,22 +37,42 @@ REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 WEEKLY_DIR = os.path.join(REPO_ROOT, "weekly_test")
 os.makedirs(WEEKLY_DIR, exist_ok=True)
 
+# 🔥 Soak mode: one long-lived session instead of a single journey
+if args.soak:
+    from .soak import run_and_report
+    sys.exit(run_and_report(args.soak, out_dir=WEEKLY_DIR))
+
 # 📁 Get test folder path
 test_dir = os.path.join(REPO_ROOT, "Tests")
 
 # 🕒 Timestamp for report files
 timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
-log_path = os.path.join(WEEKLY_DIR, f"report_{timestamp}.log")
+archive = LogArchive(os.path.join(WEEKLY_DIR, "archive"))
 json_path = os.path.join(WEEKLY_DIR, f"result_{timestamp}.json")
 
+# 🧊 Start the journey from its registered fixture (empty catalog: the product gets ID 1)
+fixture = TEST_REGISTRY["full_journey_test.py"].get("fixture")
+if fixture:
+    snapshots = SnapshotManager()
+    snapshots.ensure(fixture)
+    snapshots.restore(fixture, os.path.join(REPO_ROOT, "build", "stockt.db"))
+
 # 🧪 Run the weekly test command (customize if needed)
+command = ["python", os.path.join(test_dir, "full_journey_test.py")]
 try:
-    result = subprocess.run(
-        ["python", os.path.join(test_dir, "full_journey_test.py")],
-        capture_output=True,
-        text=True,
-        check=True
-    )
+    if args.in_process:
+        binary = os.path.join(REPO_ROOT, "build", get_binary_name())
+        env = dict(os.environ, GESTION_STOCK_BINARY=binary)
+        returncode, stdout, stderr = run_entry_point(command[1], "run_full_journey", os.getcwd(), env)
+        result = subprocess.CompletedProcess(command, returncode, stdout, stderr)
+        result.check_returncode()
+    else:
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            check=True
+        )
     status = "success"
 
     # 📢 Echo live output to console
@@ -54,11 +91,8 @@ except subprocess.CalledProcessError as e:
     print("\n STDERR:")
     print(e.stderr)
 
-# 📄 Save log output
-with open(log_path, "w", encoding="utf-8") as log_file:
-    log_file.write(result.stdout)
-    log_file.write("\n--- STDERR ---\n")
-    log_file.write(result.stderr)
+# 📄 Save log output (deduplicated, compressed; read back with `python3 -m utils.log_archive`)
+log_name = archive.write_log(f"report_{timestamp}", result.stdout + "\n--- STDERR ---\n" + result.stderr)
 
 # 📊 Save result metadata as JSON
 metadata = {
@@ -66,6 +100,8 @@ metadata = {
     "timestamp": timestamp,
     "command": result.args,
     "returncode": result.returncode,
+    "log": log_name,
+    "log_archive": os.path.relpath(archive.root, REPO_ROOT),
     "stdout_summary": result.stdout[:300],  # Optional: truncate for overview
     "stderr_summary": result.stderr[:300]
 }
@@ -0,0 +1,103 @@
+"""
+@file utils/scenarios.py
+@brief Input scenarios of the test scripts, as data shared by the session drivers.
+
+@details
+Each scenario is a list of steps `(operation, arguments)` holding what a test script in
+`Tests/` sends to the binary; the scripts read their inputs from here, so the session drivers
+replay exactly what the tests do: "add", "list", "modify" and "delete" map onto the menu operations
+of utils.session, and "send" writes raw input lines (used by the regression scenario for its
+blank line). The same scenario can be run by the blocking `GestionStockSession` or by the
+asyncio driver in utils.async_session.
+
+IDs assume a fresh database, where the first product added gets ID 1.
+"""
+
+# Product values used by add_prod_test.py and full_journey_test.py
+CLAVIER = ("Clavier", "25", "49.99")
+# New name, extreme quantity and extreme price written by modify_prod_test.py
+SUPER_MODIF = ("SuperModif", "99999", "999999.99")
+# Values full_journey_test.py modifies its product to
+CLAVIER_RGB = ("Clavier RGB", "50", "59.99")
+
+SCENARIOS = {
+    # add_prod_test.py
+    "add": [("add", CLAVIER)],
+    # list_prod_test.py
+    "list": [("list", ())],
+    # modify_prod_test.py: IDs 1–5 with extreme values
+    "modify": [("modify", (str(pid), *SUPER_MODIF)) for pid in range(1, 6)],
+    # delete_prod_test.py: IDs 1–4, confirmed
+    "delete": [("delete", (str(pid), "o")) for pid in range(1, 5)],
+    # regression_bug_test.py: listing, then a blank line at the menu
+    "regression": [("send", (["2"],)), ("send", ([""],))],
+    # full_journey_test.py: add, list, modify and delete the same product
+    "journey": [
+        ("add", CLAVIER),
+        ("list", ()),
+        ("modify", ("1", *CLAVIER_RGB)),
+        ("delete", ("1", "o")),
+    ],
+}
+
+# Session method behind each step operation
+STEP_METHODS = {
+    "add": "add_product",
+    "list": "list_products",
+    "modify": "modify_product",
+    "delete": "delete_product",
+}
+
+def get_scenario(name):
+    """
+    Returns the steps of a named scenario.
+
+    Raises:
+        ValueError: If the scenario is unknown.
+    """
+    if name not in SCENARIOS:
+        raise ValueError(f"Unknown scenario: {name!r} (expected one of {', '.join(SCENARIOS)})")
+    return SCENARIOS[name]
+
+def to_input_lines(steps):
+    """
+    Flattens scenario steps into the raw stdin lines a one-shot run would send.
+
+    Returns:
+        list: Input lines (str), without the final "0" that quits the menu.
+    """
+    lines = []
+    for op, args in steps:
+        if op == "add":
+            lines += ["1", *args]
+        elif op == "list":
+            lines.append("2")
+        elif op == "modify":
+            lines += ["4", *args]
+        elif op == "delete":
+            lines += ["3", *args]
+        else:
+            lines += list(args[0])
+    return lines
+
+def with_product_id(steps, prod_id):
+    """
+    Returns `steps` with the product ID of every modify/delete step replaced by `prod_id`
+    (for runs where the product's ID is only known once it has been listed).
+    """
+    return [(op, (str(prod_id), *args[1:]) if op in ("modify", "delete") else args) for op, args in steps]
+
+def run_scenario(session, steps):
+    """
+    Replays scenario steps on a started `GestionStockSession`.
+
+    Returns:
+        list: Output of each step, in order.
+    """
+    outputs = []
+    for op, args in steps:
+        if op == "send":
+            outputs.append(session.send(*args)[0])
+        else:
+            outputs.append(getattr(session, STEP_METHODS[op])(*args))
+    return outputs
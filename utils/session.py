@@ -0,0 +1,547 @@
+"""
+@file utils/session.py
+@brief Persistent interactive driver for a single gestion_stock process.
+
+@details
+Keeps one `gestion_stock --test-mode` process alive behind a pseudo-terminal (pipes on
+Windows) and drives it one menu operation at a time. A pty is required on POSIX: with plain
+pipes the binary's stdio block-buffers its prompts until exit. Each step writes only the input lines that the binary is ready to
+consume, then reads stdout incrementally until the next known prompt, and returns just that
+step's output. A test can therefore run hundreds of add/list/modify/delete steps against one
+process instead of paying for process spawn and SQLite open on every product ID.
+
+Every operation is timed from the moment its first input line is written to the moment the
+next main-menu prompt appears. When `GESTION_STOCK_METRICS` names a file, the session appends
+these timings there as JSON lines on close, which is how `utils.test_runner` collects
+per-operation latency from test scripts running in a subprocess. On Linux the session also
+samples the process's /proc counters (utils/proc_sampler.py) and appends, as "resources"
+records, the CPU time and I/O of each operation and the process totals (peak RSS, CPU, bytes
+read and written). Scripts that start the binary with a plain `Popen` use `SampledPopen`, which
+records the same process totals from the kernel's accounting when it reaps the binary. A step that leaves the binary waiting on an unexpected prompt fails within
+milliseconds with `StdinBlocked` (utils/stdin_watchdog.py) rather than after its full timeout.
+
+Test scripts get their session from `take_session()`: the warm one a `utils.session_pool`
+checkout left for their binary, or a freshly started one. It lives here rather than in
+utils/session_pool.py so that scripts do not import the pool and `utils.test_runner` with it.
+
+@note
+The binary opens `stockt.db` next to its own executable, so pass a sandboxed binary path
+(see `utils.test_runner.create_sandbox()`) when the session must not touch `build/stockt.db`.
+"""
+
+import os
+import json
+import time
+import queue
+import platform
+import threading
+import subprocess
+
+from .proc_sampler import ProcessSampler, PROC_AVAILABLE
+from .stdin_watchdog import StdinWatchdog, StdinBlocked, watchdog_enabled, pending_prompt
+
+try:
+    import pty
+    import termios
+except ImportError:  # Windows: fall back to plain pipes
+    pty = None
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUILD_DIR = os.path.join(REPO_ROOT, "build")
+
+# Prompts printed by the binary right before it blocks on stdin
+MENU_PROMPT = "0. Quitter\nChoix : ".encode("utf-8")
+# The menu re-prompts this way when it reads a leftover newline (e.g. after the delete confirmation)
+MENU_RETRY_PROMPT = "Veuillez entrer un entier non négatif : ".encode("utf-8")
+MENU_PROMPTS = (MENU_PROMPT, MENU_RETRY_PROMPT)
+
+# Environment variable naming the JSON-lines file that receives operation timings
+METRICS_ENV = "GESTION_STOCK_METRICS"
+QUANTITY_PROMPT = "Quantité : ".encode("utf-8")
+NEW_NAME_PROMPT = "Nouveau nom : ".encode("utf-8")
+CONFIRM_PROMPT = "(o/n) : ".encode("utf-8")
+
+def resolve_binary_path():
+    """
+    Returns the binary to drive: `GESTION_STOCK_BINARY` if set, else the platform build in `build/`.
+    """
+    default_name = "gestion_stock.exe" if platform.system() == "Windows" else "gestion_stock_linux"
+    return os.environ.get("GESTION_STOCK_BINARY", os.path.join(BUILD_DIR, default_name))
+
+def open_pty():
+    """
+    Opens a pseudo-terminal configured for driving the binary.
+
+    Returns:
+        tuple: (master_fd, slave_fd).
+    """
+    master, slave = pty.openpty()
+    attrs = termios.tcgetattr(slave)
+    attrs[1] &= ~termios.OPOST                      # keep "\n" as-is in output
+    attrs[3] &= ~(termios.ECHO | termios.ISIG)      # no input echo, no signal keys
+    termios.tcsetattr(slave, termios.TCSANOW, attrs)
+    return master, slave
+
+def append_metrics(timings, kind="latency"):
+    """
+    Appends timing records to the file named by `GESTION_STOCK_METRICS`, if set.
+    """
+    path = os.environ.get(METRICS_ENV)
+    if path and timings:
+        with open(path, "a", encoding="utf-8") as f:
+            for record in timings:
+                f.write(json.dumps(dict(record, kind=kind)) + "\n")
+
+def rusage_record(usage, peak_rss_kb=None):
+    """
+    Converts the `os.wait4()` resource usage of an exited binary into a "process" resources record.
+
+    Args:
+        usage: The `resource.struct_rusage` returned by `os.wait4()`.
+        peak_rss_kb (int): Peak RSS polled from /proc, left out of the record when None;
+            `ru_maxrss` cannot be used, as it also covers the image of the forking interpreter
+            from before the exec.
+    """
+    record = {
+        "op": "process",
+        "utime_s": round(usage.ru_utime, 3),
+        "stime_s": round(usage.ru_stime, 3),
+        # wait4 folds the binary's own reaped children (e.g. `clear`) into its times
+        "child_cpu_s": 0.0,
+        # Block counts are in 512-byte units, as /proc/<pid>/io accounts storage I/O
+        "read_bytes": usage.ru_inblock * 512,
+        "write_bytes": usage.ru_oublock * 512,
+        "launch": "popen",
+    }
+    if peak_rss_kb is not None:
+        record["peak_rss_kb"] = peak_rss_kb
+    return record
+
+class SampledPopen(subprocess.Popen):
+    """
+    `subprocess.Popen` that reaps the binary with `os.wait4()` and appends its resource usage
+    (peak RSS, CPU, bytes read and written) to the file named by `GESTION_STOCK_METRICS`.
+
+    For the short one-shot runs of scripts that do not use a session: polling /proc cannot see
+    the end of a process that lives a few milliseconds, the kernel's accounting at exit can.
+    `poll()` and `wait()`, and so `communicate()`, `kill()` and the context manager that go
+    through them, reap with `os.wait4()`; the record is written by whichever reaps the binary
+    first. Peak RSS still comes from polling `/proc/<pid>/status` while the binary runs; a run
+    shorter than the poll interval is only read right after its exec, so its record has no
+    peak RSS. Where `os.wait4` does not exist (Windows) it behaves like `Popen`.
+    """
+
+    rusage = None
+
+    if hasattr(os, "wait4"):
+        def __init__(self, *args, **kwargs):
+            self._sampler = None
+            self._reap_lock = threading.Lock()
+            super().__init__(*args, **kwargs)
+            if PROC_AVAILABLE:
+                self._sampler = ProcessSampler(self.pid, interval=0.01).start()
+
+        def _reap(self, flags):
+            """
+            Calls `os.wait4()` once (with `_reap_lock` held) and records the usage if it reaped the binary.
+
+            Returns:
+                int: The exit code, or None if the binary is still running.
+            """
+            if self.returncode is not None:
+                return self.returncode
+            try:
+                pid, status, usage = os.wait4(self.pid, flags)
+            except ChildProcessError:
+                # Reaped outside this object: the usage is gone
+                self.returncode = 0
+                return self.returncode
+            if pid != self.pid:
+                return None
+            self.returncode = os.waitstatus_to_exitcode(status)
+            peak_rss_kb = None
+            if self._sampler is not None:
+                self._sampler.stop()
+                if len(self._sampler.samples) > 1:
+                    peak_rss_kb = self._sampler.peak_rss_kb
+            self.rusage = rusage_record(usage, peak_rss_kb)
+            append_metrics([self.rusage], kind="resources")
+            return self.returncode
+
+        def poll(self):
+            """Returns the exit code if the binary has exited (reaping it), else None."""
+            if self.returncode is not None or not self._reap_lock.acquire(blocking=False):
+                return self.returncode
+            try:
+                return self._reap(os.WNOHANG)
+            finally:
+                self._reap_lock.release()
+
+        def wait(self, timeout=None):
+            """
+            Waits for the binary to exit and reaps it.
+
+            Raises:
+                subprocess.TimeoutExpired: If it is still running after `timeout` seconds.
+            """
+            if timeout is None:
+                with self._reap_lock:
+                    return self._reap(0)
+            deadline = time.monotonic() + timeout
+            delay = 0.0005
+            while True:
+                with self._reap_lock:
+                    if self._reap(os.WNOHANG) is not None:
+                        return self.returncode
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                delay = min(delay * 2, remaining, 0.05)
+                time.sleep(delay)
+
+class SessionError(Exception):
+    """Raised when the binary exits or closes stdout before reaching the expected prompt."""
+
+class GestionStockSession:
+    """
+    One long-lived gestion_stock process driven step by step.
+
+    Usage:
+        with GestionStockSession() as session:
+            session.add_product("Clavier", 25, 49.99)
+            print(session.list_products())
+    """
+
+    def __init__(self, binary_path=None, args=("--test-mode",), cwd=None, timeout=10, record_timings=None,
+                 sample_resources=None, stdin_watchdog=None):
+        """
+        Args:
+            binary_path (str): Binary to launch (defaults to `resolve_binary_path()`).
+            args (tuple): Command-line flags passed to the binary.
+            cwd (str): Working directory of the process.
+            timeout (float): Default per-step timeout in seconds.
+            record_timings (bool): Keep per-operation timings in `self.timings`
+                (defaults to True when `GESTION_STOCK_METRICS` is set).
+            sample_resources (bool): Sample /proc counters into `self.resources`
+                (defaults to `record_timings`, on Linux only).
+            stdin_watchdog (bool): Fail a step as soon as the binary blocks on stdin without
+                printing an expected prompt (defaults to on where /proc allows it, see
+                utils/stdin_watchdog.py).
+        """
+        self.binary_path = binary_path or resolve_binary_path()
+        self.args = [self.binary_path, *args]
+        self.cwd = cwd
+        self.timeout = timeout
+        self.proc = None
+        self.banner = ""
+        self.matched_prompt = None
+        self._chunks = queue.Queue()
+        self._in_fd = None
+        self._out_fd = None
+        self.timings = []
+        self.record_timings = bool(os.environ.get(METRICS_ENV)) if record_timings is None else record_timings
+        self.sample_resources = (self.record_timings if sample_resources is None else sample_resources) and PROC_AVAILABLE
+        self.sampler = None
+        self.resources = []
+        self._input_bytes = 0
+        self._closed = False
+        self.stdin_watchdog = watchdog_enabled() if stdin_watchdog is None else stdin_watchdog
+
+    # ---- lifecycle -------------------------------------------------------
+
+    def start(self):
+        """
+        Launches the binary and waits for the first main-menu prompt.
+
+        Returns:
+            GestionStockSession: The started session (for chaining).
+        """
+        if pty is not None:
+            master, slave = open_pty()
+            self.proc = subprocess.Popen(self.args, stdin=slave, stdout=slave, stderr=slave, cwd=self.cwd)
+            os.close(slave)
+            self._in_fd = self._out_fd = master
+        else:
+            self.proc = subprocess.Popen(
+                self.args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=self.cwd,
+                bufsize=0
+            )
+            self._in_fd = self.proc.stdin.fileno()
+            self._out_fd = self.proc.stdout.fileno()
+        if self.sample_resources:
+            self.sampler = ProcessSampler(self.proc.pid).start()
+        reader = threading.Thread(target=self._pump_stdout, daemon=True)
+        reader.start()
+        started = time.perf_counter()
+        self.banner = self.read_until(MENU_PROMPTS)[0]
+        self._record("startup", started)
+        return self
+
+    def close(self, timeout=None):
+        """
+        Sends the quit command and waits for the process to exit. Closing twice is a no-op.
+
+        Returns:
+            int: Exit code of the binary.
+        """
+        if self.proc is None:
+            return None
+        if self._closed:
+            return self.proc.returncode
+        self._closed = True
+        if self.sampler is not None:
+            # Last reading while the process still exists: /proc/<pid> goes away on exit
+            totals = self.sampler.stop()
+            if totals:
+                self.resources.append(dict(totals, op="process"))
+            self.sampler = None
+        if self.proc.poll() is None:
+            try:
+                os.write(self._in_fd, b"0\n")
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout=timeout or self.timeout)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.flush_metrics()
+        if pty is not None:
+            try:
+                os.close(self._in_fd)
+            except OSError:
+                pass
+        else:
+            self.proc.stdin.close()
+        return self.proc.returncode
+
+    def __enter__(self):
+        # Sessions handed out already started (take_session()) are used as they are
+        return self if self.proc is not None else self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _record(self, op, started):
+        """
+        Stores the latency of one operation, measured from `started` (perf_counter) to now,
+        and the resources it used when sampling.
+        """
+        if self.record_timings:
+            self.timings.append({"op": op, "seconds": time.perf_counter() - started})
+        if self.sampler is not None:
+            usage = self.sampler.mark(op, self._input_bytes)
+            if usage:
+                self.resources.append(usage)
+            self._input_bytes = 0
+
+    def flush_metrics(self):
+        """
+        Appends recorded timings and resource records to the file named by `GESTION_STOCK_METRICS`, if set.
+        """
+        append_metrics(self.timings)
+        append_metrics(self.resources, kind="resources")
+        self.timings = []
+        self.resources = []
+
+    def _pump_stdout(self):
+        """Background reader: forwards raw stdout chunks to the queue, then None on EOF."""
+        while True:
+            try:
+                chunk = os.read(self._out_fd, 65536)
+            except OSError:  # EIO on the pty master once the child has exited
+                break
+            if not chunk:
+                break
+            self._chunks.put(chunk)
+        self._chunks.put(None)
+
+    # ---- low-level stepping ----------------------------------------------
+
+    def iter_until(self, prompts, timeout=None):
+        """
+        Yields raw stdout chunks until the output ends with one of `prompts`.
+
+        The binary stops printing once it blocks on a prompt, so checking the tail of the
+        stream is enough; only a window as long as the longest prompt is kept in memory.
+        While no output arrives, the stdin watchdog (utils/stdin_watchdog.py) checks whether the
+        binary is already waiting for input on some other prompt, and ends the step right away
+        if so instead of waiting out the timeout.
+
+        Args:
+            prompts (tuple): Byte strings that end a step.
+            timeout (float): Maximum seconds to wait for each new chunk.
+
+        Yields:
+            bytes: Output chunks, the last one ending with the matched prompt.
+
+        Raises:
+            StdinBlocked: If the binary blocks on stdin behind a prompt not in `prompts`.
+            subprocess.TimeoutExpired: If no prompt appears within the timeout.
+            SessionError: If the process closes stdout before a prompt appears.
+        """
+        timeout = timeout or self.timeout
+        window = max(len(p) for p in prompts)
+        tail = b""
+        # Last output line, reported as the pending prompt when the binary blocks on stdin
+        line = b""
+        watchdog = (StdinWatchdog(self.proc.pid, output_fd=self._out_fd if pty is not None else None)
+                    if self.stdin_watchdog else None)
+        started = time.perf_counter()
+        deadline = started + timeout
+        self.matched_prompt = None
+        while True:
+            wait = deadline - time.perf_counter()
+            try:
+                chunk = self._chunks.get(timeout=max(0, min(wait, watchdog.wait()) if watchdog else wait))
+            except queue.Empty:
+                if time.perf_counter() >= deadline:
+                    raise subprocess.TimeoutExpired(self.args, timeout, output=tail)
+                state = watchdog.blocked()
+                # Output may have arrived while sampling: only an empty queue means no progress
+                if state and self._chunks.empty():
+                    raise StdinBlocked(self.args, time.perf_counter() - started, pending_prompt(line),
+                                       wchan=state["wchan"], output=tail)
+                continue
+            if chunk is None:
+                self._chunks.put(None)
+                raise SessionError(f"Binary exited (code {self.proc.poll()}) before the next prompt.")
+            if watchdog:
+                watchdog.reset()
+            deadline = time.perf_counter() + timeout
+            yield chunk
+            tail = (tail + chunk)[-window:]
+            head, newline, rest = chunk.rpartition(b"\n")
+            line = rest[-200:] if newline else (line + rest)[-200:]
+            for prompt in prompts:
+                if tail.endswith(prompt):
+                    self.matched_prompt = prompt
+                    return
+
+    def read_until(self, prompts, timeout=None):
+        """
+        Collects the output up to the next prompt.
+
+        Returns:
+            tuple: (decoded output, matched prompt bytes).
+        """
+        data = b"".join(self.iter_until(prompts, timeout))
+        return data.decode("utf-8", errors="replace"), self.matched_prompt
+
+    def send(self, lines, prompts=MENU_PROMPTS, timeout=None):
+        """
+        Writes input lines and returns the output produced up to the next prompt.
+
+        Args:
+            lines (list): Input lines, written newline-terminated.
+            prompts (tuple): Prompts that end this step.
+            timeout (float): Per-step timeout in seconds.
+
+        Returns:
+            tuple: (decoded output, matched prompt bytes).
+        """
+        payload = "".join(f"{line}\n" for line in lines).encode("utf-8")
+        os.write(self._in_fd, payload)
+        self._input_bytes += len(payload)
+        return self.read_until(prompts, timeout)
+
+    def stream(self, lines, prompts=MENU_PROMPTS, timeout=None, op=None):
+        """
+        Writes input lines and yields the raw output chunks up to the next prompt.
+
+        Use this instead of `send()` when the output may be large (e.g. a big listing):
+        nothing is accumulated. If `op` is given, the step is timed under that name.
+        """
+        started = time.perf_counter()
+        payload = "".join(f"{line}\n" for line in lines).encode("utf-8")
+        os.write(self._in_fd, payload)
+        self._input_bytes += len(payload)
+        yield from self.iter_until(prompts, timeout)
+        if op:
+            self._record(op, started)
+
+    # ---- menu operations -------------------------------------------------
+
+    def add_product(self, nom, quantite, prix):
+        """
+        Menu 1: adds a product. Stops early if the binary rejects the name (duplicate).
+
+        Returns:
+            str: Output of the whole operation up to the next main menu.
+        """
+        started = time.perf_counter()
+        output, prompt = self.send(["1", nom], prompts=(QUANTITY_PROMPT, *MENU_PROMPTS))
+        if prompt not in MENU_PROMPTS:
+            output += self.send([quantite, prix])[0]
+        self._record("add", started)
+        return output
+
+    def list_products(self):
+        """
+        Menu 2: lists products.
+
+        Returns:
+            str: Listing output up to the next main menu.
+        """
+        data = b"".join(self.stream(["2"], op="list"))
+        return data.decode("utf-8", errors="replace")
+
+    def delete_product(self, prod_id, confirm="o"):
+        """
+        Menu 3: deletes a product. The confirmation is only sent when the binary asks for it.
+
+        Returns:
+            str: Output of the whole operation up to the next main menu.
+        """
+        started = time.perf_counter()
+        output, prompt = self.send(["3", prod_id], prompts=(CONFIRM_PROMPT, *MENU_PROMPTS))
+        if prompt not in MENU_PROMPTS:
+            output += self.send([confirm])[0]
+        self._record("delete", started)
+        return output
+
+    def modify_product(self, prod_id, nom, quantite, prix):
+        """
+        Menu 4: modifies a product. New values are only sent when the ID is accepted.
+
+        Returns:
+            str: Output of the whole operation up to the next main menu.
+        """
+        started = time.perf_counter()
+        output, prompt = self.send(["4", prod_id], prompts=(NEW_NAME_PROMPT, *MENU_PROMPTS))
+        if prompt not in MENU_PROMPTS:
+            output += self.send([nom, quantite, prix])[0]
+        self._record("modify", started)
+        return output
+
+# Warm sessions waiting for the test script that runs against their binary, by binary path
+# (filled by utils.session_pool.SessionPool.checkout())
+_HANDOFF = {}
+_HANDOFF_LOCK = threading.Lock()
+
+def take_session(binary_path, timeout=10):
+    """
+    Returns a started session on `binary_path`: the warm one checked out for it if there is
+    one, else a new `GestionStockSession`.
+
+    Args:
+        binary_path (str): Binary the test script would launch.
+        timeout (float): Per-step timeout in seconds.
+
+    Returns:
+        GestionStockSession: A session at the main menu.
+    """
+    with _HANDOFF_LOCK:
+        session = _HANDOFF.pop(binary_path, None)
+    if session is None:
+        return GestionStockSession(binary_path, timeout=timeout).start()
+    # Startup happened before the test: keep only what the test itself does
+    session.timeout = timeout
+    session.record_timings = bool(os.environ.get(METRICS_ENV))
+    session.timings, session.resources = [], []
+    return session
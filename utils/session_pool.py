@@ -0,0 +1,229 @@
+"""
+@file utils/session_pool.py
+@brief Warm standby pool of pre-launched gestion_stock sessions.
+
+@details
+Before a scenario can send its first input it pays for the process spawn, dynamic linking, the
+SQLite open and the first menu render. A `SessionPool` pays that in advance: it keeps `size`
+binaries launched, each in its own sandbox (utils.test_runner.create_sandbox) holding the pool's
+fixture, and parked at the main menu. `checkout()` hands one out, and a background thread
+launches a replacement right away.
+
+The same thread health-checks the idle sessions every `check_interval` seconds. It evicts a
+session whose process has exited, that printed anything after its menu prompt, whose database
+has gone from the sandbox, or that has been idle longer than `max_idle` seconds. Checked-out
+sessions are never returned: a scenario changes the database, so the session is closed and its
+sandbox removed afterwards.
+
+A checked-out session is handed off to the test script through `utils.session.take_session()`
+(re-exported here). A script calls
+that instead of constructing a `GestionStockSession`: inside a checkout for its binary it gets the
+warm session with the startup timing dropped, and anywhere else a freshly started one. The
+scripts therefore run unchanged outside the pool, for example with `python Tests/<script>.py`.
+
+Usage:
+    pool = SessionPool(size=2, fixture="catalog_small").start()
+    with pool.checkout() as session:
+        session.list_products()
+    pool.close()
+"""
+
+import os
+import time
+import shutil
+import threading
+import contextlib
+import multiprocessing.util
+
+from .session import GestionStockSession, BUILD_DIR, _HANDOFF, _HANDOFF_LOCK, take_session
+from .snapshots import SnapshotManager
+
+# Pools of this process, by fixture (see get_pool())
+_POOLS = {}
+
+class SessionPool:
+    """
+    Pre-launched sessions on one fixture.
+
+    Attributes:
+        stats (dict): launched, checkouts, warm_hits, cold_starts, evicted and failed_launches counts.
+    """
+
+    def __init__(self, size=2, fixture=None, timeout=10, max_idle=300, check_interval=1.0, db_filename="stockt.db"):
+        """
+        Args:
+            size (int): Number of idle sessions to keep ready.
+            fixture (str): Snapshot restored into each sandbox before launch (None: copy of `build/stockt.db`).
+            timeout (float): Startup and per-step timeout of the sessions.
+            max_idle (float): Seconds after which an idle session is replaced.
+            check_interval (float): Seconds between health checks.
+            db_filename (str): Name of the database file in the sandbox.
+        """
+        self.size = size
+        self.fixture = fixture
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.db_filename = db_filename
+        self.build_dir = BUILD_DIR
+        self.stats = {"launched": 0, "checkouts": 0, "warm_hits": 0, "cold_starts": 0, "evicted": 0, "failed_launches": 0}
+        self._idle = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- lifecycle -------------------------------------------------------
+
+    def start(self):
+        """
+        Builds the fixture if needed and starts the refill thread.
+
+        Returns:
+            SessionPool: The pool (for chaining).
+        """
+        if self.fixture:
+            SnapshotManager().ensure(self.fixture)
+        self._thread = threading.Thread(target=self._maintain, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stops refilling and shuts down every idle session."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._discard(session)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ---- sessions --------------------------------------------------------
+
+    def _launch(self):
+        """
+        Starts one session in a new sandbox.
+
+        Returns:
+            GestionStockSession: The session, parked at the main menu.
+        """
+        # Imported here: utils.test_runner is slow to import and only the pool's launches need it
+        from .test_runner import create_sandbox, get_binary_name
+
+        sandbox = create_sandbox(self.build_dir, self.db_filename, copy_db=self.fixture is None)
+        try:
+            if self.fixture:
+                SnapshotManager().restore(self.fixture, os.path.join(sandbox, self.db_filename))
+            # Always timed: whether the test wants the timings is only known at hand-off
+            session = GestionStockSession(os.path.join(sandbox, get_binary_name()), cwd=sandbox,
+                                          timeout=self.timeout, record_timings=True).start()
+        except Exception:
+            shutil.rmtree(sandbox, ignore_errors=True)
+            raise
+        session.sandbox = sandbox
+        session.launched_at = time.monotonic()
+        with self._lock:
+            self.stats["launched"] += 1
+        return session
+
+    def healthy(self, session):
+        """
+        Returns True if an idle session can still be handed out.
+        """
+        return (session.proc.poll() is None
+                # Parked at the menu, the binary has nothing more to print
+                and session._chunks.empty()
+                and os.path.exists(os.path.join(session.sandbox, self.db_filename))
+                and time.monotonic() - session.launched_at < self.max_idle)
+
+    def _discard(self, session):
+        """Closes a session without reporting its metrics and removes its sandbox."""
+        session.timings, session.resources = [], []
+        if session.sampler is not None:
+            session.sampler.stop()
+            session.sampler = None
+        session.close(timeout=2)
+        shutil.rmtree(session.sandbox, ignore_errors=True)
+
+    def _maintain(self):
+        """Refill thread: evicts unhealthy idle sessions and launches replacements."""
+        while not self._stop.is_set():
+            with self._lock:
+                evicted = [s for s in self._idle if not self.healthy(s)]
+                self._idle = [s for s in self._idle if s not in evicted]
+                self.stats["evicted"] += len(evicted)
+                missing = self.size - len(self._idle)
+            for session in evicted:
+                self._discard(session)
+            for _ in range(missing):
+                if self._stop.is_set():
+                    break
+                try:
+                    session = self._launch()
+                except Exception:
+                    with self._lock:
+                        self.stats["failed_launches"] += 1
+                    break  # retried after the next interval
+                with self._lock:
+                    self._idle.append(session)
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+
+    @contextlib.contextmanager
+    def checkout(self):
+        """
+        Takes a warm session (or starts one if none is ready) and hands it off to `take_session()`.
+
+        Yields:
+            GestionStockSession: A session at the main menu, in its own sandbox (`session.sandbox`),
+            with `session.warm_hit` telling whether it was pre-launched.
+        """
+        session = None
+        with self._lock:
+            self.stats["checkouts"] += 1
+            while self._idle and session is None:
+                candidate = self._idle.pop(0)
+                if self.healthy(candidate):
+                    session = candidate
+                    self.stats["warm_hits"] += 1
+                else:
+                    self.stats["evicted"] += 1
+                    threading.Thread(target=self._discard, args=(candidate,), daemon=True).start()
+            if session is None:
+                self.stats["cold_starts"] += 1
+        self._wake.set()
+        if session is None:
+            session = self._launch()
+            session.warm_hit = False
+        else:
+            session.warm_hit = True
+        with _HANDOFF_LOCK:
+            _HANDOFF[session.binary_path] = session
+        try:
+            yield session
+        finally:
+            with _HANDOFF_LOCK:
+                _HANDOFF.pop(session.binary_path, None)
+            self._discard(session)
+
+def get_pool(fixture=None, size=2):
+    """
+    Returns this process's started pool for `fixture`, creating it on first use.
+
+    The pool is closed when the process exits, including `ProcessPoolExecutor` workers.
+    """
+    pool = _POOLS.get(fixture)
+    if pool is None:
+        pool = _POOLS[fixture] = SessionPool(size=size, fixture=fixture).start()
+        # Runs at interpreter exit and when a multiprocessing worker shuts down
+        multiprocessing.util.Finalize(None, pool.close, exitpriority=10)
+    return pool
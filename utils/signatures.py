@@ -0,0 +1,287 @@
+"""
+@file utils/signatures.py
+@brief Compiled multi-pattern signature matcher shared by the output checks.
+
+@details
+All the success and failure messages a check looks for are compiled into one Aho-Corasick
+automaton, so the output is scanned once, in O(n), however many signatures there are. The named
+signatures live in meta/meta_SIGNATURE_REGISTRY.py; `registry_signatures(group)` compiles the
+ones a test uses, and `SignatureSet` also accepts ad hoc patterns (the runner's expected output).
+
+Matching is encoding tolerant. Patterns and output are folded the same way before matching:
+- UTF-8 is decoded incrementally, so multi-byte characters may straddle chunk boundaries;
+- bytes that are not valid UTF-8 are read as Latin-1 (a binary built with a legacy codepage);
+- mojibake (UTF-8 read as Latin-1 or cp1252, e.g. "ajoutÃ©") is repaired;
+- accents are stripped and case is folded ("Produit ajouté" matches "PRODUIT AJOUTE").
+
+The runner's expected output is matched case-sensitively (`SignatureSet(..., case_sensitive=True)`):
+only the encoding is repaired, as TEST_REGISTRY markers such as "Deleted" must not match a failure
+line like "not deleted".
+
+Usage:
+    result = registry_signatures("journey").scan(output)
+    if result.found("product_deleted"): ...
+"""
+
+import os
+import re
+import sys
+import codecs
+import functools
+import unicodedata
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from meta.meta_SIGNATURE_REGISTRY import SIGNATURE_REGISTRY
+
+KINDS = ("success", "failure", "info")
+
+# cp1252 renders bytes 0x80–0x9F as these characters; Latin-1 keeps them as C1 controls
+_CP1252_BYTES = {bytes([b]).decode("cp1252"): b for b in range(0x80, 0xA0) if b not in (0x81, 0x8D, 0x8F, 0x90, 0x9D)}
+_CONTINUATION = "".join(chr(b) for b in range(0x80, 0xC0)) + "".join(_CP1252_BYTES)
+# "Ã" or "Â" followed by what a UTF-8 continuation byte looks like once decoded as Latin-1/cp1252
+_MOJIBAKE = re.compile(f"[ÂÃ][{re.escape(_CONTINUATION)}]")
+# Invalid UTF-8 bytes come back from surrogateescape as U+DC80–U+DCFF: read them as Latin-1
+_LATIN1_FALLBACK = {0xDC00 + b: chr(b) for b in range(0x80, 0x100)}
+_ESCAPED_BYTE = re.compile("[\udc80-\udcff]")
+
+def _repair_mojibake(match):
+    lead, continuation = match.group(0)
+    byte = _CP1252_BYTES.get(continuation, ord(continuation))
+    return bytes([0xC2 if lead == "Â" else 0xC3, byte]).decode("utf-8", errors="replace")
+
+def repair(text):
+    """
+    Repairs the encoding of decoded text: invalid UTF-8 bytes read as Latin-1, mojibake undone.
+    """
+    if text.isascii():
+        return text
+    if _ESCAPED_BYTE.search(text):
+        text = text.translate(_LATIN1_FALLBACK)
+    if "Ã" in text or "Â" in text:
+        text = _MOJIBAKE.sub(_repair_mojibake, text)
+    return text
+
+def fold(text):
+    """
+    Folds decoded text for matching: repairs mojibake, strips accents, lower-cases.
+
+    Returns:
+        str: ASCII-only text.
+    """
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFKD", repair(text)).encode("ascii", "ignore").decode("ascii").lower()
+
+class ScanResult:
+    """
+    Outcome of a scan.
+
+    Attributes:
+        counts (dict): Signature name → number of matches.
+        first (dict): Signature name → offset of the first match, in folded characters.
+    """
+
+    def __init__(self, signature_set, counts, first):
+        self.signature_set = signature_set
+        self.counts = counts
+        self.first = first
+
+    def found(self, *names):
+        """Returns True if any of the named signatures matched."""
+        return any(name in self.counts for name in names)
+
+    def matched(self, kind=None):
+        """
+        Returns the matched signature names (of one kind, if given), in order of first appearance.
+        """
+        names = sorted(self.counts, key=self.first.get)
+        return [n for n in names if kind is None or self.signature_set.kinds.get(n) == kind]
+
+    def missing(self, kind="success"):
+        """Returns the signatures of `kind` that did not match, in definition order."""
+        return [n for n, k in self.signature_set.kinds.items() if k == kind and n not in self.counts]
+
+class Scanner:
+    """
+    Incremental scan over a byte (or text) stream; feed chunks, then call `finish()`.
+    """
+
+    def __init__(self, signature_set):
+        self.signature_set = signature_set
+        self.state = 0
+        self.offset = 0
+        self.counts = {}
+        self.first = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+        self._pending = ""
+
+    def feed(self, chunk):
+        """
+        Scans the next chunk of output (bytes, or already decoded str).
+
+        Returns:
+            Scanner: self (for chaining).
+        """
+        text = self._decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+        text = self._pending + text
+        # A trailing "Ã"/"Â" may be the first half of a mojibake pair: wait for the next chunk
+        if text and text[-1] in "ÂÃ":
+            text, self._pending = text[:-1], text[-1]
+        else:
+            self._pending = ""
+        self._run(self.signature_set.fold(text))
+        return self
+
+    def finish(self):
+        """
+        Flushes buffered input and returns the result.
+
+        Returns:
+            ScanResult: Matches of the whole stream.
+        """
+        tail = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        if tail:
+            self._run(self.signature_set.fold(tail))
+        return ScanResult(self.signature_set, dict(self.counts), dict(self.first))
+
+    def _run(self, text):
+        goto, fail, out, names = (self.signature_set._goto, self.signature_set._fail,
+                                  self.signature_set._out, self.signature_set._pattern_names)
+        starts = self.signature_set._starts
+        state, counts, first, base = self.state, self.counts, self.first, self.offset
+        i, n = 0, len(text)
+        while i < n:
+            if not state:
+                # At the root, jump straight to the next character that can start a pattern
+                match = starts.search(text, i)
+                if match is None:
+                    break
+                i = match.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for pattern in out[state]:
+                    name = names[pattern]
+                    counts[name] = counts.get(name, 0) + 1
+                    first.setdefault(name, base + i)
+            i += 1
+        self.state = state
+        self.offset = base + len(text)
+
+class SignatureSet:
+    """
+    A compiled set of named signatures.
+
+    Args:
+        signatures (dict): Name → pattern, list of patterns, or registry-style entry
+            ({"patterns": [...], "kind": ...}).
+        case_sensitive (bool): Keep case and accents; only the encoding is repaired.
+    """
+
+    def __init__(self, signatures, case_sensitive=False):
+        self.fold = repair if case_sensitive else fold
+        self.kinds = {}
+        self._pattern_names = []
+        self._goto = [{}]
+        self._out = [[]]
+        for name, spec in signatures.items():
+            if isinstance(spec, dict):
+                patterns, kind = spec["patterns"], spec.get("kind", "info")
+            else:
+                patterns, kind = ([spec] if isinstance(spec, str) else list(spec)), "info"
+            if kind not in KINDS:
+                raise ValueError(f"Unknown signature kind for {name!r}: {kind!r}")
+            self.kinds[name] = kind
+            for pattern in patterns:
+                self._add(name, self.fold(pattern))
+        self._build_failure_links()
+        self._starts = re.compile(f"[{re.escape(''.join(self._goto[0]))}]")
+
+    def _add(self, name, folded):
+        if not folded:
+            raise ValueError(f"Signature {name!r} has a pattern that folds to nothing.")
+        state = 0
+        for ch in folded:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(self._pattern_names))
+        self._pattern_names.append(name)
+
+    def _build_failure_links(self):
+        """Breadth-first construction of the failure function; outputs inherit along it."""
+        self._fail = [0] * len(self._goto)
+        # Depth-1 states fail to the root; deeper ones follow their parent's failure chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scanner(self):
+        """Returns a new incremental `Scanner`."""
+        return Scanner(self)
+
+    def scan(self, data):
+        """
+        Scans a complete output (bytes, str, or an iterable of byte chunks).
+
+        Returns:
+            ScanResult: Matches.
+        """
+        scanner = Scanner(self)
+        if isinstance(data, (bytes, bytearray, str)):
+            scanner.feed(data)
+        else:
+            for chunk in data:
+                scanner.feed(chunk)
+        return scanner.finish()
+
+@functools.lru_cache(maxsize=None)
+def registry_signatures(group=None):
+    """
+    Compiles the SIGNATURE_REGISTRY entries of one group (all entries if None).
+
+    Raises:
+        KeyError: If no entry belongs to `group`.
+    """
+    selected = {name: spec for name, spec in SIGNATURE_REGISTRY.items() if group is None or group in spec.get("groups", ())}
+    if not selected:
+        raise KeyError(f"No signatures registered for group {group!r}")
+    return SignatureSet(selected)
+
+@functools.lru_cache(maxsize=256)
+def expected_signatures(patterns):
+    """
+    Compiles expected-output patterns (a tuple of strings) into a set named by the patterns themselves.
+    Matching is case- and accent-sensitive, like the substring check it replaces.
+    """
+    return SignatureSet({pattern: pattern for pattern in patterns}, case_sensitive=True)
+
+def match_expected(output, expected_output):
+    """
+    Returns the first of the expected message(s) found in `output`, or None.
+
+    Args:
+        output: Captured output (str, bytes, or an iterable of byte chunks such as `OutputSpool.chunks()`).
+        expected_output (str or list): Message(s) confirming success (TEST_REGISTRY "expected_output").
+    """
+    if not expected_output:
+        return None
+    patterns = (expected_output,) if isinstance(expected_output, str) else tuple(expected_output)
+    result = expected_signatures(patterns).scan(output)
+    return next((p for p in patterns if result.found(p)), None)
@@ -0,0 +1,440 @@
+"""
+@file utils/snapshots.py
+@brief Named copy-on-write snapshots of `stockt.db` for per-test fixture reset.
+
+@details
+A snapshot is a frozen copy of the database under `build/snapshots/<name>.db`, with its size,
+page size and SHA-256 recorded next to it in `<name>.json` and a 16-byte BLAKE2b digest of every
+page in `<name>.pages`. Tests name the snapshot they start
+from with the "fixture" key of TEST_REGISTRY; the runner restores it before the test, so every
+run begins from the same state whatever the previous test left behind.
+
+Capturing uses a reflink (FICLONE) when the filesystem supports it and the database is at rest,
+and the SQLite online backup API otherwise, which yields a consistent copy even while the binary
+has the file open.
+
+Restoring costs, from cheapest to dearest:
+- Every restore leaves a stamp next to the database (`<db>.snapshot`: the snapshot and the file's
+  inode, size and mtime). A database whose stamp still matches was not written since it was
+  restored, e.g. by a read-only test, and is left as it is: no read, no write. The restored
+  file's mtime is set `STAMP_BACKDATE_NS` in the past, so a write landing in the same clock tick
+  as the restore still changes it.
+- Otherwise a reflink (FICLONE) replaces it in O(1) on btrfs/XFS.
+- Without reflinks (ext4, most CI runners) an existing target is read in full and each page is
+  hashed against the snapshot's page digests; only the pages that differ are read from the
+  snapshot and rewritten. That is O(database size) reads of the target but O(changed pages)
+  reads of the snapshot and writes, so a multi-GB fixture whose test touched a few rows costs
+  one sequential read of the database and a few page writes.
+
+Snapshots missing on disk are built from meta/meta_FIXTURE_REGISTRY.py: a product count of 0
+means the binary's schema only, any other entry is passed to `utils.dataset_generator`.
+
+Usage:
+    python3 -m utils.snapshots build
+    python3 -m utils.snapshots capture my_state --db build/stockt.db
+    python3 -m utils.snapshots restore catalog_small --to build
+"""
+
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import datetime
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflinks, restores fall back to page copies
+    fcntl = None
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from meta.meta_FIXTURE_REGISTRY import FIXTURE_REGISTRY
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SNAPSHOT_DIR = os.path.join(REPO_ROOT, "build", "snapshots")
+
+# ioctl(dest_fd, FICLONE, src_fd): share all extents of src (linux/fs.h)
+FICLONE = 0x40049409
+# Compared at once when diffing; a multiple of every SQLite page size
+COMPARE_BLOCK = 1024 * 1024
+# Files SQLite keeps next to the database, stale once the main file is replaced
+SIDECAR_SUFFIXES = ("-journal", "-wal", "-shm")
+# Bytes of the BLAKE2b digest kept per page in `<name>.pages`
+PAGE_DIGEST_SIZE = 16
+# Stamp written next to a restored database (see SnapshotManager.restore())
+RESTORE_STAMP_SUFFIX = ".snapshot"
+# How far back a restored database's mtime is set: well beyond the kernel's timestamp granularity
+STAMP_BACKDATE_NS = 1_000_000_000
+
+def reflink(src, dst):
+    """
+    Clones `src` to `dst` sharing the same disk extents.
+
+    Returns:
+        bool: True on success, False if the filesystem (or platform) cannot reflink.
+    """
+    if fcntl is None:
+        return False
+    tmp = dst + ".clone"
+    try:
+        with open(src, "rb") as s, open(tmp, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, dst)
+    return True
+
+def page_size_of(path):
+    """
+    Reads the page size from a SQLite header (bytes 16–17, where 1 stands for 65536).
+    """
+    with open(path, "rb") as f:
+        header = f.read(18)
+    if len(header) < 18 or not header.startswith(b"SQLite format 3\0"):
+        raise ValueError(f"Not a SQLite database: {path}")
+    size = int.from_bytes(header[16:18], "big")
+    return 65536 if size == 1 else size
+
+def page_digest(page):
+    """Returns the digest of one page as stored in `<name>.pages`."""
+    return hashlib.blake2b(page, digest_size=PAGE_DIGEST_SIZE).digest()
+
+def copy_changed_pages(src, dst, page_size, digests=None):
+    """
+    Makes `dst` byte-identical to `src`, rewriting only the pages that differ.
+
+    Args:
+        src (str): Snapshot file.
+        dst (str): Database to reset.
+        page_size (int): SQLite page size of `src`.
+        digests (bytes): `page_digest()` of every page of `src`, concatenated. With them only
+            `dst` is read in full and `src` only for the pages rewritten; without them both
+            files are read and compared block by block.
+
+    Returns:
+        int: Number of pages written.
+    """
+    if digests is not None:
+        return copy_changed_pages_by_digest(src, dst, page_size, digests)
+    written = 0
+    with open(src, "rb") as s, open(dst, "r+b") as d:
+        offset = 0
+        while True:
+            block = s.read(COMPARE_BLOCK)
+            if not block:
+                break
+            current = d.read(len(block))
+            if block != current:
+                for start in range(0, len(block), page_size):
+                    page = block[start:start + page_size]
+                    if page != current[start:start + page_size]:
+                        d.seek(offset + start)
+                        d.write(page)
+                        written += 1
+                d.seek(offset + len(block))
+            offset += len(block)
+        d.truncate(offset)
+    return written
+
+def copy_changed_pages_by_digest(src, dst, page_size, digests):
+    """
+    `copy_changed_pages()` against the snapshot's page digests.
+
+    Returns:
+        int: Number of pages written.
+    """
+    size = len(digests) // PAGE_DIGEST_SIZE * page_size
+    block_size = COMPARE_BLOCK - COMPARE_BLOCK % page_size or page_size
+    written = 0
+    with open(src, "rb") as s, open(dst, "r+b") as d:
+        for offset in range(0, size, block_size):
+            d.seek(offset)
+            block = d.read(min(block_size, size - offset))
+            for start in range(0, min(block_size, size - offset), page_size):
+                index = (offset + start) // page_size
+                expected = digests[index * PAGE_DIGEST_SIZE:(index + 1) * PAGE_DIGEST_SIZE]
+                page = block[start:start + page_size]
+                if len(page) == page_size and page_digest(page) == expected:
+                    continue
+                s.seek(offset + start)
+                d.seek(offset + start)
+                d.write(s.read(page_size))
+                written += 1
+        d.truncate(size)
+    return written
+
+def file_stamp(path):
+    """Returns what changes whenever `path` is written or replaced: inode, size and mtime."""
+    st = os.stat(path)
+    return {"inode": st.st_ino, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def remove_sidecars(db_path):
+    """Deletes the journal/WAL files of `db_path`, which must not outlive the main file."""
+    for suffix in SIDECAR_SUFFIXES:
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+def file_sha256(path):
+    """Returns the SHA-256 of a file's content."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COMPARE_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def file_page_digests(path, page_size):
+    """Returns the `page_digest()` of every page of `path`, concatenated."""
+    digests = []
+    with open(path, "rb") as f:
+        for page in iter(lambda: f.read(page_size), b""):
+            digests.append(page_digest(page))
+    return b"".join(digests)
+
+def create_schema_only(path):
+    """Writes a database holding the binary's empty `produits` table."""
+    from .dataset_generator import SCHEMA
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+
+class SnapshotManager:
+    """
+    Directory of named database snapshots: `<name>.db` plus `<name>.json` metadata.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+
+    def path(self, name):
+        """Returns the snapshot file of `name` (which may not exist yet)."""
+        return os.path.join(self.root, f"{name}.db")
+
+    def page_digests(self, name, info):
+        """
+        Returns the page digests stored with snapshot `name`, or None if missing or stale
+        (snapshots captured before they were recorded).
+        """
+        path = os.path.join(self.root, f"{name}.pages")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            digests = f.read()
+        return digests if len(digests) == info["size"] // info["page_size"] * PAGE_DIGEST_SIZE else None
+
+    def info(self, name):
+        """
+        Returns the metadata recorded when `name` was captured, or None if there is no such snapshot.
+        """
+        meta_path = os.path.join(self.root, f"{name}.json")
+        if not (os.path.exists(meta_path) and os.path.exists(self.path(name))):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def list(self):
+        """Returns the metadata of every snapshot, sorted by name."""
+        if not os.path.isdir(self.root):
+            return []
+        names = sorted(f[:-3] for f in os.listdir(self.root) if f.endswith(".db"))
+        return [info for info in map(self.info, names) if info]
+
+    def capture(self, name, db_path, source=None):
+        """
+        Freezes the current content of `db_path` as snapshot `name` (replacing any previous one).
+
+        Args:
+            name (str): Snapshot name.
+            db_path (str): Database to capture.
+            source (str): Free-form description stored in the metadata (default: `db_path`).
+
+        Returns:
+            dict: The snapshot metadata.
+
+        Raises:
+            FileNotFoundError: If `db_path` does not exist.
+        """
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Database not found: {db_path}")
+        os.makedirs(self.root, exist_ok=True)
+        target = self.path(name)
+        tmp = target + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+        # A reflink of a database with a live journal/WAL could be torn: back it up instead
+        at_rest = not any(os.path.exists(db_path + s) for s in SIDECAR_SUFFIXES)
+        if at_rest and reflink(db_path, tmp):
+            method = "reflink"
+        else:
+            src, dst = sqlite3.connect(db_path), sqlite3.connect(tmp)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+            method = "backup"
+        os.replace(tmp, target)
+
+        page_size = page_size_of(target)
+        pages_path = os.path.join(self.root, f"{name}.pages")
+        with open(pages_path + ".tmp", "wb") as f:
+            f.write(file_page_digests(target, page_size))
+        os.replace(pages_path + ".tmp", pages_path)
+
+        info = {
+            "name": name,
+            "created": datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S"),
+            "source": source or os.path.relpath(os.path.abspath(db_path), REPO_ROOT),
+            "method": method,
+            "size": os.path.getsize(target),
+            "page_size": page_size,
+            "sha256": file_sha256(target)
+        }
+        with open(os.path.join(self.root, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2)
+        return info
+
+    def restore(self, name, db_path):
+        """
+        Resets `db_path` to snapshot `name`.
+
+        Returns:
+            dict: How it was restored: method ("unchanged", "reflink", "pages" or "copy") and
+            pages written.
+
+        Raises:
+            KeyError: If the snapshot does not exist.
+        """
+        info = self.info(name)
+        if info is None:
+            raise KeyError(f"Unknown snapshot: {name!r}")
+        snapshot = self.path(name)
+        # A WAL left behind holds the only changes a test may have made: dropping it undoes them
+        remove_sidecars(db_path)
+        stamp_path = db_path + RESTORE_STAMP_SUFFIX
+        if self._stamp_matches(stamp_path, db_path, info):
+            return {"method": "unchanged", "pages": 0}
+        if reflink(snapshot, db_path):
+            restored = {"method": "reflink", "pages": 0}
+        elif os.path.isfile(db_path) and not os.path.islink(db_path):
+            pages = copy_changed_pages(snapshot, db_path, info["page_size"], self.page_digests(name, info))
+            restored = {"method": "pages", "pages": pages}
+        else:
+            if os.path.lexists(db_path):
+                os.remove(db_path)
+            shutil.copyfile(snapshot, db_path)
+            restored = {"method": "copy", "pages": info["size"] // info["page_size"]}
+        # mtime comes from a coarse clock: without this, a write within the same tick would keep it
+        now = time.time_ns()
+        os.utime(db_path, ns=(now, now - STAMP_BACKDATE_NS))
+        with open(stamp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(file_stamp(db_path), snapshot=name, sha256=info["sha256"]), f)
+        return restored
+
+    @staticmethod
+    def _stamp_matches(stamp_path, db_path, info):
+        """
+        Returns True if `db_path` still is the file a restore of this very snapshot left behind.
+        """
+        if not (os.path.exists(stamp_path) and os.path.isfile(db_path)):
+            return False
+        try:
+            with open(stamp_path, encoding="utf-8") as f:
+                stamp = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (stamp.pop("sha256", None) == info["sha256"] and stamp.pop("snapshot", None) == info["name"]
+                and stamp == file_stamp(db_path))
+
+    def ensure(self, name, rebuild=False):
+        """
+        Returns the metadata of `name`, building it from FIXTURE_REGISTRY if it is missing.
+
+        Raises:
+            KeyError: If the snapshot is missing and not a registered fixture.
+        """
+        info = self.info(name)
+        if info is not None and not rebuild:
+            return info
+        if name not in FIXTURE_REGISTRY:
+            raise KeyError(f"Unknown fixture: {name!r} (registered: {', '.join(FIXTURE_REGISTRY)})")
+        spec = FIXTURE_REGISTRY[name]
+        if spec.get("products", 0) == 0:
+            os.makedirs(self.root, exist_ok=True)
+            source = self.path(name) + ".src"
+            if os.path.exists(source):
+                os.remove(source)
+            create_schema_only(source)
+            try:
+                return self.capture(name, source, source="schema")
+            finally:
+                os.remove(source)
+
+        from .dataset_generator import fixture_params, get_fixture
+        fixture = get_fixture(fixture_params(**spec))
+        return self.capture(name, fixture, source=os.path.relpath(fixture, REPO_ROOT))
+
+    def delete(self, name):
+        """Removes snapshot `name`. Returns True if it existed."""
+        existed = os.path.exists(self.path(name))
+        for path in (self.path(name), os.path.join(self.root, f"{name}.json"), os.path.join(self.root, f"{name}.pages")):
+            if os.path.exists(path):
+                os.remove(path)
+        return existed
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture and restore named stockt.db snapshots.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="Snapshot directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ls", help="List snapshots")
+    build = sub.add_parser("build", help="Build registered fixtures missing on disk")
+    build.add_argument("names", nargs="*", help="Fixtures to build (default: all registered)")
+    build.add_argument("--rebuild", action="store_true", help="Rebuild even if present")
+    capture = sub.add_parser("capture", help="Snapshot a database")
+    capture.add_argument("name")
+    capture.add_argument("--db", default=os.path.join(REPO_ROOT, "build", "stockt.db"))
+    restore = sub.add_parser("restore", help="Reset a database to a snapshot")
+    restore.add_argument("name")
+    restore.add_argument("--to", default=os.path.join(REPO_ROOT, "build"), help="Directory holding stockt.db")
+    rm = sub.add_parser("rm", help="Delete a snapshot")
+    rm.add_argument("name")
+    args = parser.parse_args()
+
+    manager = SnapshotManager(args.root)
+    try:
+        if args.command == "ls":
+            snapshots = manager.list()
+            if not snapshots:
+                print("📭 No snapshots.")
+            for info in snapshots:
+                print(f"🧊 {info['name']}: {info['size']} bytes, {info['method']}, "
+                      f"from {info['source']} ({info['created']})")
+        elif args.command == "build":
+            for name in args.names or FIXTURE_REGISTRY:
+                info = manager.ensure(name, rebuild=args.rebuild)
+                print(f"✅ {name}: {info['size']} bytes ({info['method']})")
+        elif args.command == "capture":
+            info = manager.capture(args.name, args.db)
+            print(f"✅ Captured {args.name}: {info['size']} bytes ({info['method']})")
+        elif args.command == "restore":
+            manager.ensure(args.name)
+            restored = manager.restore(args.name, os.path.join(args.to, "stockt.db"))
+            print(f"✅ Restored {args.name} ({restored['method']}, {restored['pages']} page(s) written)")
+        elif args.command == "rm":
+            print("🗑️ Deleted." if manager.delete(args.name) else f"⚠️ No snapshot named {args.name}.")
+    except (KeyError, FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+@file utils/soak.py
+@brief Long-running soak test: one binary session, mixed operations, leak and drift detection.
+
+@details
+Keeps a single `gestion_stock --test-mode` process open for a configurable duration (or number
+of operations) and drives it through a weighted mix of add/list/modify/delete, the way a shop
+keeps the tool open for days. The database starts with `max_products` generated products
+(utils/dataset_generator.py) and is held at that size: additions turn into deletions when the
+catalog is full, so latency reflects the process, not a growing table. Modifications and
+deletions always target products that exist.
+
+Every `sample_interval` seconds one point is appended to the time series: elapsed time,
+operations done, RSS and peak RSS, CPU time and bytes written (from /proc, utils/proc_sampler.py)
+and the p50/p95 latency of each operation within the window. At the end, least-squares trends
+are fitted after a warm-up period: RSS growth in KB per hour (leak) and latency growth in % of
+the median per hour (degradation). A trend counts only when it exceeds its threshold and is at
+least `z` standard errors above zero.
+
+The series is written to `weekly_test/soak_<timestamp>.json` (with the trends and verdict) and
+`weekly_test/soak_<timestamp>.csv`.
+
+Usage:
+    python3 -m utils.soak --duration 3600 --mix add=35,list=5,modify=30,delete=30
+    python3 -m utils.run_weekly --soak 86400
+"""
+
+import os
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import datetime
+import subprocess
+
+from .metrics import summarize_latencies, linear_trend
+from .load_generator import parse_mix, OPERATIONS
+from .proc_sampler import ProcessSampler, PROC_AVAILABLE
+from .session import GestionStockSession, SessionError
+from .signatures import registry_signatures
+from .dataset_generator import fixture_params, get_fixture, install_fixture
+from .test_runner import create_sandbox, get_binary_name, get_repo_root
+
+SOAK_DIR = os.path.join(get_repo_root(), "weekly_test")
+# Listing is the slow operation; long-lived shops mostly edit
+DEFAULT_SOAK_MIX = {"add": 35, "list": 5, "modify": 30, "delete": 30}
+# Latencies kept per operation for the whole-run percentiles (uniform reservoir sample)
+RESERVOIR_SIZE = 100000
+
+def run_soak_operation(session, op, rng, live_ids, next_id, max_products):
+    """
+    Runs one operation against existing products and keeps `live_ids` in sync.
+
+    Adds turn into deletions once the catalog holds `max_products`, and modifications or
+    deletions into additions while it is empty.
+
+    Returns:
+        tuple: (operation actually run, its output, next product ID).
+    """
+    if op == "add" and len(live_ids) >= max_products:
+        op = "delete"
+    if op in ("modify", "delete") and not live_ids:
+        op = "add"
+    if op == "add":
+        output = session.add_product(f"Soak {next_id}", str(rng.randint(1, 500)), f"{rng.uniform(0.5, 999):.2f}")
+        if registry_signatures("soak").scan(output).found("product_added"):
+            live_ids.append(next_id)
+            next_id += 1
+        return op, output, next_id
+    if op == "list":
+        return op, session.list_products(), next_id
+
+    index = rng.randrange(len(live_ids))
+    prod_id = live_ids[index]
+    if op == "modify":
+        return op, session.modify_product(str(prod_id), f"Soak {prod_id} m{rng.randint(0, 9999)}",
+                                          str(rng.randint(1, 500)), f"{rng.uniform(0.5, 999):.2f}"), next_id
+    output = session.delete_product(str(prod_id))
+    # Swap-remove: O(1), and the order of live IDs does not matter
+    live_ids[index] = live_ids[-1]
+    live_ids.pop()
+    return op, output, next_id
+
+def fit_soak_trends(series, warmup=0.1, leak_kb_per_hour=256.0, drift_pct_per_hour=10.0, z=3.0):
+    """
+    Fits RSS and latency trends over the series, ignoring the first `warmup` fraction of it.
+
+    Args:
+        series (list): Points produced by `run_soak()`.
+        warmup (float): Fraction of the run (by time) excluded from the fits.
+        leak_kb_per_hour (float): RSS growth that counts as a leak.
+        drift_pct_per_hour (float): Latency growth (% of the window median) that counts as degradation.
+        z (float): Minimum slope, in standard errors, for a trend to count.
+
+    Returns:
+        dict: "rss" and "latency" (per operation) trends, each with slope, r2, z and a flag,
+        plus "leak" and "degradation" booleans.
+    """
+    if not series:
+        return {"rss": None, "latency": {}, "leak": False, "degradation": False}
+    start = series[-1]["t_s"] * warmup
+    points = [p for p in series if p["t_s"] >= start]
+    hours = [p["t_s"] / 3600 for p in points]
+
+    def significance(fit):
+        if fit["slope_stderr"] == 0:
+            return float("inf") if fit["slope"] > 0 else 0.0
+        return fit["slope"] / fit["slope_stderr"]
+
+    trends = {"rss": None, "latency": {}}
+    rss_points = [(h, p["rss_kb"]) for h, p in zip(hours, points) if p.get("rss_kb") is not None]
+    fit = linear_trend(*zip(*rss_points)) if len(rss_points) >= 3 else None
+    if fit:
+        sig = significance(fit)
+        trends["rss"] = {
+            "kb_per_hour": round(fit["slope"], 2),
+            "r2": round(fit["r2"], 3),
+            "z": round(sig, 2) if sig != float("inf") else None,
+            "leak": fit["slope"] > leak_kb_per_hour and sig > z
+        }
+
+    for op in OPERATIONS:
+        op_points = [(h, p["latency"][op]["p50_ms"]) for h, p in zip(hours, points)
+                     if p["latency"].get(op, {}).get("p50_ms") is not None]
+        fit = linear_trend(*zip(*op_points)) if len(op_points) >= 3 else None
+        if not fit:
+            continue
+        median = sorted(y for _, y in op_points)[len(op_points) // 2]
+        pct = fit["slope"] / median * 100 if median else 0.0
+        sig = significance(fit)
+        trends["latency"][op] = {
+            "ms_per_hour": round(fit["slope"], 3),
+            "pct_per_hour": round(pct, 2),
+            "median_p50_ms": median,
+            "r2": round(fit["r2"], 3),
+            "z": round(sig, 2) if sig != float("inf") else None,
+            "degradation": pct > drift_pct_per_hour and sig > z
+        }
+
+    trends["leak"] = bool(trends["rss"] and trends["rss"]["leak"])
+    trends["degradation"] = any(t["degradation"] for t in trends["latency"].values())
+    return trends
+
+def run_soak(duration=3600, operations=None, mix=None, sample_interval=10.0, max_products=500,
+             timeout=10, seed=0, progress=True):
+    """
+    Drives one long-lived session through mixed operations and records a time series.
+
+    Args:
+        duration (float): Run length in seconds (None: until `operations` are done).
+        operations (int): Stop after this many operations (None: no limit).
+        mix (dict): Operation weights (defaults to DEFAULT_SOAK_MIX).
+        sample_interval (float): Seconds between time-series points.
+        max_products (int): Catalog size the run starts from and hovers around.
+        timeout (float): Per-step timeout in seconds.
+        seed (int): Seed of the operation sequence.
+        progress (bool): Print one line per time-series point.
+
+    Returns:
+        dict: Configuration, totals, time series and the error that ended the run (if any).
+    """
+    mix = mix or DEFAULT_SOAK_MIX
+    ops, weights = zip(*mix.items())
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + duration if duration else float("inf")
+
+    sandbox = create_sandbox(os.path.join(get_repo_root(), "build"), copy_db=False)
+    install_fixture(get_fixture(fixture_params(max_products, seed=seed, names="sequential")), sandbox)
+    binary = os.path.join(sandbox, get_binary_name())
+
+    series = []
+    counts = {op: 0 for op in OPERATIONS}
+    # Whole-run samples stay bounded over millions of operations
+    all_latencies = {op: [] for op in OPERATIONS}
+    reservoir_rng = random.Random(seed + 1)
+    window = {op: [] for op in OPERATIONS}
+    live_ids, next_id = list(range(1, max_products + 1)), max_products + 1
+    done, error = 0, None
+    session = GestionStockSession(binary, cwd=sandbox, timeout=timeout, record_timings=False,
+                                  sample_resources=False)
+    started = time.perf_counter()
+    try:
+        session.start()
+        sampler = ProcessSampler(session.proc.pid) if PROC_AVAILABLE else None
+        next_sample = started + sample_interval
+
+        def take_point():
+            reading = sampler.sample() if sampler else None
+            point = {
+                "t_s": round(time.perf_counter() - started, 2),
+                "ops": done,
+                "products": len(live_ids),
+                "rss_kb": reading["rss_kb"] if reading else None,
+                "peak_rss_kb": reading["peak_rss_kb"] if reading else None,
+                "cpu_s": round(reading["utime_s"] + reading["stime_s"] + reading["child_cpu_s"], 2) if reading else None,
+                "write_bytes": reading.get("write_bytes") if reading else None,
+                "latency": {}
+            }
+            for op, samples in window.items():
+                if samples:
+                    s = summarize_latencies(samples)
+                    point["latency"][op] = {"count": s["count"], "p50_ms": s["p50_ms"], "p95_ms": s["p95_ms"]}
+                    samples.clear()
+            series.append(point)
+            if progress:
+                latency = ", ".join(f"{op} {v['p50_ms']} ms" for op, v in point["latency"].items())
+                print(f"⏱️ {point['t_s']:>8.0f}s | {done:>9} ops | RSS {point['rss_kb']} KB | {latency}")
+
+        take_point()
+        while time.perf_counter() < deadline and (operations is None or done < operations):
+            op = rng.choices(ops, weights)[0]
+            op_started = time.perf_counter()
+            op, output, next_id = run_soak_operation(session, op, rng, live_ids, next_id, max_products)
+            elapsed = time.perf_counter() - op_started
+            window[op].append(elapsed)
+            counts[op] += 1
+            if len(all_latencies[op]) < RESERVOIR_SIZE:
+                all_latencies[op].append(elapsed)
+            else:
+                slot = reservoir_rng.randrange(counts[op])
+                if slot < RESERVOIR_SIZE:
+                    all_latencies[op][slot] = elapsed
+            done += 1
+            if "erreur" in output.lower():
+                error = f"{op}: {output.strip().splitlines()[-1] if output.strip() else 'erreur'}"
+                break
+            if time.perf_counter() >= next_sample:
+                take_point()
+                next_sample += sample_interval
+        if any(window.values()):
+            take_point()
+    except KeyboardInterrupt:
+        error = None
+    except (subprocess.TimeoutExpired, SessionError) as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        exit_code = session.close(timeout=2)
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "mix": mix,
+        "seed": seed,
+        "max_products": max_products,
+        "sample_interval_s": sample_interval,
+        "elapsed_s": round(elapsed, 2),
+        "operations": done,
+        "ops_per_sec": round(done / elapsed, 2) if elapsed else None,
+        "per_operation": {op: dict(summarize_latencies(all_latencies[op]), count=counts[op]) for op in OPERATIONS},
+        "exit_code": exit_code,
+        "error": error,
+        "series": series
+    }
+
+def save_soak_report(report, timestamp, out_dir=SOAK_DIR):
+    """
+    Writes the soak report as JSON and its time series as CSV.
+
+    Returns:
+        tuple: (json_path, csv_path).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, f"soak_{timestamp}.json")
+    csv_path = os.path.join(out_dir, f"soak_{timestamp}.csv")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    columns = ["t_s", "ops", "products", "rss_kb", "peak_rss_kb", "cpu_s", "write_bytes"]
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns + [f"{op}_{q}" for op in OPERATIONS for q in ("p50_ms", "p95_ms")])
+        for point in report["series"]:
+            writer.writerow([point[c] for c in columns] + [point["latency"].get(op, {}).get(q)
+                                                          for op in OPERATIONS for q in ("p50_ms", "p95_ms")])
+    return json_path, csv_path
+
+def run_and_report(duration, operations=None, mix=None, sample_interval=10.0, max_products=500, timeout=10,
+                   seed=0, warmup=0.1, leak_kb_per_hour=256.0, drift_pct_per_hour=10.0, z=3.0, out_dir=SOAK_DIR):
+    """
+    Runs a soak, fits its trends, saves the report and prints the verdict.
+
+    Returns:
+        int: 0 if the run was healthy, 1 on a leak, a latency degradation or a binary failure.
+    """
+    timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
+    print(f"🧪 Soak: {duration}s, mix {mix or DEFAULT_SOAK_MIX}, ~{max_products} products")
+    report = run_soak(duration, operations, mix, sample_interval, max_products, timeout, seed)
+    report["trends"] = fit_soak_trends(report["series"], warmup, leak_kb_per_hour, drift_pct_per_hour, z)
+    report["healthy"] = not (report["error"] or report["trends"]["leak"] or report["trends"]["degradation"])
+    json_path, csv_path = save_soak_report(report, timestamp, out_dir)
+
+    trends = report["trends"]
+    print(f"\n📈 {report['operations']} operations in {report['elapsed_s']}s ({report['ops_per_sec']} ops/s)")
+    if trends["rss"]:
+        print(f"🧠 RSS trend: {trends['rss']['kb_per_hour']} KB/h (r²={trends['rss']['r2']})"
+              f"{' ⚠️ LEAK' if trends['rss']['leak'] else ''}")
+    for op, t in trends["latency"].items():
+        print(f"⏱️ {op} p50 trend: {t['pct_per_hour']}%/h of {t['median_p50_ms']} ms"
+              f"{' ⚠️ DEGRADATION' if t['degradation'] else ''}")
+    if report["error"]:
+        print(f"❌ Run stopped: {report['error']}")
+    print(f"{'✅ Healthy' if report['healthy'] else '❌ Unhealthy'} — series: {csv_path}\n↪ Report: {json_path}")
+    return 0 if report["healthy"] else 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test one long-lived gestion_stock session.")
+    parser.add_argument("--duration", type=float, default=3600, help="Run length in seconds")
+    parser.add_argument("--operations", type=int, default=None, help="Stop after N operations")
+    parser.add_argument("--mix", default=None, help="Operation weights, e.g. add=35,list=5,modify=30,delete=30")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between time-series points")
+    parser.add_argument("--max-products", type=int, default=500, help="Catalog size to hover around")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-step timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the operation sequence")
+    parser.add_argument("--warmup", type=float, default=0.1, help="Fraction of the run ignored by the trend fits")
+    parser.add_argument("--leak-threshold", type=float, default=256.0, help="RSS growth (KB/hour) that counts as a leak")
+    parser.add_argument("--drift-threshold", type=float, default=10.0, help="Latency growth (%%/hour) that counts as degradation")
+    parser.add_argument("--z", type=float, default=3.0, help="Minimum trend significance in standard errors")
+    args = parser.parse_args()
+    if args.max_products <= 0:
+        parser.error("--max-products must be a positive number of products")
+
+    mix = parse_mix(args.mix) if args.mix else None
+    raise SystemExit(run_and_report(args.duration, args.operations, mix, args.interval, args.max_products, args.timeout,
+                                    args.seed, args.warmup, args.leak_threshold, args.drift_threshold, args.z))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+@file utils/spool.py
+@brief Spool files for captured test output, read back through a read-only memory map.
+
+@details
+`run_test_script()` used to hold a test's output in memory several times: the captured string,
+its stripped copy, the joined log text and its encoded bytes. An `OutputSpool` is an anonymous
+temporary file the child (or the in-process entry point) writes into directly. Once the run is
+over it is mapped read-only, and everything downstream reads the mapping in bounded chunks: the
+expected-output scan (utils.signatures), the output digest, and the log archive, which cuts its
+chunks straight out of the stripped region (utils.log_archive). The page cache holds the data;
+the runner's own memory stays flat however much the binary prints.
+"""
+
+import os
+import mmap
+import hashlib
+import tempfile
+
+READ_SIZE = 64 * 1024
+
+class OutputSpool:
+    """
+    Temporary file capturing one output stream.
+
+    Usage:
+        with OutputSpool() as out:
+            subprocess.run(cmd, stdout=out.file)
+            out.map()
+            for chunk in out.chunks(): ...
+    """
+
+    def __init__(self, directory=None):
+        self.file = tempfile.TemporaryFile(prefix="spool_", dir=directory)
+        self.data = b""
+        self.start = self.end = 0
+
+    def map(self):
+        """
+        Maps what was written and locates the content without surrounding whitespace,
+        like `str.strip()` on the captured text.
+
+        Returns:
+            OutputSpool: The spool (for chaining).
+        """
+        self.file.flush()
+        size = os.fstat(self.file.fileno()).st_size
+        # mmap refuses empty files
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.start, self.end = 0, size
+        while self.start < self.end:
+            block = self.data[self.start:min(self.end, self.start + READ_SIZE)]
+            kept = block.lstrip()
+            self.start += len(block) - len(kept)
+            if kept:
+                break
+        while self.end > self.start:
+            block = self.data[max(self.start, self.end - READ_SIZE):self.end]
+            kept = block.rstrip()
+            self.end -= len(block) - len(kept)
+            if kept:
+                break
+        return self
+
+    @property
+    def size(self):
+        """Size of the stripped content in bytes."""
+        return self.end - self.start
+
+    def region(self):
+        """
+        Returns:
+            tuple: (mapping, start, end) of the stripped content, as `LogArchive.write_log()` takes it.
+        """
+        return self.data, self.start, self.end
+
+    def chunks(self, size=READ_SIZE):
+        """
+        Yields the stripped content in chunks of at most `size` bytes.
+        """
+        for pos in range(self.start, self.end, size):
+            yield self.data[pos:min(self.end, pos + size)]
+
+    def update(self, digest):
+        """Feeds the stripped content to a hashlib object."""
+        for chunk in self.chunks():
+            digest.update(chunk)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def output_digest(stdout, stderr):
+    """
+    Returns the SHA-256 of stripped stdout + NUL + stripped stderr (the results' "output_digest").
+    """
+    digest = hashlib.sha256()
+    stdout.update(digest)
+    digest.update(b"\0")
+    stderr.update(digest)
+    return digest.hexdigest()
@@ -0,0 +1,223 @@
+"""
+@file utils/startup_bench.py
+@brief Startup-to-exit latency benchmark for the gestion_stock binary.
+
+@details
+Launches the binary N times per configuration and summarizes the wall time from `exec` to
+exit. Each configuration is measured warm (after one untimed launch) and cold: before every
+cold launch the page cache is dropped through `/proc/sys/vm/drop_caches` when permitted
+(root on Linux), otherwise the binary and database pages are evicted with
+`posix_fadvise(POSIX_FADV_DONTNEED)`. Runs are repeated for several `stockt.db` sizes built by
+utils.dataset_generator, so the report shows how startup scales with the catalog.
+
+Results go to `reports/startup_<version>_<timestamp>.json` and `.md`, together with the p50
+change against the latest startup report of another version.
+
+Usage:
+    python3 Tests/smoke_test.py --benchmark --runs 30 --db-sizes 0,10000,1000000
+"""
+
+import os
+import glob
+import json
+import time
+import shutil
+import subprocess
+
+from .metrics import summarize_latencies
+from .dataset_generator import fixture_params, get_fixture, install_fixture
+from .test_runner import create_sandbox, get_binary_name, get_repo_root
+
+REPORT_DIR = os.path.join(get_repo_root(), "reports")
+DROP_CACHES = "/proc/sys/vm/drop_caches"
+
+# How the binary is launched: command-line arguments and stdin
+LAUNCH_MODES = {
+    "smoke": (["--test-smoke"], None),    # starts and exits right away
+    "menu": (["--test-mode"], b"0\n"),    # reaches the menu, then "0. Quitter"
+}
+
+def drop_page_cache(paths):
+    """
+    Evicts cached pages so the next launch reads from disk.
+
+    Args:
+        paths (list): Files to evict when the global cache cannot be dropped.
+
+    Returns:
+        str: Method used ("drop_caches" or "fadvise"), or None if neither is available.
+    """
+    if hasattr(os, "sync"):
+        os.sync()
+    try:
+        with open(DROP_CACHES, "w") as f:
+            f.write("1\n")
+        return "drop_caches"
+    except OSError:
+        pass
+
+    if not hasattr(os, "posix_fadvise"):
+        return None
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return "fadvise"
+
+def time_launch(binary, mode="smoke", timeout=5):
+    """
+    Launches the binary once and measures the time until it exits.
+
+    Returns:
+        tuple: (seconds, exit_code).
+    """
+    args, stdin_data = LAUNCH_MODES[mode]
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [binary] + args,
+        input=stdin_data,
+        stdin=None if stdin_data is not None else subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(binary),
+        timeout=timeout
+    )
+    return time.perf_counter() - start, completed.returncode
+
+def benchmark_startup(binary, runs=20, mode="smoke", cold=True, timeout=5):
+    """
+    Measures warm (and optionally cold) startup-to-exit latency of one binary/database setup.
+
+    Returns:
+        dict: "warm" and "cold" latency summaries, the cache-drop method and failed launches.
+    """
+    db_path = os.path.join(os.path.dirname(binary), "stockt.db")
+    result = {"mode": mode, "failures": 0}
+
+    time_launch(binary, mode, timeout)  # untimed: fills the cache for the warm series
+    samples = []
+    for _ in range(runs):
+        seconds, code = time_launch(binary, mode, timeout)
+        samples.append(seconds)
+        result["failures"] += code != 0
+    result["warm"] = summarize_latencies(samples)
+
+    if cold:
+        samples = []
+        method = None
+        for _ in range(runs):
+            method = drop_page_cache([binary, db_path])
+            seconds, code = time_launch(binary, mode, timeout)
+            samples.append(seconds)
+            result["failures"] += code != 0
+        result["cold"] = summarize_latencies(samples)
+        result["cold_method"] = method
+    return result
+
+def benchmark_db_sizes(sizes=(0,), runs=20, mode="smoke", cold=True, seed=0, timeout=5):
+    """
+    Runs `benchmark_startup()` once per database size, each in its own sandbox.
+
+    Args:
+        sizes (iterable): Product counts; 0 means the binary starts without a database.
+        runs (int): Launches per series (warm and cold).
+        mode (str): Key of LAUNCH_MODES.
+        cold (bool): Also measure cold launches.
+        seed (int): Seed for the generated fixtures.
+
+    Returns:
+        list: One dict per size with "products", "db_bytes" and the benchmark summary.
+    """
+    build_dir = os.path.join(get_repo_root(), "build")
+    rows = []
+    for products in sizes:
+        sandbox = create_sandbox(build_dir)
+        try:
+            db_path = os.path.join(sandbox, "stockt.db")
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            if products:
+                install_fixture(get_fixture(fixture_params(products, seed)), sandbox)
+            summary = benchmark_startup(os.path.join(sandbox, get_binary_name()), runs, mode, cold, timeout)
+            db_bytes = os.path.getsize(db_path) if os.path.exists(db_path) else 0
+            rows.append(dict(summary, products=products, db_bytes=db_bytes))
+        finally:
+            shutil.rmtree(sandbox, ignore_errors=True)
+    return rows
+
+def load_previous_report(version):
+    """
+    Returns the latest startup report of a version other than `version`, or None.
+    """
+    reports = []
+    for path in glob.glob(os.path.join(REPORT_DIR, "startup_*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if report.get("version") != version:
+            reports.append(report)
+    return max(reports, key=lambda r: r.get("timestamp", ""), default=None)
+
+def compare_with_previous(rows, previous):
+    """
+    Computes the p50 change per (database size, warm/cold) against a previous report.
+
+    Returns:
+        list: Dicts with products, series, previous and current p50 (ms) and change in percent.
+    """
+    if not previous:
+        return []
+    before = {(r["products"], r.get("mode")): r for r in previous.get("startup", [])}
+    changes = []
+    for row in rows:
+        old = before.get((row["products"], row["mode"]))
+        for series in ("warm", "cold"):
+            if not old or series not in row or series not in old:
+                continue
+            prev_p50, cur_p50 = old[series]["p50_ms"], row[series]["p50_ms"]
+            if prev_p50 and cur_p50 is not None:
+                changes.append({
+                    "products": row["products"], "series": series,
+                    "previous_p50_ms": prev_p50, "current_p50_ms": cur_p50,
+                    "change_pct": round((cur_p50 / prev_p50 - 1) * 100, 1)
+                })
+    return changes
+
+def save_startup_report(rows, changes, version, timestamp, previous_version=None):
+    """
+    Writes the startup benchmark to JSON and Markdown files in `reports/`.
+
+    Returns:
+        tuple: (json_path, md_path).
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    base = os.path.join(REPORT_DIR, f"startup_{version}_{timestamp}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({"version": version, "timestamp": timestamp, "startup": rows,
+                   "compared_to": previous_version, "changes": changes}, f, indent=4, ensure_ascii=False)
+
+    with open(base + ".md", "w", encoding="utf-8") as f:
+        f.write(f"# 🚀 Startup Benchmark – Version {version}\n")
+        f.write(f"**Date**: {timestamp}\n\n---\n\n## ⏱️ Startup-to-exit latency (ms)\n\n")
+        f.write("| Products | DB size | Series | Runs | p50 | p95 | p99 | Max |\n"
+                "|----------|---------|--------|------|-----|-----|-----|-----|\n")
+        for row in rows:
+            for series in ("warm", "cold"):
+                if series not in row:
+                    continue
+                s = row[series]
+                label = f"cold ({row['cold_method']})" if series == "cold" else series
+                f.write(f"| {row['products']} | {row['db_bytes']} B | {label} | {s['count']} | {s['p50_ms']} | "
+                        f"{s['p95_ms']} | {s['p99_ms']} | {s['max_ms']} |\n")
+        if changes:
+            f.write(f"\n---\n\n## 📉 Change vs. {previous_version}\n\n")
+            f.write("| Products | Series | Previous p50 | Current p50 | Change |\n|----------|--------|--------------|-------------|--------|\n")
+            for c in changes:
+                f.write(f"| {c['products']} | {c['series']} | {c['previous_p50_ms']} | {c['current_p50_ms']} | {c['change_pct']:+}% |\n")
+    return base + ".json", base + ".md"
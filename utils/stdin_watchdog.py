@@ -0,0 +1,218 @@
+"""
+@file utils/stdin_watchdog.py
+@brief Detects a gestion_stock process stuck waiting for input that will never come.
+
+@details
+When the binary stops on a prompt a test does not expect, nothing more will be printed and the
+session used to sit out its whole step timeout (10–20 s per step). That state is visible in
+/proc: the process is asleep in a `read` system call on fd 0 (`/proc/<pid>/syscall`, with the
+kernel wait point in `/proc/<pid>/wchan`), and its terminal holds no unread input (FIONREAD on
+its stdin, reopened through `/proc/<pid>/fd/0`).
+
+`StdinWatchdog` samples these while a session waits for output, but only once the binary has
+printed nothing for `grace` seconds: ordinary steps answer well within that and never touch
+/proc. When two consecutive samples find the process blocked that way, `iter_until()` raises
+`StdinBlocked` naming the pending prompt, about 60 ms after the binary went quiet. The quiet
+period also covers the short window in which freshly written input is still on its way
+through the tty layer and is not counted by FIONREAD yet.
+
+"Quiet" is judged from the session's side, by its reader thread, which can fall behind under
+load. Given the session's pty master (`output_fd`), the watchdog therefore only confirms a
+block while FIONREAD on the master is 0 too: output the binary printed but the session has not
+read yet is progress, not a block.
+
+`/proc/<pid>/syscall` only exists on Linux; elsewhere `WATCHDOG_AVAILABLE` is False and
+sessions fall back to their plain timeouts. Setting `GESTION_STOCK_STDIN_WATCHDOG=0` disables
+the watchdog as well.
+"""
+
+import os
+import re
+import time
+import struct
+import platform
+import subprocess
+
+from .proc_sampler import PROC_AVAILABLE
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # Windows
+    fcntl = None
+
+# Environment variable that turns the watchdog off when set to "0"
+WATCHDOG_ENV = "GESTION_STOCK_STDIN_WATCHDOG"
+
+# Number of the read(2) system call, per machine
+READ_SYSCALLS = {
+    "x86_64": 0,
+    "aarch64": 63,
+    "riscv64": 63,
+    "i386": 3,
+    "i686": 3,
+    "armv7l": 3,
+}
+READ_SYSCALL = READ_SYSCALLS.get(platform.machine())
+WATCHDOG_AVAILABLE = PROC_AVAILABLE and fcntl is not None and READ_SYSCALL is not None
+
+# Seconds between two samples, and seconds without output before sampling starts
+POLL_INTERVAL = 0.005
+GRACE = 0.05
+
+# Terminal control sequences (the binary clears the screen before each menu)
+ANSI_ESCAPE = re.compile(rb"\x1b\[[0-9;?]*[A-Za-z]")
+
+def watchdog_enabled():
+    """
+    Returns True when the watchdog can run here and is not disabled through `GESTION_STOCK_STDIN_WATCHDOG`.
+    """
+    return WATCHDOG_AVAILABLE and os.environ.get(WATCHDOG_ENV, "1") != "0"
+
+def read_syscall(pid):
+    """
+    Reads the system call `pid` is blocked in.
+
+    Returns:
+        tuple: (number, arg0, ..., arg5) as ints, or None if the process is running, not in a
+        system call, gone, or /proc/<pid>/syscall is not readable.
+    """
+    try:
+        with open(f"/proc/{pid}/syscall", encoding="ascii") as f:
+            fields = f.read().split()
+    except OSError:
+        return None
+    # "running", or "-1 <sp> <pc>" when blocked outside a system call
+    if len(fields) < 7 or fields[0] in ("running", "-1"):
+        return None
+    return (int(fields[0]),) + tuple(int(value, 16) for value in fields[1:7])
+
+def read_wchan(pid):
+    """
+    Returns the kernel function `pid` sleeps in (e.g. "wait_woken" for a tty read), or None.
+    """
+    try:
+        with open(f"/proc/{pid}/wchan", encoding="ascii") as f:
+            wchan = f.read().strip()
+    except OSError:
+        return None
+    return wchan if wchan not in ("", "0") else None
+
+def unread_bytes(fd):
+    """
+    Returns the number of bytes waiting to be read on our file descriptor `fd` (FIONREAD),
+    or None if it cannot be inspected.
+    """
+    try:
+        return struct.unpack("i", fcntl.ioctl(fd, termios.FIONREAD, b"\0\0\0\0"))[0]
+    except OSError:
+        return None
+
+def queued_input(pid, fd=0):
+    """
+    Returns the number of bytes waiting to be read on file descriptor `fd` of `pid`, or None
+    if it cannot be inspected.
+    """
+    try:
+        handle = os.open(f"/proc/{pid}/fd/{fd}", os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+    except OSError:
+        return None
+    try:
+        return unread_bytes(handle)
+    finally:
+        os.close(handle)
+
+def blocked_on_stdin(pid):
+    """
+    Checks whether `pid` is asleep reading fd 0 with no input queued.
+
+    Returns:
+        dict: {"syscall", "wchan"} describing the wait, or None if the process is not blocked that way.
+    """
+    syscall = read_syscall(pid)
+    if syscall is None or syscall[0] != READ_SYSCALL or syscall[1] != 0:
+        return None
+    if queued_input(pid) != 0:
+        return None
+    return {"syscall": "read(0)", "wchan": read_wchan(pid)}
+
+def pending_prompt(line):
+    """
+    Returns the last output line (the prompt the binary is waiting on) as readable text.
+    """
+    return ANSI_ESCAPE.sub(b"", line).decode("utf-8", errors="replace").strip()
+
+class StdinBlocked(subprocess.TimeoutExpired):
+    """
+    Raised when the binary waits on stdin for input the step will not send.
+
+    A subclass of `subprocess.TimeoutExpired`, so handlers written for slow steps also catch it.
+    """
+
+    def __init__(self, cmd, elapsed, prompt, wchan=None, output=None):
+        super().__init__(cmd, elapsed, output=output)
+        self.prompt = prompt
+        self.wchan = wchan
+
+    def __str__(self):
+        return (f"Binary blocked reading stdin after {self.timeout:.3f}s on prompt {self.prompt!r}"
+                f" (wchan: {self.wchan or 'unknown'})")
+
+class StdinWatchdog:
+    """
+    Decides, while a step waits for output, whether the process is stuck on stdin.
+
+    Usage:
+        watchdog = StdinWatchdog(proc.pid, output_fd=master)
+        chunk = chunks.get(timeout=watchdog.wait())
+        ...
+        if watchdog.blocked():      # no output arrived within `wait()`
+            raise StdinBlocked(...)
+        watchdog.reset()            # output arrived
+    """
+
+    def __init__(self, pid, interval=POLL_INTERVAL, grace=GRACE, output_fd=None):
+        """
+        Args:
+            pid (int): Process to watch.
+            interval (float): Seconds between two samples.
+            grace (float): Seconds without output before the first sample.
+            output_fd (int): Our end of the process's pty (None: not checked).
+        """
+        self.pid = pid
+        self.output_fd = output_fd
+        self.interval = interval
+        self.grace = grace
+        self.reset()
+
+    def reset(self):
+        """Restarts the quiet period (new output arrived)."""
+        self.quiet_since = time.perf_counter()
+        self.seen = False
+
+    def wait(self):
+        """
+        Returns:
+            float: Seconds to wait for output before the next sample.
+        """
+        return max(self.interval, self.grace - (time.perf_counter() - self.quiet_since))
+
+    def blocked(self):
+        """
+        Takes one sample, if the quiet period is over.
+
+        Returns:
+            dict: The wait description (see `blocked_on_stdin()`) when this sample and the
+            previous one both found the process blocked on stdin with none of its output left
+            unread on `output_fd`, else None.
+        """
+        if time.perf_counter() - self.quiet_since < self.grace:
+            return None
+        state = blocked_on_stdin(self.pid)
+        if state is not None and self.output_fd is not None and unread_bytes(self.output_fd) != 0:
+            # Output is waiting for the session's reader: the binary made progress
+            self.reset()
+            return None
+        confirmed = state is not None and self.seen
+        self.seen = state is not None
+        return state if confirmed else None
@@ -6,21 +6,68 @@
 Executes test scripts listed in TEST_REGISTRY in defined order, captures output,
 verifies expected behavior, logs test-specific details, and returns structured results.
 
+Scripts can also run on a process pool (`--jobs N`); each worker then executes in its own
+throwaway sandbox directory holding a link to the binary and a private copy of the build
+database, so tests never share `stockt.db` with one another. The binary opens the database
+next to its own executable, which is why the sandbox carries its own copy of the binary.
+
+With `--in-process` the test modules are imported once into the runner and their entry points
+(the "entry" key of TEST_REGISTRY) are called directly, with stdout/stderr captured and
+`sys.exit` codes turned into exit codes. This skips one interpreter startup per script.
+Adding `--warm-pool N` also skips the binary's startup: the entry points of scripts flagged
+"warm_session" in TEST_REGISTRY (those that get their session from `take_session()`) run on
+sessions that a pool (utils/session_pool.py) launched in advance, each in its own sandbox. The
+other scripts run in a plain sandbox, and the run ends with the pool's warm hits and cold starts.
+
+Passed results are cached (utils/result_cache.py) under a hash of the binary, the script and
+its utils and meta imports, its TEST_REGISTRY entry and the starting database; unchanged combinations are
+reported from the cache with `"cached": true`. `--no-cache` forces every script to run.
+
+Scripts with a "fixture" key in TEST_REGISTRY start from that named database snapshot
+(utils/snapshots.py), restored into their working directory right before they run.
+
 @note
 Ensure all test scripts follow the '*.py' naming convention and reside in the 'Tests' directory.
 Test runner logs stdout, stderr, execution time, database status, and environment diagnostics.
+Results carry per-operation latency and, on Linux, the binary's resource usage (peak RSS, CPU,
+bytes read/written, write amplification per operation) recorded by the test's sessions, or by
+`SampledPopen` for scripts that launch the binary directly.
+Logs go to the content-addressed archive in `build/logs/archive/` (see utils/log_archive.py).
+Output is never held in the runner's memory: both streams go to spool files (utils/spool.py)
+that are memory-mapped for the expected-output scan, the output digest and the log itself.
 """
 
 import subprocess
 import os
 import time
 import sys
+import stat
+import shutil
+import argparse
 import datetime
+import platform
+import io
+import json
+import tempfile
+import traceback
+import contextlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
 
 # Extend path to resolve package imports from repo root
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from meta.meta_TEST_REGISTRY import TEST_REGISTRY
+from utils.metrics import summarize_latencies
+from utils.session import METRICS_ENV
+from utils.log_archive import LogArchive
+from utils.spool import OutputSpool, output_digest
+from utils.result_cache import ResultCache, cache_key
+from utils.snapshots import SnapshotManager
+from utils.signatures import match_expected
+
+# Order in which per-operation latency appears in results and reports
+LATENCY_OPERATIONS = ("startup", "add", "list", "modify", "delete")
 
 def get_repo_root():
     """
@@ -28,7 +75,194 @@ def get_repo_root():
     """
     return os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-def run_test_script(script_path, db_filename="stockt.db", expected_output=None):
+def get_binary_name():
+    """
+    Returns the file name of the gestion_stock binary for the current platform.
+    """
+    return "gestion_stock.exe" if platform.system() == "Windows" else "gestion_stock_linux"
+
+def create_sandbox(build_dir, db_filename="stockt.db", copy_db=True):
+    """
+    Creates a throwaway working directory holding the binary and a copy of the build database.
+
+    The binary is hard-linked when possible (copied otherwise) because it resolves
+    `stockt.db` relative to its own location, not the working directory.
+
+    Args:
+        build_dir (str): Directory holding the binary and the reference database.
+        db_filename (str): Name of the database file to copy, if present.
+        copy_db (bool): Copy the build database (False when a fixture will be restored instead).
+
+    Returns:
+        str: Path to the new sandbox directory.
+    """
+    sandbox = tempfile.mkdtemp(prefix="gestion_stock_")
+    binary_name = get_binary_name()
+    try:
+        os.link(os.path.join(build_dir, binary_name), os.path.join(sandbox, binary_name))
+    except OSError:
+        shutil.copy2(os.path.join(build_dir, binary_name), os.path.join(sandbox, binary_name))
+    if platform.system() != "Windows":
+        # Same chmod +x the test scripts apply: fresh checkouts lose the exec bit
+        sandbox_binary = os.path.join(sandbox, binary_name)
+        os.chmod(sandbox_binary, os.stat(sandbox_binary).st_mode | stat.S_IEXEC)
+
+    db_path = os.path.join(build_dir, db_filename)
+    if copy_db and os.path.exists(db_path):
+        shutil.copy2(db_path, os.path.join(sandbox, db_filename))
+    return sandbox
+
+def read_metric_records(metrics_path, kind):
+    """
+    Yields the records of one kind ("latency", "resources") a test script's sessions wrote to `metrics_path`.
+    """
+    if os.path.exists(metrics_path):
+        with open(metrics_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("kind") == kind:
+                    yield record
+
+def load_latency_metrics(metrics_path):
+    """
+    Aggregates the operation timings a test script's sessions wrote to `metrics_path`.
+
+    Returns:
+        dict: Operation name → latency summary (count, mean, p50/p95/p99, max in ms).
+    """
+    samples = {}
+    for record in read_metric_records(metrics_path, "latency"):
+        samples.setdefault(record["op"], []).append(record["seconds"])
+    ordered = [op for op in LATENCY_OPERATIONS if op in samples] + sorted(set(samples) - set(LATENCY_OPERATIONS))
+    return {op: summarize_latencies(samples[op]) for op in ordered}
+
+def load_resource_metrics(metrics_path):
+    """
+    Aggregates the /proc resource records a test script's sessions wrote to `metrics_path`.
+
+    Returns:
+        dict: Totals over the script's binary processes (processes, peak_rss_kb (None when no
+        process lived long enough to be polled), cpu_user_s, cpu_sys_s, cpu_children_s, read_bytes,
+        write_bytes) and "operations": operation name →
+        count, write_bytes_per_op and write_amplification (bytes written per input byte).
+        Empty when nothing was sampled.
+    """
+    totals = {"processes": 0, "peak_rss_kb": None, "cpu_user_s": 0.0, "cpu_sys_s": 0.0, "cpu_children_s": 0.0,
+              "read_bytes": 0, "write_bytes": 0}
+    operations = {}
+    for record in read_metric_records(metrics_path, "resources"):
+        if record["op"] == "process":
+            totals["processes"] += 1
+            if record.get("peak_rss_kb") is not None:
+                totals["peak_rss_kb"] = max(totals["peak_rss_kb"] or 0, record["peak_rss_kb"])
+            totals["cpu_user_s"] += record.get("utime_s", 0.0)
+            totals["cpu_sys_s"] += record.get("stime_s", 0.0)
+            totals["cpu_children_s"] += record.get("child_cpu_s", 0.0)
+            totals["read_bytes"] += record.get("read_bytes", 0)
+            totals["write_bytes"] += record.get("write_bytes", 0)
+        elif "write_bytes" in record:
+            op = operations.setdefault(record["op"], {"count": 0, "write_bytes": 0, "payload_bytes": 0})
+            op["count"] += 1
+            op["write_bytes"] += record["write_bytes"]
+            op["payload_bytes"] += record.get("payload_bytes", 0)
+    if not totals["processes"]:
+        return {}
+    for name in ("cpu_user_s", "cpu_sys_s", "cpu_children_s"):
+        totals[name] = round(totals[name], 3)
+    ordered = [op for op in LATENCY_OPERATIONS if op in operations] + sorted(set(operations) - set(LATENCY_OPERATIONS))
+    totals["operations"] = {
+        op: {
+            "count": operations[op]["count"],
+            "write_bytes_per_op": round(operations[op]["write_bytes"] / operations[op]["count"]),
+            "write_amplification": (round(operations[op]["write_bytes"] / operations[op]["payload_bytes"], 1)
+                                    if operations[op]["payload_bytes"] else None)
+        }
+        for op in ordered
+    }
+    return totals
+
+# Test modules already imported by `run_entry_point()` in this process, by script path
+_LOADED_TESTS = {}
+
+def load_test_module(script_path):
+    """
+    Imports a test script as a module, once per process.
+
+    Returns:
+        module: The imported test module.
+    """
+    module = _LOADED_TESTS.get(script_path)
+    if module is None:
+        name = "gestion_stock_tests." + os.path.splitext(os.path.basename(script_path))[0]
+        spec = importlib.util.spec_from_file_location(name, script_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _LOADED_TESTS[script_path] = module
+    return module
+
+def run_entry_point(script_path, entry, work_dir, env, stdout=None, stderr=None):
+    """
+    Calls a test script's entry point inside the runner process.
+
+    The call mirrors `python <script>`: it runs with `work_dir` as current directory and
+    `env` as environment, its output is captured, and `sys.exit()` becomes the exit code.
+    There is no overall timeout here; the binary sessions inside the tests have their own.
+
+    Args:
+        script_path (str): Full path to the test script.
+        entry (str): Name of the function to call (e.g. "run_headless_test").
+        work_dir (str): Directory holding the binary and DB for this run.
+        env (dict): Environment the script would have been started with.
+        stdout, stderr: Binary files to write the output to (e.g. `OutputSpool.file`)
+            instead of capturing it in memory.
+
+    Returns:
+        tuple: (exit_code, stdout, stderr); the output strings are None when written to files.
+    """
+    to_files = stdout is not None
+    if to_files:
+        # Encode as the script's own stdout would, straight into the files
+        stdout, stderr = (io.TextIOWrapper(f, encoding="utf-8", errors="replace", newline="", write_through=True)
+                          for f in (stdout, stderr))
+    else:
+        stdout, stderr = io.StringIO(), io.StringIO()
+    saved_cwd, saved_env = os.getcwd(), dict(os.environ)
+    returncode = 0
+    try:
+        os.chdir(work_dir)
+        os.environ.clear()
+        os.environ.update(env)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                module = load_test_module(script_path)
+                # BINARY_PATH is resolved at import time; point it at this run's binary
+                if hasattr(module, "BINARY_PATH"):
+                    module.BINARY_PATH = env["GESTION_STOCK_BINARY"]
+                getattr(module, entry)()
+            except SystemExit as e:
+                if e.code is None:
+                    returncode = 0
+                elif isinstance(e.code, int):
+                    returncode = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+    if to_files:
+        for wrapper in (stdout, stderr):
+            wrapper.flush()
+            wrapper.detach()  # leaves the file open for its spool
+        return returncode, None, None
+    return returncode, stdout.getvalue(), stderr.getvalue()
+
+def run_test_script(script_path, db_filename="stockt.db", expected_output=None, work_dir=None, entry=None,
+                    fixture=None):
     """
     Executes a single test script, validates output, and logs diagnostic info.
 
@@ -36,83 +270,181 @@ def run_test_script(script_path, db_filename="stockt.db", expected_output=None):
         script_path (str): Full path to the test script.
         db_filename (str): Name of the expected database file.
         expected_output (str or list): Message(s) expected to confirm success.
+        work_dir (str): Sandbox holding the binary and DB for this run (defaults to `build/`).
+        entry (str): Entry point to call in-process instead of spawning `python <script>`.
+        fixture (str): Snapshot to restore as the database before the script runs.
 
     Returns:
         dict: Result summary including script name, status, duration, output path, and errors.
     """
-    start_time = time.time()
     script_name = os.path.basename(script_path)
     build_dir = os.path.join(get_repo_root(), "build")
-    logs_dir = os.path.join(build_dir, "logs")
+    work_dir = work_dir or build_dir
+    # Restored before the clock starts: resetting the database is not part of the test
+    restored = SnapshotManager().restore(fixture, os.path.join(work_dir, db_filename)) if fixture else None
+    start_time = time.time()
+    archive = LogArchive(os.path.join(build_dir, "logs", "archive"))
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    log_path = os.path.join(logs_dir, f"{script_name.replace('.py','')}_{timestamp}.log")
+    log_name = f"{script_name.replace('.py','')}_{timestamp}"
 
-    os.makedirs(logs_dir, exist_ok=True)
+    metrics_fd, metrics_path = tempfile.mkstemp(prefix="metrics_", suffix=".jsonl")
+    os.close(metrics_fd)
+    env = dict(os.environ, GESTION_STOCK_BINARY=os.path.join(work_dir, get_binary_name()))
+    env[METRICS_ENV] = metrics_path
 
+    out, err = OutputSpool(), OutputSpool()
     try:
-        completed = subprocess.run(
-            ["python", script_path],
-            cwd=build_dir,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            timeout=300
-        )
-
-        stdout = completed.stdout.strip()
-        stderr = completed.stderr.strip()
-        db_path = os.path.join(build_dir, db_filename)
+        if entry:
+            returncode = run_entry_point(script_path, entry, work_dir, env, stdout=out.file, stderr=err.file)[0]
+        else:
+            # The child writes straight into the spools: nothing is buffered in the runner
+            returncode = subprocess.run(
+                ["python", script_path],
+                cwd=work_dir,
+                env=env,
+                stdout=out.file,
+                stderr=err.file,
+                timeout=300
+            ).returncode
+
+        out.map()
+        err.map()
+        db_path = os.path.join(work_dir, db_filename)
         db_exists = os.path.exists(db_path)
 
-        # Output match logic
-        matched_msg = None
-        if isinstance(expected_output, list):
-            matched_msg = next((msg for msg in expected_output if msg in stdout), None)
-        elif isinstance(expected_output, str):
-            matched_msg = expected_output if expected_output in stdout else None
+        # Output match logic: one encoding-tolerant pass over the mapped stdout (utils/signatures.py)
+        matched_msg = match_expected(out.chunks(), expected_output)
 
         output_match = matched_msg is not None
 
-        # Diagnostic logging
-        with open(log_path, "w", encoding="utf-8") as log_file:
-            log_file.write(f"[{timestamp}] Running: {script_name}\n")
-            log_file.write(f"📁 Working Directory: {build_dir}\n")
-            log_file.write(f"📦 DB File: {db_filename} | Exists: {db_exists}\n\n")
-            log_file.write("📤 STDOUT:\n" + stdout + "\n\n")
-            log_file.write("❌ STDERR:\n" + stderr + "\n\n")
-            log_file.write(f"🔚 Exit Code: {completed.returncode}\n")
-            log_file.write(f"🔎 Output Match: {matched_msg if matched_msg else '✗ None Found'}\n")
+        # Diagnostic logging, stored deduplicated in the content-addressed archive; the captured
+        # streams are chunked in place from their mappings
+        archive.write_log(log_name, [
+            "".join([
+                f"[{timestamp}] Running: {script_name}\n",
+                f"📁 Working Directory: {work_dir}\n",
+                f"📦 DB File: {db_filename} | Exists: {db_exists}\n",
+                (f"🧊 Fixture: {fixture} ({restored['method']}, {restored['pages']} page(s) written)\n\n"
+                 if fixture else "\n"),
+                "📤 STDOUT:\n"
+            ]),
+            out.region(),
+            "\n\n❌ STDERR:\n",
+            err.region(),
+            "\n\n"
+            f"🔚 Exit Code: {returncode}\n"
+            f"🔎 Output Match: {matched_msg if matched_msg else '✗ None Found'}\n"
+        ])
 
         # Status evaluation
-        if completed.returncode == 0 and output_match and db_exists:
+        if returncode == 0 and output_match and db_exists:
             status = "✅ Passed"
         else:
             status = "❌ Failed"
 
-        return {
+        result = {
             "script": script_name,
             "status": status,
             "duration": round(time.time() - start_time, 2),
-            "log": log_path
+            "log": log_name,
+            "exit_code": returncode,
+            "output_digest": output_digest(out, err)
         }
+        if entry:
+            result["mode"] = "in-process"
+        if fixture:
+            result["fixture"] = fixture
+        latency = load_latency_metrics(metrics_path)
+        if latency:
+            result["latency"] = latency
+        resources = load_resource_metrics(metrics_path)
+        if resources:
+            result["resources"] = resources
+        return result
 
     except Exception as e:
         return {
             "script": script_name,
             "status": "⚠️ Error",
             "duration": round(time.time() - start_time, 2),
-            "log": log_path,
+            "log": log_name,
             "error": str(e)
         }
+    finally:
+        out.close()
+        err.close()
+        os.remove(metrics_path)
 
-def run_all_tests():
+def run_isolated_test_script(script_path, expected_output=None, entry=None, fixture=None):
+    """
+    Runs a test script inside a private sandbox and removes the sandbox afterwards.
+
+    Args:
+        script_path (str): Full path to the test script.
+        expected_output (str or list): Message(s) expected to confirm success.
+        entry (str): Entry point to call in-process, or None to spawn the script.
+        fixture (str): Snapshot to start from instead of a copy of `build/stockt.db`.
+
+    Returns:
+        dict: Result summary as produced by `run_test_script()`.
+    """
+    build_dir = os.path.join(get_repo_root(), "build")
+    sandbox = create_sandbox(build_dir, copy_db=fixture is None)
+    try:
+        return run_test_script(script_path, expected_output=expected_output, work_dir=sandbox, entry=entry,
+                               fixture=fixture)
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+def run_warm_test_script(script_path, expected_output=None, entry=None, fixture=None, pool_size=2):
+    """
+    Runs a test script's entry point on a warm session from this process's pool (utils/session_pool.py).
+
+    The session was launched, in its own sandbox with `fixture` already in place, before the
+    test started, so the test's duration and latencies leave out process startup.
+
+    Args:
+        script_path (str): Full path to the test script.
+        expected_output (str or list): Message(s) expected to confirm success.
+        entry (str): Entry point to call in-process.
+        fixture (str): Snapshot the session's database starts from.
+        pool_size (int): Idle sessions the pool keeps ready per fixture.
+
+    Returns:
+        dict: Result summary as produced by `run_test_script()`, with mode "in-process/warm" and
+        "warm_hit" telling whether the session was pre-launched or started on demand.
+    """
+    # Imported here: utils.session_pool builds on this module's sandboxes
+    from utils.session_pool import get_pool
+
+    with get_pool(fixture, pool_size).checkout() as session:
+        # The fixture is already in the sandbox; restoring it again would swap the file under the open DB
+        result = run_test_script(script_path, expected_output=expected_output, work_dir=session.sandbox, entry=entry)
+    result["mode"] = "in-process/warm"
+    result["warm_hit"] = session.warm_hit
+    if fixture:
+        result["fixture"] = fixture
+    return result
+
+def run_all_tests(jobs=1, in_process=False, use_cache=True, warm_pool=0):
     """
     Executes all test scripts defined in TEST_REGISTRY and logs results per test.
 
+    Args:
+        jobs (int): Number of worker processes. With more than one job, every script
+            runs in its own sandbox instead of sharing `build/stockt.db`.
+        in_process (bool): Call the registered entry points inside the runner (and its
+            workers) instead of starting one interpreter per script.
+        use_cache (bool): Report unchanged, previously passed tests from the result cache.
+        warm_pool (int): With `in_process`, run the entry points of "warm_session" scripts on
+            pre-launched sessions, keeping this many ready per fixture (0 disables the pool).
+            Every test then gets its own sandbox.
+
     Returns:
-        list: A list of result dictionaries including logs for each test case.
+        list: A list of result dictionaries including logs for each test case,
+        in TEST_REGISTRY order.
     """
-    results = []
+    tasks = []
     test_dir = os.path.join(get_repo_root(), "Tests")
 
     if not os.path.isdir(test_dir):
@@ -128,21 +460,113 @@ def run_all_tests():
             print(f"⚠️ Missing test script: {script_name}")
             continue
 
-        result = run_test_script(full_path, expected_output=meta.get("expected_output"))
-        results.append(result)
+        entry = meta.get("entry") if in_process else None
+        if in_process and not entry:
+            print(f"⚠️ No entry point registered for {script_name}; running it as a subprocess")
+        tasks.append((full_path, meta, entry))
+
+    build_dir = os.path.join(get_repo_root(), "build")
+    binary_path = os.path.join(build_dir, get_binary_name())
+    db_path = os.path.join(build_dir, "stockt.db")
+    if warm_pool and not in_process:
+        print("⚠️ The warm session pool needs in-process runs; ignoring it")
+        warm_pool = 0
+    mode = ("serial" if jobs <= 1 and not warm_pool else "isolated") + ("/in-process" if in_process else "")
+    mode += "/warm" if warm_pool else ""
+    cache = ResultCache() if use_cache else None
+
+    # Build missing fixture snapshots once, here, rather than racing in the workers
+    snapshots = SnapshotManager()
+    fixtures = {name: snapshots.ensure(name) for name in {meta["fixture"] for _, meta, _ in tasks if meta.get("fixture")}}
 
+    def task_key(path, meta):
+        fixture = fixtures.get(meta.get("fixture"))
+        return cache_key(binary_path, path, meta, db_path, mode, fixture["sha256"] if fixture else None)
+
+    if jobs <= 1 and not warm_pool:
+        results = []
+        for path, meta, entry in tasks:
+            # Serial tests share build/stockt.db: a hit also restores the DB the test left behind
+            key = task_key(path, meta) if cache else None
+            result = cache.lookup(key, db_path) if cache else None
+            if result is None:
+                result = run_test_script(path, expected_output=meta.get("expected_output"), entry=entry,
+                                         fixture=meta.get("fixture"))
+                if cache:
+                    cache.store(key, result, db_path)
+            results.append(result)
+        return results
+
+    # Every isolated test starts from its fixture or a copy of build/stockt.db, which they never modify
+    keys = [task_key(path, meta) if cache else None for path, meta, _ in tasks]
+    results = [cache.lookup(key) if cache else None for key in keys]
+
+    def task_call(path, meta, entry):
+        # Only scripts that take their session from take_session() can use a warm one
+        if warm_pool and entry and meta.get("warm_session"):
+            return run_warm_test_script, (path, meta.get("expected_output"), entry, meta.get("fixture"), warm_pool)
+        return run_isolated_test_script, (path, meta.get("expected_output"), entry, meta.get("fixture"))
+
+    pending = [i for i in range(len(tasks)) if results[i] is None]
+    if jobs <= 1:
+        # Warm pool on one worker: the pools live in this process and start filling now
+        from utils.session_pool import get_pool
+        for fixture in {tasks[i][1].get("fixture") for i in pending if tasks[i][2] and tasks[i][1].get("warm_session")}:
+            get_pool(fixture, warm_pool)
+        for i in pending:
+            function, args = task_call(*tasks[i])
+            results[i] = function(*args)
+            if cache:
+                cache.store(keys[i], results[i])
+        return results
+
+    # Each worker process keeps its own warm pool
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for i in pending:
+            function, args = task_call(*tasks[i])
+            futures[i] = pool.submit(function, *args)
+        for i, future in futures.items():
+            results[i] = future.result()
+            if cache:
+                cache.store(keys[i], results[i])
     return results
 
+def warm_pool_summary(results):
+    """
+    Counts how the warm-pool runs among `results` got their session.
+
+    Returns:
+        dict: checkouts, warm_hits and cold_starts (all 0 when no test ran on the pool).
+    """
+    warm = [r for r in results if "warm_hit" in r and not r.get("cached")]
+    hits = sum(1 for r in warm if r["warm_hit"])
+    return {"checkouts": len(warm), "warm_hits": hits, "cold_starts": len(warm) - hits}
+
 def main():
     """
     Entry point for executing all registered tests and printing detailed results.
     """
-    results = run_all_tests()
+    parser = argparse.ArgumentParser(description="Run all registered gestion_stock tests.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of parallel workers (isolated sandboxes)")
+    parser.add_argument("--in-process", action="store_true", help="Import test modules once and call their entry points")
+    parser.add_argument("--no-cache", action="store_true", help="Run every script, ignoring cached results")
+    parser.add_argument("--warm-pool", type=int, default=0, metavar="N",
+                        help="With --in-process: keep N pre-launched sessions ready per fixture")
+    args = parser.parse_args()
+
+    results = run_all_tests(jobs=args.jobs, in_process=args.in_process, use_cache=not args.no_cache,
+                            warm_pool=args.warm_pool)
     for test in results:
-        print(f"{test['script']}: {test['status']} ({test['duration']}s)")
-        print(f"↪ Log file: {test['log']}\n")
+        cached = f" [cached {test['cached_at']}]" if test.get("cached") else ""
+        print(f"{test['script']}: {test['status']} ({test['duration']}s){cached}")
+        print(f"↪ Log: {test['log']} (read with: python3 -m utils.log_archive cat <name>)\n")
         if test.get("error"):
             print(f"⚠️ Error: {test['error']}\n")
+    if args.warm_pool:
+        pool = warm_pool_summary(results)
+        print(f"🔥 Warm pool: {pool['warm_hits']} warm hit(s), {pool['cold_starts']} cold start(s) "
+              f"over {pool['checkouts']} checkout(s)")
 
 if __name__ == "__main__":
     main()